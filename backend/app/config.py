@@ -0,0 +1,73 @@
+"""
+Runtime settings, read once from environment variables.
+"""
+import os
+
+# Data directory path
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+
+# Forecast result cache
+CACHE_MAX_ENTRIES = int(os.getenv("FORECAST_CACHE_MAX_ENTRIES", "128"))
+CACHE_MAX_BYTES = int(os.getenv("FORECAST_CACHE_MAX_MB", "256")) * 1024 * 1024
+CACHE_TTL_SECONDS = float(os.getenv("FORECAST_CACHE_TTL_SECONDS", "3600"))
+# Shared on-disk tier (empty disables it). Point every uvicorn worker at the same directory.
+CACHE_DIR = os.getenv("FORECAST_CACHE_DIR", "")
+CACHE_DISK_MAX_BYTES = int(os.getenv("FORECAST_CACHE_DISK_MAX_MB", "1024")) * 1024 * 1024
+
+# Uploads are parsed from memory; only those larger than this spill to a temporary file,
+# which is deleted when the request ends. Nothing uploaded is kept on disk.
+UPLOAD_SPOOL_MAX_BYTES = int(os.getenv("FORECAST_UPLOAD_SPOOL_MB", "16")) * 1024 * 1024
+
+# Uploads at least this large are parsed in chunks, keeping only the date and target columns
+# (with 'y' as float32 where that is exact), so memory follows the two kept columns instead of the whole file
+STREAMING_PARSE_MIN_BYTES = int(os.getenv("FORECAST_STREAMING_PARSE_MB", "32")) * 1024 * 1024
+
+# Rows per NDJSON batch (one Server-Sent Event) in /forecast/stream responses
+STREAM_BATCH_ROWS = int(os.getenv("FORECAST_STREAM_BATCH_ROWS", "5000"))
+
+# Process pool for fit/predict/PDF work. 0 workers runs tasks in a background thread instead.
+EXECUTOR_MAX_WORKERS = int(os.getenv("FORECAST_WORKERS", str(os.cpu_count() or 1)))
+EXECUTOR_MAX_QUEUE = int(os.getenv("FORECAST_QUEUE_SIZE", str(2 * max(EXECUTOR_MAX_WORKERS, 1))))
+EXECUTOR_TASK_TIMEOUT_SECONDS = float(os.getenv("FORECAST_TASK_TIMEOUT_SECONDS", "300"))
+EXECUTOR_MAX_TASKS_PER_WORKER = int(os.getenv("FORECAST_MAX_TASKS_PER_WORKER", "50"))
+EXECUTOR_RETRY_AFTER_SECONDS = int(os.getenv("FORECAST_RETRY_AFTER_SECONDS", "5"))
+# Warm every worker (load Prophet/Stan/reportlab and run a tiny fit) before /readyz reports ready
+WARMUP_ENABLED = os.getenv("FORECAST_WARMUP", "1") == "1"
+
+# Asynchronous forecast jobs. JOB_STORE is "memory" or "sqlite" (shared by every worker on the host).
+JOB_STORE = os.getenv("FORECAST_JOB_STORE", "memory")
+JOB_DB_PATH = os.getenv("FORECAST_JOB_DB", os.path.join(DATA_DIR, "jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("FORECAST_JOB_WORKERS", "2"))
+JOB_RESULT_TTL_SECONDS = float(os.getenv("FORECAST_JOB_RESULT_TTL_SECONDS", "3600"))
+
+# Fitted model registry used for warm-start refreshes
+MODEL_REGISTRY_DIR = os.getenv("FORECAST_MODEL_DIR", os.path.join(DATA_DIR, "models"))
+
+# Stored datasets (POST /datasets), referenced by dataset_id instead of re-uploading the file
+DATASET_DIR = os.getenv("FORECAST_DATASET_DIR", os.path.join(DATA_DIR, "datasets"))
+
+# In-memory cache of fitted models used to answer new horizons without refitting
+MODEL_CACHE_MAX_ENTRIES = int(os.getenv("FORECAST_MODEL_CACHE_MAX_ENTRIES", "32"))
+MODEL_CACHE_MAX_BYTES = int(os.getenv("FORECAST_MODEL_CACHE_MAX_MB", "256")) * 1024 * 1024
+
+# engine='auto' picks the cheapest lightweight engine whose holdout MAPE (%) is at most this
+AUTO_ENGINE_MAPE_THRESHOLD = float(os.getenv("FORECAST_AUTO_ENGINE_MAPE", "10"))
+
+# Keep forecast values as float32 in results and the caches: half the memory, about 7 significant digits
+RESULT_FLOAT32 = os.getenv("FORECAST_FLOAT32_RESULTS", "0") == "1"
+
+# Rolling-origin backtests: folds per request, and cached fold fits reused across requests
+BACKTEST_MAX_FOLDS = int(os.getenv("FORECAST_BACKTEST_MAX_FOLDS", "50"))
+BACKTEST_CACHE_MAX_ENTRIES = int(os.getenv("FORECAST_BACKTEST_CACHE_MAX_ENTRIES", "2048"))
+
+# Hyperparameter search: largest grid a single /tune request may expand to
+TUNING_MAX_CANDIDATES = int(os.getenv("FORECAST_TUNING_MAX_CANDIDATES", "64"))
+
+# Add a Server-Timing header (per-stage durations) to every response. /metrics is always on.
+SERVER_TIMING_ENABLED = os.getenv("FORECAST_SERVER_TIMING", "1") == "1"
+
+# Per-request profiling (?profile=true on /forecast and /report). Off unless an admin turns it on.
+PROFILING_ENABLED = os.getenv("FORECAST_PROFILING", "0") == "1"
+PROFILE_DIR = os.getenv("FORECAST_PROFILE_DIR", os.path.join(DATA_DIR, "profiles"))
+PROFILE_MAX_COUNT = int(os.getenv("FORECAST_PROFILE_MAX_COUNT", "50"))
+PROFILE_INTERVAL_SECONDS = float(os.getenv("FORECAST_PROFILE_INTERVAL_MS", "5")) / 1000
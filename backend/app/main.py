@@ -1,8 +1,31 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import forecast
+from fastapi.responses import JSONResponse
+from starlette.formparsers import MultiPartParser
+from app import config
+from app.routes import backtest, batch, datasets, debug, forecast, jobs, models, tuning
+from app.utils.executor import forecast_executor
+from app.utils.jobs import job_manager
+from app.utils.telemetry import TelemetryMiddleware
+from app.utils.warmup import warmup
 
-app = FastAPI(title="Predictive Business Insights Platform")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the forecast workers in the background; /readyz reports ready once they are
+    if config.WARMUP_ENABLED:
+        warmup.start(forecast_executor)
+    else:
+        warmup.mark_ready()
+    yield
+    # Stop the job threads and forecast worker processes with the server
+    job_manager.shutdown()
+    forecast_executor.shutdown()
+
+# Keep uploads up to UPLOAD_SPOOL_MAX_BYTES in memory instead of Starlette's 1 MB default
+MultiPartParser.spool_max_size = config.UPLOAD_SPOOL_MAX_BYTES
+
+app = FastAPI(title="Predictive Business Insights Platform", lifespan=lifespan)
 
 # Configure CORS
 origins = [
@@ -20,9 +43,36 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request timing, counters and the Server-Timing header
+app.add_middleware(TelemetryMiddleware, server_timing=config.SERVER_TIMING_ENABLED)
+
 # Register Routers
 app.include_router(forecast.router)
+app.include_router(jobs.router)
+app.include_router(batch.router)
+app.include_router(models.router)
+app.include_router(backtest.router)
+app.include_router(datasets.router)
+app.include_router(tuning.router)
+app.include_router(debug.router)
 
 @app.get("/")
 def root():
     return {"status": "Backend is running"}
+
+@app.get("/healthz", tags=["Monitoring"])
+def healthz():
+    """
+    Liveness: the process is up and serving requests.
+    """
+    return {"status": "ok"}
+
+@app.get("/readyz", tags=["Monitoring"])
+def readyz():
+    """
+    Readiness: 200 once the forecast workers are warm, 503 until then (or if warm-up failed).
+    """
+    stats = warmup.stats()
+    if not stats["ready"]:
+        return JSONResponse(status_code=503, content={"status": "starting" if stats["error"] is None else "failed", **stats})
+    return {"status": "ready", **stats}
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from typing import Any, Dict, Optional
+from app.utils.backtesting import run_backtest
+from app.utils.cache import fold_cache
+from app.utils.engines import ENGINES
+from app.utils.executor import forecast_executor
+from app.routes.common import load_series, model_params, resampling_params
+
+router = APIRouter()
+
+@router.post("/backtest", tags=["Forecasting"])
+async def get_backtest(
+    file: Optional[UploadFile] = File(None),
+    dataset_id: Optional[str] = Query(None, description="Use a stored dataset (POST /datasets) instead of uploading a file"),
+    horizon: int = Query(30, ge=1, description="Days forecast from each cutoff"),
+    initial: Optional[int] = Query(None, ge=1, description="Minimum days of history before the first cutoff (default 3 x horizon)"),
+    step: Optional[int] = Query(None, ge=1, description="Days between cutoffs (default horizon / 2)"),
+    params: Dict[str, Any] = Depends(model_params),
+    resampling: Dict[str, Any] = Depends(resampling_params),
+    engine: str = Query('prophet', enum=list(ENGINES), description="Forecasting engine; 'auto' picks the cheapest one that backtests well")
+):
+    """
+    Rolling-origin backtest of the forecast model: refit at each cutoff, forecast the next
+    `horizon` days, and report out-of-sample MAE/RMSE/MAPE per day ahead and per fold.
+    """
+    df = load_series(file, dataset_id, "/backtest")
+
+    try:
+        return await run_backtest(
+            df,
+            forecast_executor,
+            fold_cache,
+            horizon=horizon,
+            initial=initial,
+            step=step,
+            engine=engine,
+            **params,
+            **resampling
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Backtesting error: {str(e)}")
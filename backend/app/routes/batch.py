@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, Optional
+from app.utils.batch import batch_columns, batch_timing, columnar_batch, run_batch, split_series
+from app.utils.executor import forecast_executor
+from app.utils.forecasting import read_csv_file
+from app.utils.ingestion import read_columnar, sniff_format
+from app.utils.telemetry import rows_processed, span
+from app.routes.common import forecast_params
+import json
+import time
+import pandas as pd
+
+router = APIRouter()
+
+def _series_line(result) -> str:
+    """
+    One NDJSON line per finished series, with its frames encoded column-wise.
+    """
+    line = {k: v for k, v in result.items() if k not in ("forecast", "anomalies")}
+    for key in ("forecast", "anomalies"):
+        if key in result:
+            frame = result[key].copy()
+            frame['ds'] = pd.to_datetime(frame['ds']).dt.strftime('%Y-%m-%dT%H:%M:%S')
+            line[key] = {col: frame[col].tolist() for col in frame.columns}
+    return json.dumps(line, default=str) + "\n"
+
+@router.post("/forecast/batch", tags=["Forecasting"])
+async def get_batch_forecast(
+    file: UploadFile = File(...),
+    series_column: Optional[str] = Query(None, description="Column holding the series id (auto-detected if omitted)"),
+    stream: bool = Query(False, description="Stream one NDJSON line per series as each finishes"),
+    days: int = Query(30, description="Number of days to forecast"),
+    params: Dict[str, Any] = Depends(forecast_params)
+):
+    """
+    Forecast every series in a long-format CSV, Parquet or Arrow file (one row per series id
+    and date) in parallel. Failures are reported per series and do not abort the batch.
+    """
+    try:
+        with span("parse"):
+            file_format = sniff_format(file.file)
+            if file_format == "csv":
+                df = read_csv_file(file.file)
+            else:
+                df = read_columnar(file.file, file_format, lambda frame: batch_columns(frame, series_column))
+        with span("normalize"):
+            groups = list(split_series(df, series_column))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rows_processed.inc(sum(len(y) for _, _, y in groups), route="/forecast/batch")
+
+    params = {"days": days, **params}
+    started = time.perf_counter()
+
+    if stream:
+        async def lines():
+            results = []
+            async for result in run_batch(groups, params, forecast_executor):
+                results.append(result)
+                yield _series_line(result)
+            yield json.dumps({"summary": batch_timing(results, time.perf_counter() - started)}) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    results = [result async for result in run_batch(groups, params, forecast_executor)]
+    results.sort(key=lambda r: r["series_id"])
+    with span("serialize"):
+        return columnar_batch(results, time.perf_counter() - started)
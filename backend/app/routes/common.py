@@ -0,0 +1,236 @@
+from contextlib import contextmanager
+from fastapi import Depends, HTTPException, Query, UploadFile
+from fastapi.responses import Response
+from typing import Any, Dict, Iterator, Optional
+from app import config
+from app.utils.anomalies import DETECTORS
+from app.utils.datasets import dataset_store
+from app.utils.downsampling import chart_view
+from app.utils.encoding import RESPONSE_FORMATS, encode_body, negotiate, records
+from app.utils.engines import ENGINES
+from app.utils.executor import ExecutorBusy, TaskTimeout, forecast_executor
+from app.utils.profiling import RequestProfile, profile_store, run_profiled
+from app.utils.forecasting import normalize_columns, read_csv_file
+from app.utils.ingestion import read_columnar, read_series_csv, series_columns, sniff_format
+from app.utils.resampling import AGGREGATIONS, GRANULARITIES
+from app.utils.telemetry import record_stages, rows_processed, span
+import pandas as pd
+
+def model_params(
+    seasonality_mode: str = Query('additive', enum=['additive', 'multiplicative']),
+    growth: str = Query('linear', enum=['linear', 'flat']),
+    daily_seasonality: str = 'auto',
+    weekly_seasonality: str = 'auto',
+    yearly_seasonality: str = 'auto',
+    changepoint_prior_scale: float = Query(0.05, gt=0, description="Trend flexibility; larger follows the history more closely"),
+    seasonality_prior_scale: float = Query(10.0, gt=0, description="Seasonality strength; smaller damps seasonal swings")
+) -> Dict[str, Any]:
+    """
+    The Prophet settings every fitting route takes (a Depends() dependency), as
+    generate_forecast() keyword arguments.
+    """
+    return {
+        "seasonality_mode": seasonality_mode,
+        "growth": growth,
+        "daily_seasonality": daily_seasonality,
+        "weekly_seasonality": weekly_seasonality,
+        "yearly_seasonality": yearly_seasonality,
+        "changepoint_prior_scale": changepoint_prior_scale,
+        "seasonality_prior_scale": seasonality_prior_scale
+    }
+
+def resampling_params(
+    granularity: str = Query('auto', enum=list(GRANULARITIES), description="Resample the history before fitting; 'auto' picks from the data's frequency and the horizon"),
+    aggregation: str = Query('mean', enum=list(AGGREGATIONS), description="How rows in one period are combined when resampling")
+) -> Dict[str, Any]:
+    """
+    The pre-fit resampling settings (see resampling.resample_series), as a Depends() dependency.
+    """
+    return {"granularity": granularity, "aggregation": aggregation}
+
+def forecast_params(
+    model: Dict[str, Any] = Depends(model_params),
+    resampling: Dict[str, Any] = Depends(resampling_params),
+    interval_mode: str = Query('full', enum=['full', 'fast', 'point'], description="How prediction intervals are computed"),
+    interval_samples: int = Query(300, ge=0, le=5000, description="Samples drawn for sampled intervals"),
+    engine: str = Query('prophet', enum=list(ENGINES), description="Forecasting engine; 'auto' picks the cheapest one that backtests well"),
+    anomaly_method: str = Query('interval', enum=list(DETECTORS), description="Anomaly detector"),
+    anomaly_threshold: Optional[float] = Query(None, description="Detector threshold (z-score, MAD multiple or percentile)")
+) -> Dict[str, Any]:
+    """
+    model_params() and resampling_params() plus the engine, interval and anomaly settings of
+    the forecasting routes. The horizon is left to each route: most take `days`, /forecast/horizons
+    takes a list of them.
+    """
+    return {
+        **model,
+        "interval_mode": interval_mode,
+        "interval_samples": interval_samples,
+        "engine": engine,
+        "anomaly_method": anomaly_method,
+        "anomaly_threshold": anomaly_threshold,
+        **resampling
+    }
+
+async def offload(fn, *args, profile: Optional[RequestProfile] = None, **kwargs):
+    """
+    Run CPU-bound work in the process pool, mapping pool saturation and timeouts to HTTP errors.
+    With a profile, the task is sampled in its worker and the stacks are added to the profile.
+    """
+    try:
+        if profile is None:
+            return await forecast_executor.run(fn, *args, **kwargs)
+        outcome = await forecast_executor.run(run_profiled, fn, profile.interval, *args, **kwargs)
+    except ExecutorBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except TaskTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+    profile.add(outcome["samples"])
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
+
+@contextmanager
+def profiled_request(requested: bool, route: str) -> Iterator[Optional[RequestProfile]]:
+    """
+    Profile the block if the caller asked for it (refused unless profiling is enabled), and
+    save the profile when the block exits, whether or not it succeeded. Yields None otherwise.
+    """
+    if not requested:
+        yield None
+        return
+    if not config.PROFILING_ENABLED:
+        raise HTTPException(status_code=403, detail="Profiling is disabled on this server (FORECAST_PROFILING).")
+    profile = RequestProfile(route)
+    try:
+        yield profile
+    finally:
+        profile_store.save(profile.finish())
+
+async def read_upload(file: UploadFile) -> bytes:
+    """
+    The raw upload as bytes, for work that outlives the request (jobs). Routes that parse the
+    upload straight away use parse_upload() instead, which reads the spooled file in place.
+    """
+    with span("upload_read"):
+        return await file.read()
+
+def parse_upload(file: UploadFile, route: str) -> pd.DataFrame:
+    """
+    Parse and normalize an uploaded CSV, Parquet or Arrow file into 'ds'/'y', timing both stages
+    and counting the rows. Parquet and Arrow files are told apart by their first bytes and only
+    their date and target columns are read. Large CSVs are streamed (see
+    ingestion.read_series_csv), which parses and normalizes in one pass.
+    Raises ValueError for files that cannot be used.
+    """
+    file_format = sniff_format(file.file)
+    if file_format != "csv":
+        with span("parse"):
+            df = read_columnar(file.file, file_format, series_columns)
+        with span("normalize"):
+            df = normalize_columns(df)
+    elif (file.size or 0) >= config.STREAMING_PARSE_MIN_BYTES:
+        with span("parse"):
+            df = read_series_csv(file.file)
+    else:
+        with span("parse"):
+            df = read_csv_file(file.file)
+        with span("normalize"):
+            df = normalize_columns(df)
+    rows_processed.inc(len(df), route=route)
+    return df
+
+def load_series(file: Optional[UploadFile], dataset_id: Optional[str], route: str) -> pd.DataFrame:
+    """
+    The 'ds'/'y' frame a route works on: the uploaded file, or a stored dataset (see
+    utils.datasets), which skips the transfer and the parse. Exactly one must be given.
+    """
+    if (file is None) == (dataset_id is None):
+        raise HTTPException(status_code=422, detail="Send either a file or a dataset_id.")
+    try:
+        if file is not None:
+            return parse_upload(file, route)
+        with span("parse"):
+            df = dataset_store.load(dataset_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if df is None:
+        raise HTTPException(status_code=404, detail="Dataset not found.")
+    rows_processed.inc(len(df), route=route)
+    return df
+
+def record_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Record the stage timings a pool worker measured for result (see telemetry.stage_timer).
+    """
+    record_stages(result.pop("stage_seconds", None))
+    return result
+
+def forecast_payload(
+    analysis_result: Dict[str, Any],
+    row_count: int,
+    days: int,
+    seasonality_mode: str,
+    growth: str,
+    response_format: str = "records",
+    window: Optional[Dict[str, Any]] = None,
+    result_id: Optional[str] = None
+) -> Any:
+    """
+    Shape a generate_forecast() result into the body returned by /forecast: a dict in the
+    default 'records' format, or an already encoded Response for the others (see utils.encoding).
+    With a window ({start, end, max_points}, any of them None), the data and anomalies are cut
+    to it (see downsampling.chart_view) and the body describes the view under 'chart'.
+    """
+    forecast_df = analysis_result["forecast"]
+    anomalies_df = analysis_result["anomalies"]
+    metrics = analysis_result["metrics"]
+    insights_data = analysis_result["insights"] # Structured dict
+
+    chart = None
+    if window is not None and any(v is not None for v in window.values()):
+        with span("downsample"):
+            forecast_df, anomalies_df, chart = chart_view(
+                forecast_df, anomalies_df, history_end=analysis_result.get("history_end"), **window
+            )
+
+    payload = {
+        "message": f"Analysis complete. Forecasted {days} days.",
+        "row_count": row_count,
+        "parameters": {
+            "seasonality_mode": seasonality_mode,
+            "growth": growth,
+        },
+        "engine": analysis_result.get("engine_info"),
+        "resampling": analysis_result.get("resampling"),
+        "metrics": metrics,
+        "anomalies": anomalies_df,
+        "insights": insights_data.get("insights", []),
+        "recommendations": insights_data.get("recommendations", []),
+        "data": forecast_df
+    }
+    if result_id is not None:
+        payload["result_id"] = result_id
+    if chart is not None:
+        payload["chart"] = chart
+    return encode_response(payload, response_format)
+
+def encode_response(payload: Dict[str, Any], response_format: str) -> Any:
+    """
+    The route's return value for a payload whose frames are still DataFrames: a dict for
+    'records', an encoded Response for the other formats.
+    """
+    with span("serialize"):
+        if response_format == "records":
+            return records(payload)
+        return Response(content=encode_body(payload, response_format), media_type=RESPONSE_FORMATS[response_format])
+
+def response_format(requested: Optional[str], accept: Optional[str]) -> str:
+    """
+    Negotiate the body format (?format= or Accept), as a 400 for an unknown ?format=.
+    """
+    try:
+        return negotiate(requested, accept)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,71 @@
+from fastapi import APIRouter, HTTPException, Query, UploadFile, File
+from typing import Optional
+from app.utils.datasets import dataset_store
+from app.routes.common import parse_upload
+
+router = APIRouter(prefix="/datasets")
+
+def _read_upload(file: UploadFile, route: str):
+    try:
+        return parse_upload(file, route)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _get_dataset(dataset_id: str):
+    try:
+        meta = dataset_store.get(dataset_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Dataset not found.")
+    return meta
+
+@router.post("", tags=["Datasets"], status_code=201)
+def create_dataset(
+    file: UploadFile = File(...),
+    name: Optional[str] = Query(None, max_length=200, description="Label shown in the dataset list"),
+    reuse: bool = Query(False, description="Return an existing dataset with exactly these rows instead of storing a new one")
+):
+    """
+    Store an uploaded series once, normalized to 'ds'/'y'. Pass the returned id as dataset_id
+    to /forecast, /report or /backtest instead of uploading the file again. With reuse=true,
+    rows that are already stored return the existing dataset; appends to it and its deletion
+    then affect everyone holding its id.
+    """
+    df = _read_upload(file, "/datasets")
+    try:
+        return dataset_store.create(df, name, reuse)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("", tags=["Datasets"])
+def list_datasets():
+    """
+    Every stored dataset with its row count, date range and content hash, oldest first.
+    """
+    return {"datasets": dataset_store.list()}
+
+@router.get("/{dataset_id}", tags=["Datasets"])
+def get_dataset(dataset_id: str):
+    return _get_dataset(dataset_id)
+
+@router.post("/{dataset_id}/rows", tags=["Datasets"])
+def append_rows(dataset_id: str, file: UploadFile = File(...)):
+    """
+    Append the uploaded rows to a dataset. Only the new rows are written.
+    """
+    _get_dataset(dataset_id)
+    df = _read_upload(file, "/datasets/{dataset_id}/rows")
+    try:
+        meta = dataset_store.append(dataset_id, df)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if meta is None:
+        raise HTTPException(status_code=404, detail="Dataset not found.")
+    return meta
+
+@router.delete("/{dataset_id}", tags=["Datasets"])
+def delete_dataset(dataset_id: str):
+    _get_dataset(dataset_id)
+    dataset_store.delete(dataset_id)
+    return {"id": dataset_id, "deleted": True}
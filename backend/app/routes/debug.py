@@ -0,0 +1,24 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import FileResponse
+from app import config
+from app.utils.profiling import profile_store
+
+router = APIRouter(prefix="/debug")
+
+@router.get("/profiles/{profile_id}", tags=["Debug"])
+def get_profile(
+    profile_id: str,
+    format: str = Query('summary', enum=['summary', 'collapsed'], description="Top-functions summary, or collapsed stacks for flame graph tools")
+):
+    """
+    Download a profile captured with ?profile=true (see the X-Profile-Id response header).
+    """
+    if not config.PROFILING_ENABLED:
+        raise HTTPException(status_code=403, detail="Profiling is disabled on this server (FORECAST_PROFILING).")
+    try:
+        path = profile_store.path(profile_id, format)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    return FileResponse(path, media_type="text/plain", filename=f"profile_{profile_id}_{format}.txt")
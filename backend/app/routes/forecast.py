@@ -1,145 +1,394 @@
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File
-from fastapi.responses import StreamingResponse
-from app.utils.forecasting import generate_forecast, normalize_columns
-import os
-import io
+import asyncio
+import logging
+import queue
+from datetime import datetime
+from fastapi import APIRouter, Depends, Header, HTTPException, Path, Query, Response, UploadFile, File
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+from app.config import STREAM_BATCH_ROWS
+from app.utils.cache import forecast_cache, make_cache_key, model_cache
+from app.utils.executor import forecast_executor
+from app.utils.forecasting import (
+    fitted_horizon, forecast_from_model, generate_forecast, generate_insights
+)
+from app.utils.downsampling import MIN_POINTS, chart_view
+from app.utils.encoding import RESPONSE_FORMATS, dumps, ndjson_batches, sse_event
+from app.utils.resampling import resolve_granularity, timestamps
+from app.utils.profiling import RequestProfile
+from app.utils.singleflight import forecast_flights
+from app.utils.telemetry import registry, report_failures, span
+from app.routes.common import encode_response, forecast_params, forecast_payload, load_series, offload, profiled_request, record_result, response_format
 import pandas as pd
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
-# Data directory path
-DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "data")
-os.makedirs(DATA_DIR, exist_ok=True)
+async def _cached_forecast(
+    df: pd.DataFrame,
+    profile: Optional[RequestProfile] = None,
+    progress: Optional[Callable[[str], None]] = None,
+    **params
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Run generate_forecast on the normalized frame, reusing a cached result when the same data
+    and parameters were analysed before (e.g. /forecast followed by /report).
+    Identical requests that arrive while the first is still computing wait for its result
+    instead of starting their own (see singleflight.SingleFlight).
+    A profiled request always refits, so the profile shows the real work.
+    progress is called with each stage name when this request runs the fit itself.
+    Returns the cache key with the result; /forecast hands it out as the result_id.
+    """
+    if not params.get("components", True):
+        # The default, so /report and /horizons (which never ask for components) share results
+        del params["components"]
+    key = make_cache_key(df, **params)
+    if profile is not None:
+        return key, await _compute_forecast(df, key, profile, progress, **params)
+    result = forecast_cache.get(key)
+    if result is not None:
+        return key, result
+    return key, await forecast_flights.run(key, lambda: _compute_forecast(df, key, None, progress, **params))
+
+async def _compute_forecast(
+    df: pd.DataFrame,
+    key: str,
+    profile: Optional[RequestProfile],
+    progress: Optional[Callable[[str], None]],
+    **params
+) -> Dict[str, Any]:
+    # Same data and model settings with another horizon: predict the extra days, don't refit
+    model_params = {k: v for k, v in params.items() if k != "days"}
+    if model_params.get("granularity", "auto") == "auto":
+        # What 'auto' resamples to depends on the horizon, so key the fit on the outcome
+        model_params["granularity"] = resolve_granularity(timestamps(df['ds']), params["days"])
+    fitted_key = make_cache_key(df, fitted_model=True, **model_params)
+    fitted = model_cache.get(fitted_key) if profile is None else None
+    if fitted is None:
+        result = record_result(await offload(generate_forecast, df, profile=profile, progress=progress, **params))
+        model_cache.set(fitted_key, result)
+    else:
+        if params["days"] <= fitted_horizon(fitted):
+            result = record_result(forecast_from_model(fitted, params["days"]))
+        else:
+            result = record_result(await offload(forecast_from_model, fitted, params["days"]))
+            model_cache.set(fitted_key, {**fitted, "forecast": result["full_forecast"]})
+
+    forecast_cache.set(key, result)
+    return result
 
 @router.post("/forecast", tags=["Forecasting"])
 async def get_forecast(
-    file: UploadFile = File(...),
+    response: Response,
+    file: Optional[UploadFile] = File(None),
+    dataset_id: Optional[str] = Query(None, description="Use a stored dataset (POST /datasets) instead of uploading a file"),
     days: int = Query(30, description="Number of days to forecast"),
-    seasonality_mode: str = Query('additive', enum=['additive', 'multiplicative']),
-    growth: str = Query('linear', enum=['linear', 'flat']),
-    daily_seasonality: str = 'auto',
-    weekly_seasonality: str = 'auto',
-    yearly_seasonality: str = 'auto'
+    params: Dict[str, Any] = Depends(forecast_params),
+    components: bool = Query(False, description="Also return the model's trend and seasonal components in each row (Prophet)"),
+    max_points: Optional[int] = Query(None, ge=MIN_POINTS, description="Downsample the returned series to about this many points (LTTB)"),
+    start: Optional[datetime] = Query(None, description="Only return the series from this date"),
+    end: Optional[datetime] = Query(None, description="Only return the series up to this date"),
+    format: Optional[str] = Query(None, enum=list(RESPONSE_FORMATS), description="Response format (default records; also chosen by the Accept header)"),
+    accept: Optional[str] = Header(None),
+    profile: bool = Query(False, description="Profile this request (admin only; needs FORECAST_PROFILING=1)")
 ):
     """
     Generate a forecast using the Prophet model based on uploaded CSV data.
+    The body's result_id fetches other windows of the same forecast from /forecast/results.
     """
-    contents = await file.read()
-    
-    try:
-        df = pd.read_csv(io.BytesIO(contents))
-    except Exception:
+    body_format = response_format(format, accept)
+    with profiled_request(profile, "/forecast") as request_profile:
+        df = load_series(file, dataset_id, "/forecast")
+
         try:
-            df = pd.read_csv(io.BytesIO(contents), encoding='latin1')
+            # Generate analysis (Forecast + Anomalies + Metrics)
+            result_id, analysis_result = await _cached_forecast(
+                df,
+                profile=request_profile,
+                days=days,
+                **params,
+                components=components
+            )
+
+            window = {"start": start, "end": end, "max_points": max_points}
+            body = forecast_payload(
+                analysis_result, len(df), days, params["seasonality_mode"], params["growth"], body_format, window, result_id
+            )
+            if request_profile is not None:
+                # An encoded body is returned as is, so it carries the header itself
+                (body if isinstance(body, Response) else response).headers["X-Profile-Id"] = request_profile.id
+            return body
+        except HTTPException:
+            raise
+        except ValueError as ve:
+            raise HTTPException(status_code=400, detail=str(ve))
         except Exception as e:
-            raise HTTPException(status_code=400, detail="Invalid CSV file. Could not parse.")
+            raise HTTPException(status_code=500, detail=f"Forecasting error: {str(e)}")
+
+async def _forecast_events(df: pd.DataFrame, params: Dict[str, Any], batch_rows: int) -> AsyncIterator[bytes]:
+    """
+    The /forecast/stream body: progress events while the forecast runs, a summary, then
+    the anomalies and the forecast rows in NDJSON batches serialized one at a time.
+    """
+    yield sse_event("progress", [dumps({"stage": "parsed", "rows": len(df)}).decode()])
+
+    # Stages come back from the worker process through the executor's queue, as for jobs
+    stages = forecast_executor.make_queue()
+    task = asyncio.ensure_future(_cached_forecast(df, progress=stages.put, **params))
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=0.1)
+            while True:
+                try:
+                    stage = stages.get_nowait()
+                except queue.Empty:
+                    break
+                yield sse_event("progress", [dumps({"stage": stage}).decode()])
+            if done:
+                break
+        result_id, analysis_result = task.result()
+    except HTTPException as he:
+        yield sse_event("error", [dumps({"status_code": he.status_code, "detail": he.detail}).decode()])
+        return
+    except ValueError as ve:
+        yield sse_event("error", [dumps({"status_code": 400, "detail": str(ve)}).decode()])
+        return
+    except Exception as e:
+        yield sse_event("error", [dumps({"status_code": 500, "detail": f"Forecasting error: {str(e)}"}).decode()])
+        return
+    finally:
+        # A client that disconnected stops waiting; the shared computation still fills the cache
+        if not task.done():
+            task.cancel()
+
+    forecast_df = analysis_result["forecast"]
+    anomalies_df = analysis_result["anomalies"]
+    insights_data = analysis_result["insights"]
+    summary = {
+        "message": f"Analysis complete. Forecasted {params['days']} days.",
+        "row_count": len(df),
+        "parameters": {
+            "seasonality_mode": params["seasonality_mode"],
+            "growth": params["growth"],
+        },
+        "engine": analysis_result.get("engine_info"),
+        "resampling": analysis_result.get("resampling"),
+        "metrics": analysis_result["metrics"],
+        "insights": insights_data.get("insights", []),
+        "recommendations": insights_data.get("recommendations", []),
+        "result_id": result_id,
+        "history_end": analysis_result.get("history_end"),
+        "anomaly_rows": len(anomalies_df),
+        "data_rows": len(forecast_df),
+        "batch_rows": batch_rows
+    }
+    yield sse_event("summary", [dumps(summary).decode()])
 
+    for event, frame in (("anomalies", anomalies_df), ("data", forecast_df)):
+        for lines in ndjson_batches(frame, batch_rows):
+            yield sse_event(event, lines)
+    yield sse_event("done", [dumps({"result_id": result_id}).decode()])
+
+@router.post("/forecast/stream", tags=["Forecasting"])
+async def stream_forecast(
+    file: Optional[UploadFile] = File(None),
+    dataset_id: Optional[str] = Query(None, description="Use a stored dataset (POST /datasets) instead of uploading a file"),
+    days: int = Query(30, description="Number of days to forecast"),
+    params: Dict[str, Any] = Depends(forecast_params),
+    components: bool = Query(False, description="Also return the model's trend and seasonal components in each row (Prophet)"),
+    batch_rows: int = Query(STREAM_BATCH_ROWS, ge=1, le=100000, description="Rows per NDJSON batch")
+):
+    """
+    The /forecast analysis as Server-Sent Events, for clients that render while it runs.
+    Events: 'progress' ({stage}) while the forecast runs, 'summary' (the /forecast body
+    without its series), then 'anomalies' and 'data' whose data lines are NDJSON rows
+    (batch_rows per event, history first), and 'done'. A failure after the stream has
+    started is sent as an 'error' event ({status_code, detail}).
+    """
+    df = load_series(file, dataset_id, "/forecast/stream")
+    params = {"days": days, **params, "components": components}
+    return StreamingResponse(
+        _forecast_events(df, params, batch_rows),
+        media_type="text/event-stream",
+        # Proxies must pass events on as they come instead of buffering the response
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/forecast/results/{result_id}", tags=["Forecasting"])
+def get_forecast_window(
+    result_id: str = Path(..., pattern="^[0-9a-f]{64}$", description="result_id returned by /forecast"),
+    max_points: Optional[int] = Query(None, ge=MIN_POINTS, description="Downsample the returned series to about this many points (LTTB)"),
+    start: Optional[datetime] = Query(None, description="Only return the series from this date"),
+    end: Optional[datetime] = Query(None, description="Only return the series up to this date"),
+    format: Optional[str] = Query(None, enum=list(RESPONSE_FORMATS), description="Response format (default records; also chosen by the Accept header)"),
+    accept: Optional[str] = Header(None)
+):
+    """
+    Another window of a forecast already computed by /forecast, cut from the cached
+    full-resolution result: zooming in or panning never refits. 404 once the result has
+    left the cache; post the data to /forecast again to recompute it.
+    """
+    body_format = response_format(format, accept)
+    result = forecast_cache.get(result_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Forecast result not found or expired. Run /forecast again.")
+
+    try:
+        with span("downsample"):
+            forecast_df, anomalies_df, chart = chart_view(
+                result["forecast"], result["anomalies"], start=start, end=end,
+                max_points=max_points, history_end=result.get("history_end")
+            )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    return encode_response(
+        {"result_id": result_id, "chart": chart, "anomalies": anomalies_df, "data": forecast_df},
+        body_format
+    )
+
+@router.post("/forecast/horizons", tags=["Forecasting"])
+async def get_forecast_horizons(
+    file: Optional[UploadFile] = File(None),
+    dataset_id: Optional[str] = Query(None, description="Use a stored dataset (POST /datasets) instead of uploading a file"),
+    horizons: str = Query("7,30,90", description="Comma-separated forecast horizons in days"),
+    params: Dict[str, Any] = Depends(forecast_params)
+):
+    """
+    Forecast several horizons from a single fit. The model is fitted (or taken from the
+    model cache) once for the longest horizon; shorter horizons are slices of it.
+    """
     try:
-        df = normalize_columns(df)
-    except ValueError as e:
-         raise HTTPException(status_code=400, detail=str(e))
+        days_list = sorted({int(h) for h in horizons.split(",") if h.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="horizons must be a comma-separated list of integers.")
+    if not days_list or days_list[0] <= 0:
+        raise HTTPException(status_code=400, detail="horizons must contain positive integers.")
 
-    file_location = os.path.join(DATA_DIR, f"clean_{file.filename}")
-    df.to_csv(file_location, index=False)
+    df = load_series(file, dataset_id, "/forecast/horizons")
 
     try:
-        # Generate analysis (Forecast + Anomalies + Metrics)
-        analysis_result = generate_forecast(
-            file_path=file_location,
-            days=days,
-            seasonality_mode=seasonality_mode,
-            growth=growth,
-            daily_seasonality=daily_seasonality,
-            weekly_seasonality=weekly_seasonality,
-            yearly_seasonality=yearly_seasonality
+        _, result = await _cached_forecast(
+            df,
+            days=days_list[-1],
+            **params
         )
-        
-        forecast_df = analysis_result["forecast"]
-        anomalies_df = analysis_result["anomalies"]
-        metrics = analysis_result["metrics"]
-        insights_data = analysis_result["insights"] # Structured dict
-        
-        forecast_data = forecast_df.to_dict(orient="records")
-        anomalies_data = anomalies_df.to_dict(orient="records")
-        
-        return {
-            "message": f"Analysis complete. Forecasted {days} days.",
-            "row_count": len(df),
-            "parameters": {
-                "seasonality_mode": seasonality_mode,
-                "growth": growth,
-            },
-            "metrics": metrics,
-            "anomalies": anomalies_data,
-            "insights": insights_data.get("insights", []),
-            "recommendations": insights_data.get("recommendations", []),
-            "data": forecast_data
-        }
+    except HTTPException:
+        raise
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Forecasting error: {str(e)}")
 
+    forecast_df = result["forecast"]
+    history = df.assign(ds=pd.to_datetime(df['ds']))
+    n_history = int((forecast_df['ds'] <= result.get("history_end", history['ds'].max())).sum())
+
+    horizon_data = {}
+    for days in days_list:
+        horizon_forecast = forecast_df.iloc[:n_history + days]
+        with span("insights"):
+            insights_data = generate_insights(horizon_forecast, result["anomalies"], history)
+        with span("serialize"):
+            horizon_data[str(days)] = {
+                "data": horizon_forecast.iloc[n_history:].to_dict(orient="records"),
+                "insights": insights_data.get("insights", []),
+                "recommendations": insights_data.get("recommendations", [])
+            }
+
+    with span("serialize"):
+        history_data = forecast_df.iloc[:n_history].to_dict(orient="records")
+        anomalies_data = result["anomalies"].to_dict(orient="records")
+
+    return {
+        "message": f"Analysis complete. Forecasted {', '.join(map(str, days_list))} days.",
+        "row_count": len(df),
+        "parameters": {
+            "seasonality_mode": params["seasonality_mode"],
+            "growth": params["growth"],
+        },
+        "engine": result.get("engine_info"),
+        "resampling": result.get("resampling"),
+        "metrics": result["metrics"],
+        "anomalies": anomalies_data,
+        "history": history_data,
+        "horizons": horizon_data
+    }
+
 @router.post("/report", tags=["Forecasting"])
 async def get_forecast_report(
-    file: UploadFile = File(...),
+    file: Optional[UploadFile] = File(None),
+    dataset_id: Optional[str] = Query(None, description="Use a stored dataset (POST /datasets) instead of uploading a file"),
     days: int = Query(30, description="Number of days to forecast"),
-    seasonality_mode: str = Query('additive', enum=['additive', 'multiplicative']),
-    growth: str = Query('linear', enum=['linear', 'flat']),
-    daily_seasonality: str = 'auto',
-    weekly_seasonality: str = 'auto',
-    yearly_seasonality: str = 'auto'
+    params: Dict[str, Any] = Depends(forecast_params),
+    profile: bool = Query(False, description="Profile this request (admin only; needs FORECAST_PROFILING=1)")
 ):
     """
     Generates a PDF report for the forecast.
     """
-    os.makedirs("data", exist_ok=True)
-    file_location = os.path.join("data", file.filename)
-    with open(file_location, "wb") as f:
-        f.write(await file.read())
-
-    # 2. Read DataFrame and normalize
-    try:
-        df = pd.read_csv(file_location)
-        df = normalize_columns(df)
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=400, detail="Invalid CSV file.")
+    with profiled_request(profile, "/report") as request_profile:
+        # 1. Read DataFrame and normalize
+        df = load_series(file, dataset_id, "/report")
 
-    # 3. Generate Analysis
-    try:
-        analysis_result = generate_forecast(
-            file_path=df, 
-            days=days,
-            seasonality_mode=seasonality_mode,
-            growth=growth,
-            daily_seasonality=daily_seasonality,
-            weekly_seasonality=weekly_seasonality,
-            yearly_seasonality=yearly_seasonality
-        )
+        # 2. Generate Analysis
+        try:
+            _, analysis_result = await _cached_forecast(
+                df,
+                profile=request_profile,
+                days=days,
+                **params
+            )
         
-        # 4. Generate PDF
-        from app.utils.reporting import generate_pdf_report
-        pdf_buffer = generate_pdf_report(
-            forecast_df=analysis_result["forecast"],
-            metrics=analysis_result["metrics"],
-            insights_data=analysis_result["insights"], # Fixed parameter name
-            anomalies=analysis_result["anomalies"]
-        )
+            # 3. Generate PDF
+            from app.utils.reporting import generate_pdf_report
+            with span("pdf"):
+                pdf_buffer = await offload(
+                    generate_pdf_report,
+                    forecast_df=analysis_result["forecast"],
+                    metrics=analysis_result["metrics"],
+                    insights_data=analysis_result["insights"], # Fixed parameter name
+                    anomalies=analysis_result["anomalies"],
+                    profile=request_profile
+                )
         
-        # 5. Return as Download
-        return StreamingResponse(
-            pdf_buffer,
-            media_type="application/pdf",
-            headers={"Content-Disposition": "attachment; filename=forecast_report.pdf"}
-        )
+            # 4. Return as Download
+            headers = {"Content-Disposition": "attachment; filename=forecast_report.pdf"}
+            if request_profile is not None:
+                headers["X-Profile-Id"] = request_profile.id
+            return StreamingResponse(
+                pdf_buffer,
+                media_type="application/pdf",
+                headers=headers
+            )
 
-    except ValueError as ve:
-        print(f"REPORTING VALUE ERROR: {str(ve)}")
-        raise HTTPException(status_code=400, detail=str(ve))
-    except Exception as e:
-        import traceback
-        print(f"REPORTING CRITICAL ERROR: {str(e)}")
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Reporting error: {str(e)}")
+        except HTTPException:
+            raise
+        except ValueError as ve:
+            report_failures.inc(reason="invalid_input")
+            logger.warning("Report rejected: %s", ve)
+            raise HTTPException(status_code=400, detail=str(ve))
+        except Exception as e:
+            report_failures.inc(reason="error")
+            logger.exception("Report generation failed")
+            raise HTTPException(status_code=500, detail=f"Reporting error: {str(e)}")
+
+@router.get("/cache/stats", tags=["Forecasting"])
+def get_cache_stats():
+    """
+    Hit/miss counters and size of the forecast result cache.
+    """
+    return forecast_cache.stats()
+
+@router.get("/executor/stats", tags=["Forecasting"])
+def get_executor_stats():
+    """
+    In-flight, completed, rejected and timed-out task counts for the forecast process pool,
+    and how many forecast requests joined an identical one already computing ('coalescing').
+    """
+    return {**forecast_executor.stats(), "coalescing": forecast_flights.stats()}
+
+@router.get("/metrics", tags=["Monitoring"], response_class=PlainTextResponse)
+def get_metrics():
+    """
+    Stage latency histograms, request, row, cache and pool counters, and in-flight gauges,
+    in the Prometheus text exposition format.
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
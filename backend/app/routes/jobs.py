@@ -0,0 +1,92 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, Optional
+from app.utils.jobs import job_manager
+from app.utils.encoding import RESPONSE_FORMATS
+from app.utils.telemetry import span
+from app.routes.common import forecast_params, forecast_payload, offload, read_upload, response_format
+
+router = APIRouter(prefix="/jobs")
+
+def _get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return job
+
+def _get_result(job_id: str):
+    job = _get_job(job_id)
+    if job["status"] != "succeeded":
+        detail = job["error"] if job["status"] == "failed" else f"Job is {job['status']}."
+        raise HTTPException(status_code=409, detail=detail)
+    result = job_manager.result(job_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Job result has expired.")
+    return job, result
+
+@router.post("/forecast", tags=["Jobs"], status_code=202)
+async def submit_forecast_job(
+    file: UploadFile = File(...),
+    days: int = Query(30, description="Number of days to forecast"),
+    params: Dict[str, Any] = Depends(forecast_params)
+):
+    """
+    Queue a forecast and return its job id immediately. Poll GET /jobs/{id} for progress.
+    """
+    contents = await read_upload(file)
+    job = job_manager.submit(contents, {"days": days, **params})
+    return {"job_id": job["id"], "status": job["status"]}
+
+@router.get("/{job_id}", tags=["Jobs"])
+def get_job(job_id: str):
+    """
+    Job status with per-stage progress (parsing, normalizing, fitting, predicting, anomalies, insights).
+    """
+    return _get_job(job_id)
+
+@router.delete("/{job_id}", tags=["Jobs"])
+def cancel_job(job_id: str):
+    """
+    Cancel a queued or running job. Finished jobs are returned unchanged.
+    """
+    _get_job(job_id)
+    return job_manager.cancel(job_id)
+
+@router.get("/{job_id}/result", tags=["Jobs"])
+def get_job_result(
+    job_id: str,
+    format: Optional[str] = Query(None, enum=list(RESPONSE_FORMATS), description="Response format (default records; also chosen by the Accept header)"),
+    accept: Optional[str] = Header(None)
+):
+    """
+    The finished forecast, in the same shape (and formats) as the /forecast response.
+    """
+    body_format = response_format(format, accept)
+    job, result = _get_result(job_id)
+    params = job["parameters"]
+    try:
+        return forecast_payload(result, job["row_count"], params["days"], params["seasonality_mode"], params["growth"], body_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{job_id}/report.pdf", tags=["Jobs"])
+async def get_job_report(job_id: str):
+    """
+    PDF report for a finished forecast job.
+    """
+    _, result = _get_result(job_id)
+
+    from app.utils.reporting import generate_pdf_report
+    with span("pdf"):
+        pdf_buffer = await offload(
+            generate_pdf_report,
+            forecast_df=result["forecast"],
+            metrics=result["metrics"],
+            insights_data=result["insights"],
+            anomalies=result["anomalies"]
+        )
+    return StreamingResponse(
+        pdf_buffer,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"attachment; filename=forecast_report_{job_id}.pdf"}
+    )
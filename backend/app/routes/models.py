@@ -0,0 +1,81 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from typing import Any, Dict
+from app.utils.registry import model_registry, refresh_model, register_model
+from app.routes.common import forecast_payload, model_params, offload, parse_upload, record_result
+
+router = APIRouter(prefix="/models")
+
+def _read_upload(file: UploadFile):
+    try:
+        return parse_upload(file, "/models/{series_id}")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/{series_id}", tags=["Models"])
+async def create_model(
+    series_id: str,
+    file: UploadFile = File(...),
+    days: int = Query(30, description="Number of days to forecast"),
+    params: Dict[str, Any] = Depends(model_params)
+):
+    """
+    Fit a series from scratch and store the model for later warm-start refreshes.
+    """
+    df = _read_upload(file)
+    params = {"days": days, **params}
+    try:
+        result = record_result(await offload(register_model, model_registry, series_id, df, params))
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    payload = forecast_payload(result, len(df), days, params["seasonality_mode"], params["growth"])
+    payload["model"] = result["model_info"]
+    return payload
+
+@router.post("/{series_id}/append", tags=["Models"])
+async def append_and_refresh_model(
+    series_id: str,
+    file: UploadFile = File(...),
+    days: int = Query(30, description="Number of days to forecast"),
+    params: Dict[str, Any] = Depends(model_params)
+):
+    """
+    Append new rows to a registered series and refit, warm-started from the previous fit.
+    The response reports the speedup over the original cold fit and how much the fit changed.
+    """
+    new_rows = _read_upload(file)
+    params = {"days": days, **params}
+    try:
+        result = record_result(await offload(refresh_model, model_registry, series_id, new_rows, params))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    payload = forecast_payload(result, result["model_info"]["row_count"], days, params["seasonality_mode"], params["growth"])
+    payload["model"] = result["model_info"]
+    payload["refresh"] = result["refresh"]
+    return payload
+
+@router.get("/{series_id}", tags=["Models"])
+def list_models(series_id: str):
+    """
+    Metadata of every model stored for a series (one per parameter combination).
+    """
+    try:
+        models = model_registry.list(series_id)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    if not models:
+        raise HTTPException(status_code=404, detail=f"No models registered for series '{series_id}'.")
+    return {"series_id": series_id, "models": models}
+
+@router.delete("/{series_id}", tags=["Models"])
+def delete_models(series_id: str):
+    try:
+        deleted = model_registry.delete(series_id)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    if not deleted:
+        raise HTTPException(status_code=404, detail=f"No models registered for series '{series_id}'.")
+    return {"series_id": series_id, "deleted": True}
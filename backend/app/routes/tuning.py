@@ -0,0 +1,56 @@
+from fastapi import APIRouter, HTTPException, Query, UploadFile, File
+from typing import Optional
+from app.utils.cache import fold_cache
+from app.utils.executor import forecast_executor
+from app.routes.common import parse_upload
+from app.utils.tuning import METRICS, run_tuning
+import json
+
+router = APIRouter()
+
+DEFAULT_SPACE = json.dumps({
+    "seasonality_mode": ["additive", "multiplicative"],
+    "changepoint_prior_scale": [0.01, 0.1, 0.5],
+    "seasonality_prior_scale": [1.0, 10.0]
+})
+
+@router.post("/tune", tags=["Forecasting"])
+async def tune_forecast(
+    file: UploadFile = File(...),
+    space: str = Query(DEFAULT_SPACE, description="JSON object mapping parameter names to lists of values to try"),
+    horizon: int = Query(30, ge=1, description="Days forecast from each backtest cutoff"),
+    initial: Optional[int] = Query(None, ge=1, description="Minimum days of history before the first cutoff (default 3 x horizon)"),
+    step: Optional[int] = Query(None, ge=1, description="Days between cutoffs (default horizon / 2)"),
+    metric: str = Query('RMSE', enum=list(METRICS), description="Backtest metric to minimise"),
+    eta: int = Query(3, ge=2, le=10, description="Successive halving rate: keep 1/eta of the candidates per rung")
+):
+    """
+    Search model settings by backtest accuracy. Candidates are fitted in parallel, weak ones
+    are dropped early (successive halving), and the best settings come back with the full leaderboard.
+    """
+    try:
+        search_space = json.loads(space)
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"space is not valid JSON: {str(e)}")
+
+    try:
+        df = parse_upload(file, "/tune")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        return await run_tuning(
+            df,
+            search_space,
+            forecast_executor,
+            fold_cache,
+            horizon=horizon,
+            initial=initial,
+            step=step,
+            metric=metric,
+            eta=eta
+        )
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Tuning error: {str(e)}")
@@ -0,0 +1,196 @@
+"""
+Anomaly detection on the history part of a forecast.
+
+Actuals are aligned to the forecast by binary search on the sorted dates rather than
+a hash merge, and everything after that is vectorized. Long series are processed in
+chunks, so intermediate arrays stay O(chunk_rows) whatever the series length.
+"""
+import math
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# 'interval'   - actual outside [yhat_lower, yhat_upper] (the forecast's own bands)
+# 'zscore'     - residual more than `threshold` rolling standard deviations from the rolling mean
+# 'hampel'     - residual more than `threshold` scaled rolling MADs from the rolling median
+# 'percentile' - absolute residual above the `threshold` percentile of all absolute residuals
+DETECTORS = ("interval", "zscore", "hampel", "percentile")
+DEFAULT_THRESHOLDS = {"interval": None, "zscore": 3.0, "hampel": 3.0, "percentile": 99.0}
+DEFAULT_WINDOW = 28
+CHUNK_ROWS = 1_000_000
+# Rows sampled for the 'percentile' cut-off on series longer than one chunk
+PERCENTILE_SAMPLE_ROWS = 1_000_000
+
+ANOMALY_COLUMNS = ['ds', 'y', 'yhat', 'yhat_lower', 'yhat_upper', 'severity', 'severity_level']
+MAD_SCALE = 1.4826
+
+
+def _sorted_dates(frame: pd.DataFrame) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    ds = frame['ds']
+    if ds.dtype.kind != 'M':
+        ds = pd.to_datetime(ds)
+    # Keep the column's own resolution; casting 10M dates to another unit costs a copy
+    values = ds.to_numpy()
+    if ds.is_monotonic_increasing:
+        return values, None
+    order = np.argsort(values, kind='stable')
+    return values[order], order
+
+
+def _aligned_chunks(
+    forecast: pd.DataFrame,
+    actuals: pd.DataFrame,
+    chunk_rows: int,
+    overlap: int
+) -> Iterator[Tuple[int, Dict[str, np.ndarray]]]:
+    """
+    Yield (overlap rows at the start, columns) for consecutive chunks of the actuals that
+    have a forecast row with the same date, in date order. Each chunk starts with up to
+    `overlap` rows of the previous one so trailing windows see their full history.
+    """
+    f_ds, f_order = _sorted_dates(forecast)
+    a_ds, a_order = _sorted_dates(actuals)
+    if a_ds.dtype != f_ds.dtype:
+        a_ds = a_ds.astype(f_ds.dtype)
+    f_cols = {c: forecast[c].to_numpy(dtype='float64') for c in ('yhat', 'yhat_lower', 'yhat_upper')}
+    a_y = actuals['y'].to_numpy(dtype='float64')
+
+    # Usual case: the forecast is the (deduplicated) history followed by the future, so
+    # row i of the actuals is row i of the forecast and chunks are plain slices
+    positional = (
+        a_order is None and f_order is None and len(f_ds) >= len(a_ds)
+        and np.array_equal(f_ds[:len(a_ds)], a_ds)
+    )
+    f_keys, a_keys = f_ds.view('int64'), a_ds.view('int64')
+
+    carry: Dict[str, np.ndarray] = {}
+    for start in range(0, len(a_ds), chunk_rows):
+        rows = slice(start, min(start + chunk_rows, len(a_ds)))
+        if positional:
+            chunk = {'ds': a_ds[rows], 'y': a_y[rows]}
+            for c, values in f_cols.items():
+                chunk[c] = values[rows]
+        else:
+            keys = a_keys[rows]
+            pos = np.searchsorted(f_keys, keys)
+            found = pos < len(f_keys)
+            found[found] = f_keys[pos[found]] == keys[found]
+            pos = pos[found]
+            if f_order is not None:
+                pos = f_order[pos]
+            y_rows = a_order[rows] if a_order is not None else rows
+            chunk = {'ds': a_ds[rows][found], 'y': a_y[y_rows][found]}
+            for c, values in f_cols.items():
+                chunk[c] = values[pos]
+
+        n_carry = len(carry.get('ds', ()))
+        if n_carry:
+            chunk = {c: np.concatenate([carry[c], chunk[c]]) for c in chunk}
+        yield n_carry, chunk
+        if overlap:
+            carry = {c: v[-overlap:] for c, v in chunk.items()}
+
+
+def fitted_pairs(forecast: pd.DataFrame, actuals: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The actuals' y and the forecast's yhat on the same dates (actuals without a forecast
+    row are left out), for in-sample metrics. No frame is merged or copied.
+    """
+    chunks = [chunk for _, chunk in _aligned_chunks(forecast, actuals, CHUNK_ROWS, overlap=0)]
+    if not chunks:
+        return np.empty(0), np.empty(0)
+    if len(chunks) == 1:
+        return chunks[0]['y'], chunks[0]['yhat']
+    return np.concatenate([c['y'] for c in chunks]), np.concatenate([c['yhat'] for c in chunks])
+
+
+def _rolling_scores(resid: np.ndarray, method: str, window: int) -> np.ndarray:
+    """
+    Score each residual against the trailing window before it (the point itself excluded).
+    """
+    series = pd.Series(resid)
+    min_periods = max(window // 2, 3)
+    if method == 'zscore':
+        rolling = series.rolling(window, min_periods=min_periods)
+        center = rolling.mean().shift(1).to_numpy()
+        spread = rolling.std().shift(1).to_numpy()
+    else:
+        median = series.rolling(window, min_periods=min_periods).median()
+        mad = (series - median).abs().rolling(window, min_periods=min_periods).median()
+        center = median.shift(1).to_numpy()
+        spread = MAD_SCALE * mad.shift(1).to_numpy()
+
+    deviation = np.abs(resid - center)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # A flat window (zero spread) flags any departure from it
+        scores = np.where(spread > 0, deviation / spread, np.where(deviation > 0, np.inf, 0.0))
+    return np.nan_to_num(scores, nan=0.0)
+
+
+def _percentile_cutoff(forecast: pd.DataFrame, actuals: pd.DataFrame, percentile: float, chunk_rows: int) -> float:
+    stride = max(1, math.ceil(len(actuals) / PERCENTILE_SAMPLE_ROWS))
+    samples = [
+        np.abs(chunk['y'] - chunk['yhat'])[::stride]
+        for _, chunk in _aligned_chunks(forecast, actuals, chunk_rows, overlap=0)
+    ]
+    if not samples or not sum(len(s) for s in samples):
+        return math.inf
+    return float(np.percentile(np.concatenate(samples), percentile))
+
+
+def classify_severity(deviation: np.ndarray, yhat: np.ndarray) -> np.ndarray:
+    """
+    'High' (> 20% of yhat), 'Medium' (> 10%) or 'Low'. A zero forecast counts as High.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = np.where(yhat != 0, deviation / np.abs(yhat) * 100, np.inf)
+    return np.select([pct > 20, pct > 10], ['High', 'Medium'], default='Low')
+
+
+def detect_anomalies(
+    forecast: pd.DataFrame,
+    actuals: pd.DataFrame,
+    method: str = 'interval',
+    threshold: Optional[float] = None,
+    window: int = DEFAULT_WINDOW,
+    chunk_rows: int = CHUNK_ROWS
+) -> pd.DataFrame:
+    """
+    Rows of actuals flagged by the chosen detector (see DETECTORS), with the forecast
+    values and a severity. threshold defaults per detector (DEFAULT_THRESHOLDS).
+    """
+    if method not in DETECTORS:
+        raise ValueError(f"anomaly_method must be one of {', '.join(DETECTORS)}.")
+    if threshold is None:
+        threshold = DEFAULT_THRESHOLDS[method]
+    if method == 'percentile':
+        threshold = _percentile_cutoff(forecast, actuals, threshold, chunk_rows)
+
+    # Rows each chunk needs from the previous one: a window for the rolling statistics,
+    # and for 'hampel' another one, as the MAD is a rolling median of distances to a rolling median
+    overlap = {'zscore': window, 'hampel': 2 * window}.get(method, 0)
+    found = []
+    for n_carry, chunk in _aligned_chunks(forecast, actuals, chunk_rows, overlap=overlap):
+        y, yhat = chunk['y'], chunk['yhat']
+        if method == 'interval':
+            flags = (y < chunk['yhat_lower']) | (y > chunk['yhat_upper'])
+        elif method == 'percentile':
+            flags = np.abs(y - yhat) > threshold
+        else:
+            flags = _rolling_scores(y - yhat, method, window) > threshold
+        flags[:n_carry] = False
+
+        idx = np.flatnonzero(flags)
+        if len(idx):
+            rows = {c: v.take(idx) for c, v in chunk.items()}
+            deviation = np.abs(rows['y'] - rows['yhat'])
+            found.append(pd.DataFrame({
+                **rows,
+                'severity': deviation,
+                'severity_level': classify_severity(deviation, rows['yhat'])
+            }, columns=ANOMALY_COLUMNS))
+
+    if not found:
+        return pd.DataFrame(columns=ANOMALY_COLUMNS)
+    return pd.concat(found, ignore_index=True)
@@ -0,0 +1,187 @@
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app import config
+from app.utils.cache import ForecastCache, make_cache_key
+from app.utils.executor import ForecastExecutor
+from app.utils.forecasting import MODEL_PARAMS, build_engine, calculate_metrics, normalize_columns
+from app.utils.resampling import resample_series
+
+# Model settings a fold fit depends on (the same ones generate_forecast() builds its engine from)
+FOLD_PARAMS = ("engine",) + MODEL_PARAMS
+
+
+def prepare_series(
+    df: pd.DataFrame,
+    horizon: int,
+    granularity: str = "auto",
+    aggregation: str = "mean"
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    'ds'/'y' frame with parsed dates, sorted by date and resampled as generate_forecast()
+    resamples it for a `horizon` day forecast (see resampling.resample_series), so folds are
+    fitted on the series the model would see. Returns the frame and the resampling summary.
+    """
+    df = normalize_columns(df) if 'ds' not in df.columns or 'y' not in df.columns else df[['ds', 'y']].copy()
+    df['ds'] = pd.to_datetime(df['ds'])
+    return resample_series(df.sort_values('ds', ignore_index=True), horizon, granularity, aggregation)
+
+
+def fold_key(
+    window: pd.DataFrame,
+    cutoff: pd.Timestamp,
+    horizon: int,
+    params: Dict[str, Any],
+    resampling: Dict[str, Any]
+) -> str:
+    """
+    Cache key of one fold: its data (training rows and holdout), cutoff, horizon, model
+    settings and the granularity and aggregation the data was resampled with.
+    """
+    return make_cache_key(
+        window, backtest_cutoff=str(cutoff), horizon=horizon,
+        granularity=resampling["granularity"], aggregation=resampling["aggregation"], **params
+    )
+
+
+def make_cutoffs(
+    ds: pd.Series,
+    horizon: int,
+    initial: int,
+    step: int,
+    max_folds: int = config.BACKTEST_MAX_FOLDS
+) -> List[pd.Timestamp]:
+    """
+    Expanding-window cutoffs, in days: the first has `initial` days of history, the next
+    ones are `step` days apart, and the last one still has `horizon` days after it. Only
+    the latest max_folds are kept.
+    Unlike Prophet's cross_validation, the grid is anchored at the start of the series, so
+    appending rows only adds cutoffs at the end and the earlier folds stay cacheable.
+    """
+    if horizon <= 0 or initial <= 0 or step <= 0:
+        raise ValueError("horizon, initial and step must be positive numbers of days.")
+
+    start, end = ds.min(), ds.max()
+    first = start + pd.Timedelta(days=initial)
+    last = end - pd.Timedelta(days=horizon)
+    if last < first:
+        raise ValueError(
+            f"Not enough history for one fold: need {initial + horizon} days, got {(end - start).days}."
+        )
+    count = (last - first) // pd.Timedelta(days=step) + 1
+    return [first + pd.Timedelta(days=step * i) for i in range(max(count - max_folds, 0), count)]
+
+
+def fit_fold(train: pd.DataFrame, test_ds: np.ndarray, horizon: int, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Worker-side entry point: fit the engine on one fold's training window and predict its holdout.
+    Only point forecasts are needed, so Prophet skips its uncertainty sampling.
+    """
+    started = time.perf_counter()
+    engine, _ = build_engine(train, horizon, interval={"mode": "point"}, **params)
+    engine.fit(train)
+    return {"yhat": engine.predict_at(test_ds), "fit_seconds": round(time.perf_counter() - started, 4)}
+
+
+def horizon_metrics(folds: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    MAE/RMSE/MAPE for each whole number of days ahead of the cutoff.
+    """
+    rows = []
+    for horizon, group in folds.groupby('horizon_days', sort=True):
+        rows.append({
+            "horizon_days": int(horizon),
+            "count": len(group),
+            **calculate_metrics(group['y'].to_numpy(dtype='float64'), group['yhat'].to_numpy(dtype='float64'))
+        })
+    return rows
+
+
+async def run_backtest(
+    df: pd.DataFrame,
+    executor: ForecastExecutor,
+    cache: Optional[ForecastCache] = None,
+    horizon: int = 30,
+    initial: Optional[int] = None,
+    step: Optional[int] = None,
+    **params
+) -> Dict[str, Any]:
+    """
+    Rolling-origin (expanding window) cross-validation of the model generate_forecast() would
+    fit with params. initial defaults to 3 x horizon and step to horizon / 2, as in Prophet.
+    The series is resampled with params' granularity and aggregation before it is cut into
+    folds. Folds are fitted in parallel on the executor, and fold predictions are reused from
+    cache when the same window and settings were backtested before.
+    """
+    df, resampling = prepare_series(df, horizon, params.get("granularity", "auto"), params.get("aggregation", "mean"))
+    params = {k: v for k, v in params.items() if k in FOLD_PARAMS}
+    initial = 3 * horizon if initial is None else initial
+    step = max(horizon // 2, 1) if step is None else step
+
+    cutoffs = make_cutoffs(df['ds'], horizon, initial, step)
+    folds: List[Tuple[int, pd.Timestamp, pd.DataFrame, pd.DataFrame, str]] = []
+    for i, cutoff in enumerate(cutoffs):
+        window = df[df['ds'] <= cutoff + pd.Timedelta(days=horizon)]
+        is_train = (window['ds'] <= cutoff).to_numpy()
+        folds.append((i, cutoff, window[is_train], window[~is_train], fold_key(window, cutoff, horizon, params, resampling)))
+
+    started = time.perf_counter()
+    predictions: Dict[int, Dict[str, Any]] = {}
+    to_fit = []
+    for i, *_, key in folds:
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            predictions[i] = cached
+        else:
+            to_fit.append(i)
+
+    # Results arrive in completion order, so each one is tagged with its fold index
+    fold_args = ((i, folds[i][2], folds[i][3]['ds'].values, horizon, params) for i in to_fit)
+    async for i, result in executor.imap_unordered(_indexed_fit_fold, fold_args):
+        predictions[i] = result
+        if cache is not None:
+            cache.set(folds[i][4], result)
+    wall_seconds = time.perf_counter() - started
+
+    frames = []
+    fold_summaries = []
+    for i, cutoff, train, test, _ in folds:
+        fold = test.assign(yhat=predictions[i]["yhat"], cutoff=cutoff)
+        fold['horizon_days'] = np.ceil((fold['ds'] - cutoff) / pd.Timedelta(days=1)).astype(int)
+        frames.append(fold)
+        fold_summaries.append({
+            "cutoff": str(cutoff),
+            "train_rows": len(train),
+            "test_rows": len(test),
+            "fit_seconds": predictions[i]["fit_seconds"],
+            "cached": i not in to_fit,
+            **calculate_metrics(fold['y'].to_numpy(dtype='float64'), fold['yhat'].to_numpy(dtype='float64'))
+        })
+    combined = pd.concat(frames, ignore_index=True)
+
+    serial_seconds = sum(predictions[i]["fit_seconds"] for i in to_fit)
+    return {
+        "parameters": {**params, "horizon": horizon, "initial": initial, "step": step},
+        "resampling": resampling,
+        "fold_count": len(folds),
+        "metrics": calculate_metrics(combined['y'].to_numpy(dtype='float64'), combined['yhat'].to_numpy(dtype='float64')),
+        "horizons": horizon_metrics(combined),
+        "folds": fold_summaries,
+        "timing": {
+            "wall_seconds": round(wall_seconds, 4),
+            "serial_fit_seconds": round(serial_seconds, 4),
+            "folds_fitted": len(to_fit),
+            "folds_cached": len(folds) - len(to_fit),
+            "speedup": round(serial_seconds / wall_seconds, 2) if to_fit and wall_seconds > 0 else None
+        }
+    }
+
+
+def _indexed_fit_fold(i: int, *args) -> Tuple[int, Dict[str, Any]]:
+    """
+    Worker-side entry point: fit_fold() tagged with the fold index.
+    """
+    return i, fit_fold(*args)
@@ -0,0 +1,137 @@
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.utils.executor import ForecastExecutor
+from app.utils.forecasting import detect_columns, generate_forecast, normalize_columns
+from app.utils.telemetry import record_stages
+
+SERIES_COLUMN_NAMES = ['series', 'series_id', 'id', 'sku', 'item', 'item_id', 'product', 'product_id', 'store', 'key']
+
+
+def detect_series_column(df: pd.DataFrame, series_column: Optional[str] = None) -> str:
+    """
+    Find the column that identifies each series in a long-format frame.
+    """
+    if series_column:
+        if series_column not in df.columns:
+            raise ValueError(f"Series column '{series_column}' not found in the uploaded file.")
+        return series_column
+
+    for col in df.columns:
+        if str(col).lower() in SERIES_COLUMN_NAMES:
+            return col
+    raise ValueError("Could not detect a series id column (looking for 'series', 'series_id', 'sku', 'id'). Pass series_column explicitly.")
+
+
+def batch_columns(frame: pd.DataFrame, series_column: Optional[str] = None) -> List[str]:
+    """
+    The series id, date and target columns of a long-format file, for ingestion.read_columnar().
+    """
+    series_col = detect_series_column(frame, series_column)
+    return [series_col, *detect_columns(frame.drop(columns=[series_col]))]
+
+
+def split_series(df: pd.DataFrame, series_column: Optional[str] = None) -> Iterator[Tuple[str, np.ndarray, np.ndarray]]:
+    """
+    Split a long-format frame into (series_id, ds, y) groups.
+
+    The frame is sorted once; each group is then a slice of the same two arrays, so
+    no per-group copy is made here.
+    """
+    series_col = detect_series_column(df, series_column)
+    normalized = normalize_columns(df.drop(columns=[series_col]))
+
+    ids = df.loc[normalized.index, series_col].astype(str).to_numpy()
+    ds = pd.to_datetime(normalized['ds']).to_numpy()
+    y = normalized['y'].to_numpy(dtype='float64')
+
+    order = np.lexsort((ds, ids))
+    ids, ds, y = ids[order], ds[order], y[order]
+
+    bounds = np.flatnonzero(ids[1:] != ids[:-1]) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(ids)]))
+    for start, end in zip(starts, ends):
+        yield ids[start], ds[start:end], y[start:end]
+
+
+def forecast_series(series_id: str, ds: np.ndarray, y: np.ndarray, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Worker-side entry point: forecast one series, capturing failures instead of raising.
+    """
+    started = time.perf_counter()
+    try:
+        result = generate_forecast(pd.DataFrame({'ds': ds, 'y': y}), **params)
+        return {
+            "series_id": series_id,
+            "status": "ok",
+            "row_count": len(y),
+            "forecast": result["forecast"],
+            "anomalies": result["anomalies"],
+            "metrics": result["metrics"],
+            "engine": result["engine_info"]["name"],
+            "seconds": round(time.perf_counter() - started, 4),
+            "stage_seconds": result["stage_seconds"]
+        }
+    except Exception as e:
+        return {
+            "series_id": series_id,
+            "status": "error",
+            "row_count": len(y),
+            "error": str(e),
+            "seconds": round(time.perf_counter() - started, 4)
+        }
+
+
+async def run_batch(
+    groups: Iterator[Tuple[str, np.ndarray, np.ndarray]],
+    params: Dict[str, Any],
+    executor: ForecastExecutor
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Fit every group on the process pool and yield each series' result as soon as it finishes.
+    """
+    async for result in executor.imap_unordered(forecast_series, ((*group, params) for group in groups)):
+        record_stages(result.pop("stage_seconds", None))
+        yield result
+
+
+def columnar_batch(results: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, Any]:
+    """
+    Combine per-series results into one columnar payload (one array per column, tagged by series_id).
+    """
+    forecasts = [r["forecast"].assign(series_id=r["series_id"]) for r in results if r["status"] == "ok"]
+    anomalies = [r["anomalies"].assign(series_id=r["series_id"]) for r in results if r["status"] == "ok" and not r["anomalies"].empty]
+
+    def to_columns(frames: List[pd.DataFrame]) -> Dict[str, list]:
+        if not frames:
+            return {}
+        combined = pd.concat(frames, ignore_index=True)
+        combined['ds'] = pd.to_datetime(combined['ds']).dt.strftime('%Y-%m-%dT%H:%M:%S')
+        return {col: combined[col].tolist() for col in combined.columns}
+
+    return {
+        "series_count": len(results),
+        "series": [
+            {k: r[k] for k in ("series_id", "status", "row_count", "seconds", "engine", "metrics", "error") if k in r}
+            for r in results
+        ],
+        "forecast": to_columns(forecasts),
+        "anomalies": to_columns(anomalies),
+        "timing": batch_timing(results, wall_seconds)
+    }
+
+
+def batch_timing(results: List[Dict[str, Any]], wall_seconds: float) -> Dict[str, float]:
+    """
+    Compare the parallel wall time with the summed per-series time, i.e. the one-series-at-a-time path.
+    """
+    serial_seconds = sum(r["seconds"] for r in results)
+    return {
+        "wall_seconds": round(wall_seconds, 4),
+        "serial_seconds": round(serial_seconds, 4),
+        "speedup": round(serial_seconds / wall_seconds, 2) if wall_seconds > 0 else 0.0
+    }
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sys
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app import config
+
+logger = logging.getLogger(__name__)
+
+# Keys of a generate_forecast() result that are worth caching. The fitted model is left out:
+# it is large, and the routes only need the frames and summaries.
+CACHED_FIELDS = ("forecast", "anomalies", "metrics", "insights", "engine_info", "history_end", "resampling")
+
+
+def make_cache_key(df: pd.DataFrame, holidays: Optional[pd.DataFrame] = None, **params) -> str:
+    """
+    Build a content-addressed key from the normalized 'ds'/'y' data and every model parameter.
+    Two uploads with the same values produce the same key regardless of file name or date formatting.
+    """
+    ds = pd.to_datetime(df['ds'])
+    if ds.dt.tz is not None:
+        ds = ds.dt.tz_localize(None)
+
+    h = hashlib.sha256()
+    h.update(np.ascontiguousarray(ds.values.astype('datetime64[ns]').view('int64')).tobytes())
+    h.update(np.ascontiguousarray(pd.to_numeric(df['y']).to_numpy(dtype='float64')).tobytes())
+    h.update(json.dumps(params, sort_keys=True, default=str).encode())
+    if holidays is not None:
+        h.update(pd.util.hash_pandas_object(holidays, index=False).values.tobytes())
+    return h.hexdigest()
+
+
+def _object_size(item: Any, depth: int = 4) -> int:
+    """
+    Rough in-memory size of an object without serializing it: frames and arrays by their
+    buffers, containers and plain objects (e.g. a fitted engine or Prophet model) by what they
+    hold, `depth` levels down. Only the disk tier pickles entries.
+    """
+    if isinstance(item, pd.DataFrame):
+        # Only object columns (strings) need the slower deep count
+        return sum(int(col.memory_usage(deep=True)) if col.dtype == object else col.nbytes for _, col in item.items())
+    if isinstance(item, (pd.Series, pd.Index)):
+        return int(item.memory_usage(deep=True))
+    if isinstance(item, np.ndarray):
+        return item.nbytes
+    if depth <= 0:
+        return sys.getsizeof(item)
+    if isinstance(item, dict):
+        return sys.getsizeof(item) + sum(_object_size(v, depth - 1) for v in item.values())
+    if isinstance(item, (list, tuple)):
+        return sys.getsizeof(item) + sum(_object_size(v, depth - 1) for v in item)
+    if hasattr(item, "__dict__"):
+        return sys.getsizeof(item) + _object_size(vars(item), depth - 1)
+    return sys.getsizeof(item)
+
+
+def _estimate_size(value: Dict[str, Any]) -> int:
+    size = 0
+    for item in value.values():
+        if isinstance(item, (dict, list, str, int, float)):
+            size += len(json.dumps(item, default=str))
+        else:
+            size += _object_size(item)
+    return size
+
+
+class ForecastCache:
+    """
+    In-memory LRU cache with TTL expiry and a memory cap, optionally backed by a disk
+    directory that several worker processes can share.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 128,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl_seconds: float = 3600,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 1024 * 1024 * 1024,
+        fields: Tuple[str, ...] = CACHED_FIELDS
+    ):
+        self.fields = fields
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir or None
+        self.disk_max_bytes = disk_max_bytes
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0, "expirations": 0}
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Return the cached result for key, or None. Returned values are shared, treat them as read-only.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, size, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return value
+                self._drop(key)
+                self._counters["expirations"] += 1
+
+        value = self._disk_get(key, now)
+        with self._lock:
+            if value is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["hits"] += 1
+            self._counters["disk_hits"] += 1
+            self._store(key, value, now)
+        return value
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        value = {k: result[k] for k in self.fields if k in result}
+        with self._lock:
+            self._store(key, value, time.time())
+        self._disk_set(key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hit_ratio": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+                "disk_enabled": self.disk_dir is not None
+            }
+
+    # Memory tier (callers hold the lock)
+
+    def _store(self, key: str, value: Dict[str, Any], now: float) -> None:
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = (now + self.ttl_seconds, size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self._counters["evictions"] += 1
+
+    def _drop(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    # Disk tier
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _disk_get(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl_seconds <= now:
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+
+    def _disk_set(self, key: str, value: Dict[str, Any]) -> None:
+        if not self.disk_dir:
+            return
+        try:
+            # Write to a temp file and rename so other workers never read a partial entry
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._disk_path(key))
+            self._disk_prune()
+        except OSError as e:
+            logger.warning("Could not write cache entry to %s: %s", self.disk_dir, e)
+
+    def _disk_prune(self) -> None:
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".pkl"):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+
+# Process-wide instance shared by the /forecast and /report routes
+forecast_cache = ForecastCache(
+    max_entries=config.CACHE_MAX_ENTRIES,
+    max_bytes=config.CACHE_MAX_BYTES,
+    ttl_seconds=config.CACHE_TTL_SECONDS,
+    disk_dir=config.CACHE_DIR,
+    disk_max_bytes=config.CACHE_DISK_MAX_BYTES
+)
+
+# Fitted models (plus the forecast computed so far), so a new horizon only needs predict.
+# Memory only; the /models registry is the durable store for fitted models.
+model_cache = ForecastCache(
+    max_entries=config.MODEL_CACHE_MAX_ENTRIES,
+    max_bytes=config.MODEL_CACHE_MAX_BYTES,
+    ttl_seconds=config.CACHE_TTL_SECONDS,
+    fields=("engine", "interval") + CACHED_FIELDS
+)
+
+# Holdout predictions of backtest folds, keyed by the fold's data and model parameters,
+# so rerunning a backtest (or extending the data by a few rows) only fits the new folds
+fold_cache = ForecastCache(
+    max_entries=config.BACKTEST_CACHE_MAX_ENTRIES,
+    max_bytes=config.CACHE_MAX_BYTES,
+    ttl_seconds=config.CACHE_TTL_SECONDS,
+    fields=("yhat", "fit_seconds")
+)
@@ -0,0 +1,229 @@
+"""
+Uploaded series kept on the server, so clients upload once and forecast many times.
+
+Each dataset is a directory of Parquet part files holding the normalized 'ds'/'y' columns
+(nanosecond timestamps and float64 values) plus a meta.json. The first upload writes one part;
+every append writes one more part with just the new rows, so nothing already stored is
+rewritten. Loading a dataset reads its parts (memory-mapped) and concatenates them, which
+skips the transfer, the CSV parse and the column detection of an upload.
+
+The content hash is parts_hash() of the parts' rows_hash() values, in the order they were
+stored, so an append extends it from the metadata alone without reading the stored rows. It
+identifies the rows and how they were split into parts: rows A appended with B hash differently
+from A and B uploaded together. Uploading rows already stored as one part returns that dataset
+instead of a copy only when the caller asks for it, since appending to or deleting a shared
+dataset affects every holder.
+
+Metadata read-modify-writes hold an exclusive flock on a lock file in the store's root, so
+threads and worker processes sharing the directory never lose each other's appends.
+"""
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app import config
+
+DATASET_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+META_FILE = "meta.json"
+LOCK_FILE = ".lock"
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("The dataset store needs the pyarrow package, which is not installed on this server.")
+    return pyarrow
+
+
+def rows_hash(df: pd.DataFrame) -> str:
+    """
+    sha256 of the 'ds' (as nanoseconds) and 'y' (as float64) values, the same bytes
+    cache.make_cache_key() hashes.
+    """
+    h = hashlib.sha256()
+    h.update(np.ascontiguousarray(df['ds'].to_numpy().astype('datetime64[ns]').view('int64')).tobytes())
+    h.update(np.ascontiguousarray(df['y'].to_numpy(dtype='float64')).tobytes())
+    return h.hexdigest()
+
+
+def parts_hash(part_hashes: List[str]) -> str:
+    """
+    Content hash of a dataset: sha256 of its parts' rows_hash() values, in order.
+    """
+    return hashlib.sha256("".join(part_hashes).encode()).hexdigest()
+
+
+def normalized_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    A 'ds'/'y' frame (as parse_upload() returns it) in the stored dtypes. Raises ValueError
+    for dates that do not parse and for frames without rows.
+    """
+    try:
+        ds = pd.to_datetime(df['ds'])
+    except Exception:
+        raise ValueError("Could not parse 'ds' column as dates.")
+    if ds.dt.tz is not None:
+        ds = ds.dt.tz_localize(None)
+    rows = pd.DataFrame({'ds': ds.to_numpy().astype('datetime64[ns]'), 'y': df['y'].to_numpy(dtype='float64')})
+    rows = rows[rows['ds'].notna()].reset_index(drop=True)
+    if rows.empty:
+        raise ValueError("The file has no rows with a date and a numeric value.")
+    return rows
+
+
+class DatasetStore:
+    """
+    Datasets on local disk, one directory per dataset id. Metadata updates are atomic
+    (written to a temporary file and renamed) and serialized across processes (see _locked).
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """
+        Hold the store's exclusive lock. Each holder opens the lock file itself, so the flock
+        also serializes threads of one process.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        with open(os.path.join(self.root, LOCK_FILE), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _dir(self, dataset_id: str) -> str:
+        if not DATASET_ID_PATTERN.match(dataset_id):
+            raise ValueError("Dataset id must be the 32 hexadecimal characters returned by POST /datasets.")
+        return os.path.join(self.root, dataset_id)
+
+    def _write_part(self, dataset_dir: str, index: int, rows: pd.DataFrame) -> Dict[str, Any]:
+        pa = _pyarrow()
+        name = f"part-{index:05d}-{uuid.uuid4().hex[:8]}.parquet"
+        path = os.path.join(dataset_dir, name)
+        pa.parquet.write_table(pa.Table.from_pandas(rows, preserve_index=False), path + ".tmp")
+        os.replace(path + ".tmp", path)
+        return {"file": name, "rows": len(rows), "sha256": rows_hash(rows), "bytes": os.path.getsize(path)}
+
+    def _write_meta(self, dataset_dir: str, meta: Dict[str, Any]) -> None:
+        path = os.path.join(dataset_dir, META_FILE)
+        with open(path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(path + ".tmp", path)
+
+    def get(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+        path = os.path.join(self._dir(dataset_id), META_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def list(self) -> List[Dict[str, Any]]:
+        if not os.path.isdir(self.root):
+            return []
+        datasets = []
+        for name in os.listdir(self.root):
+            if DATASET_ID_PATTERN.match(name):
+                meta = self.get(name)
+                if meta is not None:
+                    datasets.append(meta)
+        return sorted(datasets, key=lambda meta: meta["created_at"])
+
+    def find(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        return next((meta for meta in self.list() if meta["content_hash"] == content_hash), None)
+
+    def create(self, df: pd.DataFrame, name: Optional[str] = None, reuse: bool = False) -> Dict[str, Any]:
+        """
+        Store a new dataset from a 'ds'/'y' frame. With reuse, the existing dataset holding
+        exactly these rows as one part is returned instead if there is one (with
+        "deduplicated": true).
+        """
+        rows = normalized_rows(df)
+        content_hash = parts_hash([rows_hash(rows)])
+        with self._locked():
+            existing = self.find(content_hash) if reuse else None
+            if existing is not None:
+                return {**existing, "deduplicated": True}
+
+            dataset_id = uuid.uuid4().hex
+            dataset_dir = self._dir(dataset_id)
+            os.makedirs(dataset_dir)
+            part = self._write_part(dataset_dir, 0, rows)
+            now = time.time()
+            meta = {
+                "id": dataset_id,
+                "name": name,
+                "created_at": now,
+                "updated_at": now,
+                "row_count": len(rows),
+                "first_ds": rows['ds'].min().isoformat(),
+                "last_ds": rows['ds'].max().isoformat(),
+                "content_hash": content_hash,
+                "bytes": part["bytes"],
+                "parts": [part]
+            }
+            self._write_meta(dataset_dir, meta)
+        return {**meta, "deduplicated": False}
+
+    def append(self, dataset_id: str, df: pd.DataFrame) -> Optional[Dict[str, Any]]:
+        """
+        Add rows to a dataset as one new part file. None if the dataset does not exist.
+        """
+        rows = normalized_rows(df)
+        with self._locked():
+            meta = self.get(dataset_id)
+            if meta is None:
+                return None
+            dataset_dir = self._dir(dataset_id)
+            part = self._write_part(dataset_dir, len(meta["parts"]), rows)
+            parts = meta["parts"] + [part]
+            meta.update(
+                updated_at=time.time(),
+                row_count=meta["row_count"] + len(rows),
+                first_ds=min(meta["first_ds"], rows['ds'].min().isoformat()),
+                last_ds=max(meta["last_ds"], rows['ds'].max().isoformat()),
+                content_hash=parts_hash([p["sha256"] for p in parts]),
+                bytes=meta["bytes"] + part["bytes"],
+                parts=parts
+            )
+            self._write_meta(dataset_dir, meta)
+        return {**meta, "rows_appended": len(rows)}
+
+    def load(self, dataset_id: str) -> Optional[pd.DataFrame]:
+        """
+        The dataset's rows as a 'ds'/'y' frame, in the order they were stored. None if the
+        dataset does not exist.
+        """
+        meta = self.get(dataset_id)
+        if meta is None:
+            return None
+        pa = _pyarrow()
+        dataset_dir = self._dir(dataset_id)
+        tables = [pa.parquet.read_table(os.path.join(dataset_dir, part["file"]), memory_map=True) for part in meta["parts"]]
+        return pa.concat_tables(tables).to_pandas()
+
+    def delete(self, dataset_id: str) -> bool:
+        dataset_dir = self._dir(dataset_id)
+        with self._locked():
+            if not os.path.isdir(dataset_dir):
+                return False
+            shutil.rmtree(dataset_dir)
+        return True
+
+
+# Process-wide store used by the /datasets routes and the dataset_id parameter
+dataset_store = DatasetStore(config.DATASET_DIR)
@@ -0,0 +1,102 @@
+"""
+Chart-sized views of a forecast.
+
+chart_view() cuts a [start, end] window out of a full-resolution forecast and, if it has more
+than max_points rows, downsamples it with largest-triangle-three-buckets (LTTB): the series is
+split into equal buckets and each keeps the point that forms the largest triangle with its
+neighbours' picks, so peaks and troughs survive where plain striding would drop them.
+Anomalies and the last history / first forecast row are always kept on top of that.
+"""
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# The fewest points LTTB can return (first, one bucket, last)
+MIN_POINTS = 3
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Positions of the n_out points LTTB keeps from (x, y), in order. The first and last
+    points are always kept. Each bucket is scored with one vectorized pass.
+    """
+    n = len(x)
+    if n_out >= n or n_out < MIN_POINTS:
+        return np.arange(n)
+
+    # Bucket i covers [edges[i], edges[i + 1]); the first and last points sit outside the buckets
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def _naive(value) -> Optional[pd.Timestamp]:
+    if value is None:
+        return None
+    value = pd.Timestamp(value)
+    return value.tz_convert(None) if value.tzinfo is not None else value
+
+
+def chart_view(
+    forecast: pd.DataFrame,
+    anomalies: pd.DataFrame,
+    start=None,
+    end=None,
+    max_points: Optional[int] = None,
+    history_end=None
+) -> Tuple[pd.DataFrame, pd.DataFrame, Dict[str, Any]]:
+    """
+    The forecast and anomaly rows between start and end (inclusive, either may be None),
+    with the forecast downsampled to about max_points rows on 'yhat'. Returns both frames
+    and a description of the view for the response.
+    """
+    start, end, history_end = _naive(start), _naive(end), _naive(history_end)
+    if start is not None and end is not None and start > end:
+        raise ValueError("start must not be after end.")
+
+    def in_window(frame: pd.DataFrame) -> pd.DataFrame:
+        ds = pd.to_datetime(frame['ds'])
+        mask = np.ones(len(frame), dtype=bool)
+        if start is not None:
+            mask &= (ds >= start).to_numpy()
+        if end is not None:
+            mask &= (ds <= end).to_numpy()
+        return frame[mask]
+
+    window = in_window(forecast)
+    window_anomalies = in_window(anomalies) if not anomalies.empty else anomalies
+    total = len(window)
+
+    if max_points is not None and total > max_points:
+        ds = pd.to_datetime(window['ds']).to_numpy()
+        # Always kept: the anomalies and both sides of the history/forecast boundary
+        forced = [np.flatnonzero(np.isin(ds, pd.to_datetime(window_anomalies['ds']).to_numpy()))] if not window_anomalies.empty else []
+        if history_end is not None:
+            last_history = int(np.searchsorted(ds, np.datetime64(history_end), side="right")) - 1
+            forced.append(np.array([p for p in (last_history, last_history + 1) if 0 <= p < total], dtype=np.int64))
+        forced_positions = np.unique(np.concatenate(forced)) if forced else np.array([], dtype=np.int64)
+
+        x = (ds - ds[0]) / np.timedelta64(1, 's')
+        y = window['yhat'].to_numpy(dtype='float64')
+        budget = max(max_points - len(forced_positions), MIN_POINTS)
+        window = window.iloc[np.union1d(lttb_indices(x, y, budget), forced_positions)]
+
+    view = {
+        "start": window['ds'].iloc[0].isoformat() if len(window) else None,
+        "end": window['ds'].iloc[-1].isoformat() if len(window) else None,
+        "points": len(window),
+        "total_points": total,
+        "downsampled": len(window) < total,
+        "history_end": history_end.isoformat() if history_end is not None else None
+    }
+    return window, window_anomalies, view
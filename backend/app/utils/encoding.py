@@ -0,0 +1,170 @@
+"""
+Response encodings for forecast payloads.
+
+'records' (the default) is the original body: one JSON object per row, built with
+DataFrame.to_dict and serialized by FastAPI's encoder. The other formats skip the per-row
+dicts entirely:
+
+- 'fast': the same records body, written by pandas' C JSON encoder.
+- 'columnar': one JSON array per column, timestamps as epoch milliseconds.
+- 'arrow': the forecast frame as an Arrow IPC stream; everything else (metrics, insights,
+  anomalies as columns) is JSON in the schema metadata under 'payload'.
+
+Clients pick one with ?format= or the Accept header (see negotiate()).
+
+/forecast/stream sends Server-Sent Events instead (sse_event()); frames go out as NDJSON
+batches (ndjson_batches()), so no more than one batch is ever serialized at a time.
+"""
+import io
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # optional: the standard library encoder is used instead
+    orjson = None
+
+# Format -> media type
+RESPONSE_FORMATS = {
+    "records": "application/json",
+    "fast": "application/vnd.forecast.records+json",
+    "columnar": "application/vnd.forecast.columnar+json",
+    "arrow": "application/vnd.apache.arrow.stream"
+}
+# The frame sent as the Arrow table; other frames go into the metadata
+ARROW_TABLE_KEY = "data"
+
+
+def negotiate(requested: Optional[str], accept: Optional[str]) -> str:
+    """
+    The response format for a request: ?format= wins, then the Accept header's highest-q
+    media type that has a format, then 'records'. Raises ValueError for an unknown ?format=.
+    """
+    if requested:
+        if requested not in RESPONSE_FORMATS:
+            raise ValueError(f"format must be one of {', '.join(RESPONSE_FORMATS)}.")
+        return requested
+
+    by_media_type = {media_type: name for name, media_type in RESPONSE_FORMATS.items()}
+    ranked: List[Tuple[float, int, str]] = []
+    for position, entry in enumerate((accept or "").split(",")):
+        media_type, *params = [part.strip() for part in entry.split(";")]
+        quality = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        if media_type in by_media_type and quality > 0:
+            ranked.append((-quality, position, by_media_type[media_type]))
+    return min(ranked)[2] if ranked else "records"
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        if value.dtype.kind == "f" and np.isnan(value).any():
+            return np.where(np.isnan(value), None, value).tolist()
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return str(value)
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    JSON bytes, with orjson when it is installed. NumPy arrays are written natively.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_default).encode()
+
+
+def frame_columns(frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """
+    One array per column, with datetime columns as epoch milliseconds.
+    """
+    columns = {}
+    for col in frame.columns:
+        values = frame[col].to_numpy()
+        if values.dtype.kind == "M":
+            values = values.astype("datetime64[ms]").astype("int64")
+        elif values.dtype == object:
+            values = frame[col].tolist()
+        columns[str(col)] = values
+    return columns
+
+
+def _records_json(frame: pd.DataFrame, lines: bool = False) -> str:
+    # The same values and timestamp format as the 'records' body
+    return frame.to_json(orient="records", lines=lines, date_format="iso", date_unit="s", double_precision=15)
+
+
+def _fast_records(payload: Dict[str, Any]) -> bytes:
+    frames = {k: v for k, v in payload.items() if isinstance(v, pd.DataFrame)}
+    head = dumps({k: v for k, v in payload.items() if k not in frames})
+    parts = [dumps(key) + b":" + _records_json(frame).encode() for key, frame in frames.items()]
+    if not parts:
+        return head
+    return head[:-1] + (b"," if len(head) > 2 else b"") + b",".join(parts) + b"}"
+
+
+def _arrow(payload: Dict[str, Any]) -> bytes:
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ValueError("format=arrow needs the pyarrow package, which is not installed on this server.")
+
+    rest = {
+        k: frame_columns(v) if isinstance(v, pd.DataFrame) else v
+        for k, v in payload.items() if k != ARROW_TABLE_KEY
+    }
+    table = pa.Table.from_pandas(payload[ARROW_TABLE_KEY], preserve_index=False)
+    table = table.replace_schema_metadata({"payload": dumps(rest)})
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def records(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The default body: frames as lists of row dicts, left for FastAPI to serialize.
+    """
+    return {k: v.to_dict(orient="records") if isinstance(v, pd.DataFrame) else v for k, v in payload.items()}
+
+
+def encode_body(payload: Dict[str, Any], response_format: str) -> bytes:
+    """
+    Response body for a payload whose frames are still DataFrames, in one of the
+    non-default formats (RESPONSE_FORMATS[response_format] is its media type).
+    """
+    if response_format == "fast":
+        return _fast_records(payload)
+    if response_format == "columnar":
+        return dumps({k: frame_columns(v) if isinstance(v, pd.DataFrame) else v for k, v in payload.items()})
+    if response_format == "arrow":
+        return _arrow(payload)
+    raise ValueError(f"format must be one of {', '.join(RESPONSE_FORMATS)}.")
+
+
+def ndjson_batches(frame: pd.DataFrame, batch_rows: int) -> Iterator[List[str]]:
+    """
+    The frame's rows as JSON lines (one object per row, like the 'records' body), at most
+    batch_rows at a time. Each batch is serialized only when it is asked for.
+    """
+    for start in range(0, len(frame), batch_rows):
+        yield _records_json(frame.iloc[start:start + batch_rows], lines=True).splitlines()
+
+
+def sse_event(event: str, lines: List[str]) -> bytes:
+    """
+    One Server-Sent Event. Each line becomes a data: line, so a client's event.data is
+    the lines joined with newlines (NDJSON for row batches).
+    """
+    return (f"event: {event}\n" + "".join(f"data: {line}\n" for line in lines) + "\n").encode()
@@ -0,0 +1,441 @@
+"""
+Forecasting engines behind generate_forecast() and prophet_model.run_forecast().
+
+Every engine fits on a frame with datetime 'ds' and numeric 'y' columns and predicts
+a frame with 'ds', 'yhat', 'yhat_lower' and 'yhat_upper' (history first, then the
+future at daily steps, like Prophet's make_future_dataframe). Prophet is the default;
+the NumPy engines cover short, simple series in a few milliseconds.
+"""
+import math
+import time
+from statistics import NormalDist
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.utils.intervals import apply_intervals
+
+ENGINES = ("prophet", "seasonal_naive", "holt_winters", "fourier", "auto")
+
+DAY = np.timedelta64(1, 'D')
+
+
+class ForecastEngine:
+    name = "base"
+
+    def fit(self, df: pd.DataFrame, warm_start: Optional[Dict] = None) -> None:
+        raise NotImplementedError
+
+    def predict(self, days: int) -> pd.DataFrame:
+        """
+        Fitted values for every history date followed by `days` daily future rows.
+        """
+        raise NotImplementedError
+
+    def predict_future(self, days: int, steps_before: int = 0) -> pd.DataFrame:
+        """
+        Future rows steps_before + 1 .. days only, without touching the history.
+        """
+        raise NotImplementedError
+
+    def predict_at(self, ds: np.ndarray) -> np.ndarray:
+        """
+        Point forecasts (yhat only) at arbitrary dates, e.g. a backtest's holdout.
+        """
+        raise NotImplementedError
+
+    @property
+    def history(self) -> pd.DataFrame:
+        raise NotImplementedError
+
+    @property
+    def history_length(self) -> int:
+        """
+        Number of history rows in predict() output (one per distinct date).
+        """
+        raise NotImplementedError
+
+    @property
+    def model(self):
+        """
+        The underlying model object (the Prophet instance for ProphetEngine).
+        """
+        return self
+
+
+class ProphetEngine(ForecastEngine):
+    name = "prophet"
+
+    def __init__(self, interval: Optional[Dict] = None, **prophet_kwargs):
+        self.interval = interval if interval is not None else {"mode": "full"}
+        if self.interval["mode"] != 'full':
+            # Prophet samples every row only in 'full' mode; the other modes predict points and add bands after
+            prophet_kwargs["uncertainty_samples"] = 0
+        # Imported here so the server (and the lightweight engines) start without loading Prophet and Stan
+        from prophet import Prophet
+        self._model = Prophet(**prophet_kwargs)
+
+    @property
+    def model(self):
+        return self._model
+
+    @property
+    def history(self) -> pd.DataFrame:
+        return self._model.history[['ds', 'y']]
+
+    @property
+    def history_length(self) -> int:
+        return len(self._model.history_dates)
+
+    def fit(self, df, warm_start=None):
+        if warm_start is not None:
+            self._model.fit(df, init=warm_start)
+        else:
+            self._model.fit(df)
+
+    def predict(self, days):
+        m = self._model
+        forecast = m.predict(m.make_future_dataframe(periods=days))
+        if self.interval["mode"] != 'full':
+            forecast, self.interval["sigma"] = apply_intervals(m, forecast, m.history, self.interval)
+        return forecast
+
+    def predict_future(self, days, steps_before=0):
+        m = self._model
+        future = m.make_future_dataframe(periods=days, include_history=False).iloc[steps_before:]
+        forecast = m.predict(future)
+        if self.interval["mode"] != 'full':
+            forecast, _ = apply_intervals(
+                m, forecast, m.history, self.interval, steps_before=steps_before, sigma=self.interval["sigma"]
+            )
+        return forecast
+
+    def predict_at(self, ds):
+        return self._model.predict(pd.DataFrame({'ds': pd.to_datetime(ds)}))['yhat'].to_numpy()
+
+
+def _seasonality_enabled(flag: Any, auto: bool) -> bool:
+    if isinstance(flag, str):
+        if flag.lower() == 'auto':
+            return auto
+        return flag.lower() not in ('false', '0', 'no', 'off')
+    return bool(flag)
+
+
+class _NumpyEngine(ForecastEngine):
+    """
+    Shared plumbing for the lightweight engines: history handling, daily future dates
+    and residual-based bands that widen with the horizon.
+    """
+
+    def __init__(
+        self,
+        seasonality_mode: str = 'additive',
+        growth: str = 'linear',
+        daily_seasonality: Any = 'auto',
+        weekly_seasonality: Any = 'auto',
+        yearly_seasonality: Any = 'auto',
+        interval_width: float = 0.95,
+        **_ignored
+    ):
+        self.seasonality_mode = seasonality_mode
+        self.growth = growth
+        self.daily_seasonality = daily_seasonality
+        self.weekly_seasonality = weekly_seasonality
+        self.yearly_seasonality = yearly_seasonality
+        self.interval_width = interval_width
+        self._z = NormalDist().inv_cdf(0.5 + interval_width / 2)
+
+    @property
+    def history(self):
+        return pd.DataFrame({'ds': self._ds, 'y': self._y})
+
+    @property
+    def history_length(self):
+        return len(self._ds)
+
+    def fit(self, df, warm_start=None):
+        # One row per date, like Prophet's history_dates
+        history = df[['ds', 'y']].groupby('ds', sort=True)['y'].mean()
+        if len(history) < 2:
+            raise ValueError("Dataframe has less than 2 non-NaN rows.")
+        self._ds = history.index.values.astype('datetime64[ns]')
+        self._y = history.to_numpy(dtype='float64')
+        self._t = (self._ds - self._ds[0]) / DAY
+        self._spacing = float(np.median(np.diff(self._t)))
+        self._fit()
+        resid = self._y - self._fitted
+        resid = resid[~np.isnan(resid)]
+        self._sigma = float(np.std(resid, ddof=1)) if len(resid) > 1 else 0.0
+
+    def _season_days(self) -> Optional[float]:
+        span = self._t[-1]
+        if self._spacing < 1 and _seasonality_enabled(self.daily_seasonality, span >= 2):
+            return 1.0
+        if self._spacing < 7 and _seasonality_enabled(self.weekly_seasonality, span >= 14):
+            return 7.0
+        return None
+
+    def _future_ds(self, days: int, steps_before: int = 0) -> np.ndarray:
+        return self._ds[-1] + np.arange(steps_before + 1, days + 1) * DAY
+
+    def _frame(self, ds: np.ndarray, yhat: np.ndarray, scale: np.ndarray) -> pd.DataFrame:
+        half_width = self._z * self._sigma * scale
+        return pd.DataFrame({'ds': ds, 'yhat': yhat, 'yhat_lower': yhat - half_width, 'yhat_upper': yhat + half_width})
+
+    def predict(self, days):
+        fitted = np.where(np.isnan(self._fitted), self._y, self._fitted)
+        future_ds = self._future_ds(days)
+        yhat, scale = self._predict_at(future_ds)
+        # One frame from the joined arrays rather than two frames concatenated
+        return self._frame(
+            np.concatenate([self._ds, future_ds]),
+            np.concatenate([fitted, yhat]),
+            np.concatenate([np.ones(len(fitted)), scale])
+        )
+
+    def predict_future(self, days, steps_before=0):
+        ds = self._future_ds(days, steps_before)
+        yhat, scale = self._predict_at(ds)
+        return self._frame(ds, yhat, scale)
+
+    def predict_at(self, ds):
+        return self._predict_at(np.asarray(ds, dtype='datetime64[ns]'))[0]
+
+    # Subclasses fill self._fitted in _fit() and return (yhat, band scale) from _predict_at()
+
+    def _fit(self) -> None:
+        raise NotImplementedError
+
+    def _predict_at(self, ds: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        raise NotImplementedError
+
+
+class SeasonalNaiveEngine(_NumpyEngine):
+    """
+    Repeats the value one season earlier (last value if there is no seasonality).
+    """
+    name = "seasonal_naive"
+
+    def _fit(self):
+        season = self._season_days()
+        self._period = season * DAY if season else None
+        if self._period is None:
+            self._fitted = np.concatenate(([np.nan], self._y[:-1]))
+        else:
+            self._fitted = self._lookup(self._ds - self._period)
+
+    def _lookup(self, ds: np.ndarray) -> np.ndarray:
+        idx = np.searchsorted(self._ds, ds, side='right') - 1
+        values = self._y[np.clip(idx, 0, None)]
+        return np.where(idx >= 0, values, np.nan)
+
+    def _predict_at(self, ds):
+        ahead = (ds - self._ds[-1]) / DAY
+        if self._period is None:
+            steps = np.maximum(ahead / self._spacing, 1)
+            return np.full(len(ds), self._y[-1]), np.sqrt(steps)
+        seasons_ahead = np.ceil(ahead / (self._period / DAY))
+        return self._lookup(ds - seasons_ahead * self._period), np.sqrt(np.maximum(seasons_ahead, 1))
+
+
+class HoltWintersEngine(_NumpyEngine):
+    """
+    Additive Holt-Winters (level, trend, season) with smoothing constants picked by a
+    small grid search on one-step-ahead errors.
+    """
+    name = "holt_winters"
+
+    GRID_ALPHA = (0.2, 0.5, 0.8)
+    GRID_BETA = (0.05, 0.2)
+    GRID_GAMMA = (0.1, 0.3)
+
+    def _fit(self):
+        season = self._season_days()
+        m = int(round(season / self._spacing)) if season else 0
+        self._m = m if m >= 2 and len(self._y) >= 2 * m else 0
+        betas = (0.0,) if self.growth == 'flat' else self.GRID_BETA
+        gammas = self.GRID_GAMMA if self._m else (0.0,)
+
+        y = self._y.tolist()
+        best = None
+        for alpha in self.GRID_ALPHA:
+            for beta in betas:
+                for gamma in gammas:
+                    state = self._smooth(y, alpha, beta, gamma)
+                    if best is None or state[0] < best[0]:
+                        best = state + (alpha, beta, gamma)
+        _, self._fitted, self._level, self._trend, self._season, self._alpha, self._beta, self._gamma = best
+
+    def _smooth(self, y: List[float], alpha: float, beta: float, gamma: float):
+        m = self._m
+        if m:
+            level = sum(y[:m]) / m
+            trend = (sum(y[m:2 * m]) / m - level) / m if beta else 0.0
+            season = [v - level for v in y[:m]]
+        else:
+            level, trend, season = y[0], (y[1] - y[0] if beta else 0.0), [0.0]
+
+        fitted = [math.nan]
+        sse = 0.0
+        for i in range(1, len(y)):
+            s = season[i % m] if m else 0.0
+            prediction = level + trend + s
+            fitted.append(prediction)
+            error = y[i] - prediction
+            sse += error * error
+            new_level = level + trend + alpha * error
+            trend = trend + alpha * beta * error
+            if m:
+                season[i % m] = s + gamma * (1 - alpha) * error
+            level = new_level
+        return sse, np.array(fitted), level, trend, season
+
+    def _predict_at(self, ds):
+        steps = np.maximum(np.rint((ds - self._ds[-1]) / DAY / self._spacing).astype(int), 1)
+        n = len(self._y)
+        season = np.array(self._season)[(n - 1 + steps) % self._m] if self._m else 0.0
+        yhat = self._level + steps * self._trend + season
+
+        # Forecast variance of the additive model: sigma^2 * (1 + sum_{j<h} c_j^2)
+        j = np.arange(1, steps.max())
+        c = self._alpha * (1 + j * self._beta) + (self._gamma * (j % self._m == 0) if self._m else 0.0)
+        cumulative = np.concatenate(([0.0], np.cumsum(c ** 2)))
+        return yhat, np.sqrt(1 + cumulative[steps - 1])
+
+
+class FourierEngine(_NumpyEngine):
+    """
+    Linear trend plus Fourier seasonality terms, fitted by least squares. Multiplicative
+    seasonality is handled by fitting log(y) when every value is positive.
+    """
+    name = "fourier"
+
+    def _design(self, t: np.ndarray) -> np.ndarray:
+        columns = [np.ones(len(t))]
+        if self.growth != 'flat':
+            columns.append(t / max(self._t[-1], 1.0))
+        for period, order in self._periods:
+            for k in range(1, order + 1):
+                angle = 2 * np.pi * k * t / period
+                columns.extend((np.sin(angle), np.cos(angle)))
+        return np.column_stack(columns)
+
+    def _fit(self):
+        span = self._t[-1]
+        self._periods = []
+        if self._spacing < 1 and _seasonality_enabled(self.daily_seasonality, span >= 2):
+            self._periods.append((1.0, 4))
+        if self._spacing < 7 and _seasonality_enabled(self.weekly_seasonality, span >= 14):
+            self._periods.append((7.0, 3))
+        if _seasonality_enabled(self.yearly_seasonality, span >= 730):
+            self._periods.append((365.25, 10))
+
+        self._log = self.seasonality_mode == 'multiplicative' and bool((self._y > 0).all())
+        target = np.log(self._y) if self._log else self._y
+
+        X = self._design(self._t)
+        self._coef, *_ = np.linalg.lstsq(X, target, rcond=None)
+        self._xtx_inv = np.linalg.pinv(X.T @ X)
+        fitted = X @ self._coef
+        resid = target - fitted
+        self._target_sigma = float(np.std(resid, ddof=1)) if len(resid) > 1 else 0.0
+        self._fitted = np.exp(fitted) if self._log else fitted
+
+    def _predict_at(self, ds):
+        X = self._design((ds - self._ds[0]) / DAY)
+        yhat = X @ self._coef
+        # Prediction standard error of least squares grows with leverage
+        scale = np.sqrt(1 + np.einsum('ij,jk,ik->i', X, self._xtx_inv, X))
+        if self._log:
+            return np.exp(yhat), scale
+        return yhat, scale
+
+    def _frame(self, ds, yhat, scale):
+        if not self._log:
+            return super()._frame(ds, yhat, scale)
+        # Bands are symmetric in log space, so exponentiate them instead of adding to yhat
+        half_width = self._z * self._target_sigma * scale
+        log_yhat = np.log(yhat)
+        return pd.DataFrame({
+            'ds': ds,
+            'yhat': yhat,
+            'yhat_lower': np.exp(log_yhat - half_width),
+            'yhat_upper': np.exp(log_yhat + half_width)
+        })
+
+
+# Cheapest first; 'auto' takes the first one that meets the backtest threshold
+LIGHTWEIGHT_ENGINES = (SeasonalNaiveEngine, FourierEngine, HoltWintersEngine)
+ENGINE_CLASSES = {cls.name: cls for cls in LIGHTWEIGHT_ENGINES}
+MIN_BACKTEST_ROWS = 14
+
+
+def _mape(y_true: np.ndarray, y_pred: np.ndarray) -> float:
+    mask = (y_true != 0) & ~np.isnan(y_pred)
+    if not mask.any():
+        return math.inf
+    return float(np.mean(np.abs((y_true[mask] - y_pred[mask]) / y_true[mask])) * 100)
+
+
+def select_engine(df: pd.DataFrame, days: int, threshold: float, **kwargs) -> Tuple[str, Dict[str, Any]]:
+    """
+    Backtest the lightweight engines on a holdout at the end of df (cheapest first) and
+    return the first one whose MAPE is within threshold, or 'prophet' if none is.
+    """
+    history = df[['ds', 'y']].groupby('ds', sort=True)['y'].mean().reset_index()
+    holdout = min(days, max(1, len(history) // 5))
+    train, test = history.iloc[:-holdout], history.iloc[-holdout:]
+    selection = {"threshold_mape": threshold, "holdout_rows": holdout, "candidates": []}
+
+    if len(train) < MIN_BACKTEST_ROWS:
+        selection["reason"] = "Too little history to backtest the lightweight engines."
+        return "prophet", selection
+
+    for cls in LIGHTWEIGHT_ENGINES:
+        started = time.perf_counter()
+        try:
+            engine = cls(**kwargs)
+            engine.fit(train)
+            mape = _mape(test['y'].to_numpy(dtype='float64'), engine.predict_at(test['ds'].values))
+        except Exception as e:
+            selection["candidates"].append({"engine": cls.name, "error": str(e)})
+            continue
+        selection["candidates"].append({
+            "engine": cls.name,
+            "mape": round(mape, 2) if math.isfinite(mape) else None,
+            "ms": round(1000 * (time.perf_counter() - started), 2)
+        })
+        if mape <= threshold:
+            return cls.name, selection
+
+    selection["reason"] = "No lightweight engine met the threshold."
+    return "prophet", selection
+
+
+def make_engine(
+    name: str = 'prophet',
+    df: Optional[pd.DataFrame] = None,
+    days: int = 30,
+    interval: Optional[Dict] = None,
+    auto_threshold: float = 10.0,
+    **prophet_kwargs
+) -> Tuple[ForecastEngine, Dict[str, Any]]:
+    """
+    Build an (unfitted) engine by name. 'auto' needs df and days to run the backtest.
+    Returns the engine and a description of how it was chosen.
+    """
+    if name not in ENGINES:
+        raise ValueError(f"engine must be one of {', '.join(ENGINES)}.")
+
+    info: Dict[str, Any] = {"requested": name}
+    if name == 'auto':
+        if df is None:
+            raise ValueError("engine='auto' needs the data to backtest against.")
+        name, info["selection"] = select_engine(df, days, auto_threshold, **prophet_kwargs)
+    info["name"] = name
+
+    if name == 'prophet':
+        return ProphetEngine(interval=interval, **prophet_kwargs), info
+    return ENGINE_CLASSES[name](**prophet_kwargs), info
@@ -0,0 +1,208 @@
+import asyncio
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from app import config
+from app.utils.warmup import warm_up_worker
+
+
+class ExecutorBusy(Exception):
+    """
+    Raised when every worker is busy and the wait queue is full.
+    """
+    def __init__(self, retry_after: int):
+        super().__init__("Forecast workers are busy, please retry shortly.")
+        self.retry_after = retry_after
+
+
+class TaskTimeout(Exception):
+    """
+    Raised when a task does not finish within the configured timeout.
+    """
+
+
+class ForecastExecutor:
+    """
+    Runs CPU-bound work (Prophet fit/predict, PDF builds) off the event loop in a bounded
+    process pool.
+
+    At most max_workers tasks run at once and at most max_queue more may wait; anything
+    beyond that is rejected with ExecutorBusy instead of piling up. To cap Stan/pandas memory
+    creep the pool is retired after max_tasks_per_child tasks per worker: its workers finish
+    what they were given and exit, and new tasks go to a fresh pool. With max_workers=0
+    tasks run in a thread instead, which is handy for development and debugging.
+    initializer runs once in every worker (process or thread) before its first task.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue: int,
+        task_timeout: Optional[float] = None,
+        max_tasks_per_child: Optional[int] = None,
+        retry_after: int = 5,
+        initializer: Optional[Callable[[], None]] = None
+    ):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.task_timeout = task_timeout
+        self.max_tasks_per_child = max_tasks_per_child
+        self.retry_after = retry_after
+        self.initializer = initializer
+
+        self._pool: Optional[Executor] = None
+        self._pool_tasks = 0
+        self._manager = None
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._counters = {"completed": 0, "failed": 0, "rejected": 0, "timed_out": 0}
+
+    @property
+    def capacity(self) -> int:
+        return max(self.max_workers, 1) + self.max_queue
+
+    def _get_pool(self) -> Executor:
+        # Called with the lock held, once per submitted task
+        if self._pool is not None and self.max_workers > 0 and self.max_tasks_per_child:
+            if self._pool_tasks >= self.max_tasks_per_child * self.max_workers:
+                # Not ProcessPoolExecutor's own max_tasks_per_child: on Python 3.11 a task submitted
+                # while a worker is exiting after its last task can wait forever for a replacement
+                self._pool.shutdown(wait=False)
+                self._pool = None
+        if self._pool is None:
+            if self.max_workers <= 0:
+                self._pool = ThreadPoolExecutor(max_workers=1, initializer=self.initializer)
+            else:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=self.initializer
+                )
+            self._pool_tasks = 0
+        self._pool_tasks += 1
+        return self._pool
+
+    def submit(self, fn: Callable, *args, **kwargs):
+        """
+        Admit a task and hand it to the pool. Returns a concurrent.futures.Future.
+        """
+        with self._lock:
+            if self._admitted >= self.capacity:
+                self._counters["rejected"] += 1
+                raise ExecutorBusy(self.retry_after)
+            self._admitted += 1
+            pool = self._get_pool()
+
+        try:
+            future = pool.submit(fn, *args, **kwargs)
+        except Exception:
+            self._release(None)
+            raise
+        # The slot is held until the task really finishes, even if the caller stopped waiting
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) in the pool and await its result.
+        """
+        future = self.submit(fn, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.task_timeout)
+        except asyncio.TimeoutError:
+            # Still queued tasks are dropped; a running task finishes in its worker and is discarded
+            future.cancel()
+            with self._lock:
+                self._counters["timed_out"] += 1
+            raise TaskTimeout(f"Task exceeded the {self.task_timeout:g}s time limit.")
+
+    async def imap_unordered(self, fn: Callable, arg_tuples: Iterable[Tuple]) -> AsyncIterator[Any]:
+        """
+        Run fn(*args) for every tuple in arg_tuples and yield each result as soon as it finishes.
+        At most two tasks per worker are outstanding (one running, one ready to start), so a large
+        batch keeps every core busy without flooding the shared queue.
+        """
+        window = 2 * max(self.max_workers, 1)
+        pending = set()
+        arg_tuples = iter(arg_tuples)
+        exhausted = False
+
+        while pending or not exhausted:
+            while not exhausted and len(pending) < window:
+                args = next(arg_tuples, None)
+                if args is None:
+                    exhausted = True
+                    break
+                try:
+                    future = self.submit(fn, *args)
+                except ExecutorBusy:
+                    # Other requests hold the pool; wait for one of ours or back off briefly
+                    arg_tuples = _prepend(args, arg_tuples)
+                    if not pending:
+                        await asyncio.sleep(0.1)
+                    break
+                pending.add(asyncio.wrap_future(future))
+
+            if not pending:
+                continue
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+
+    def _release(self, future) -> None:
+        with self._lock:
+            self._admitted -= 1
+            if future is None or future.cancelled():
+                return
+            if future.exception() is None:
+                self._counters["completed"] += 1
+            else:
+                self._counters["failed"] += 1
+
+    def make_queue(self):
+        """
+        Return a queue that tasks running in this executor's workers can report progress on.
+        """
+        if self.max_workers <= 0:
+            return queue.Queue()
+        with self._lock:
+            if self._manager is None:
+                self._manager = multiprocessing.get_context("spawn").Manager()
+            return self._manager.Queue()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._counters,
+                "in_flight": self._admitted,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue
+            }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+            manager, self._manager = self._manager, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if manager is not None:
+            manager.shutdown()
+
+
+def _prepend(item, rest: Iterator) -> Iterator:
+    yield item
+    yield from rest
+
+
+# Process-wide engine used by the routes
+forecast_executor = ForecastExecutor(
+    max_workers=config.EXECUTOR_MAX_WORKERS,
+    max_queue=config.EXECUTOR_MAX_QUEUE,
+    task_timeout=config.EXECUTOR_TASK_TIMEOUT_SECONDS or None,
+    max_tasks_per_child=config.EXECUTOR_MAX_TASKS_PER_WORKER,
+    retry_after=config.EXECUTOR_RETRY_AFTER_SECONDS,
+    initializer=warm_up_worker if config.WARMUP_ENABLED else None
+)
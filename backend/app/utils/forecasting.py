@@ -1,12 +1,65 @@
 import pandas as pd
 import numpy as np
-from prophet import Prophet
+from app import config
+from app.utils.anomalies import DETECTORS, detect_anomalies, fitted_pairs
+from app.utils.engines import ForecastEngine, make_engine
+from app.utils.intervals import INTERVAL_MODES
+from app.utils.resampling import native_forecast, resample_series
+from app.utils.telemetry import stage_timer
+import io
 import os
-from typing import Optional, Dict, List
+from typing import IO, Any, Callable, Optional, Dict, List, Tuple
 
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+# Parameters that change the fitted model. The horizon ('days') only affects predict.
+MODEL_PARAMS = (
+    "seasonality_mode", "growth", "daily_seasonality", "weekly_seasonality", "yearly_seasonality",
+    "changepoint_prior_scale", "seasonality_prior_scale"
+)
+
+# Columns of every forecast result. Prophet's predict() also returns the trend, each seasonal
+# term and bounds for all of them; those are kept only when components are asked for.
+FORECAST_COLUMNS = ('ds', 'yhat', 'yhat_lower', 'yhat_upper')
+
+def compact_forecast(forecast: pd.DataFrame, components: bool = False) -> pd.DataFrame:
     """
-    Standardize column names to 'ds' and 'y' using smart detection.
+    The result frame for an engine's predict() output: the forecast columns only, in row
+    order (history first, so row i of the history is row i of the forecast), as float32 when
+    config.RESULT_FLOAT32 is set. With components, Prophet's trend and seasonal/holiday
+    terms (without their bounds) are kept too. The wide frame can be freed right after.
+    """
+    columns = list(FORECAST_COLUMNS[1:])
+    if components:
+        columns += [c for c in forecast.columns if c not in FORECAST_COLUMNS and not c.endswith(('_lower', '_upper'))]
+    dtype = 'float32' if config.RESULT_FLOAT32 else 'float64'
+    data = {'ds': forecast['ds'].to_numpy()}
+    data.update((c, forecast[c].to_numpy(dtype=dtype)) for c in columns)
+    return pd.DataFrame(data)
+
+def read_csv_file(source: IO[bytes]) -> pd.DataFrame:
+    """
+    Parse CSV from a seekable binary file (e.g. an upload's spooled file) without copying it
+    into memory first, falling back to latin1 for files that are not valid UTF-8.
+    """
+    start = source.tell()
+    try:
+        return pd.read_csv(source)
+    except Exception:
+        source.seek(start)
+        try:
+            return pd.read_csv(source, encoding='latin1')
+        except Exception as e:
+            raise ValueError(f"Invalid CSV file. Could not parse: {str(e)}")
+
+def read_csv_bytes(contents: bytes) -> pd.DataFrame:
+    """
+    Parse raw CSV bytes, falling back to latin1 for files that are not valid UTF-8.
+    """
+    return read_csv_file(io.BytesIO(contents))
+
+def detect_columns(df: pd.DataFrame) -> Tuple[str, str]:
+    """
+    Names of the date and target columns of a raw frame (or a sample of its first rows).
+    Raises ValueError if either cannot be found.
     """
     # Look for date column
     date_col = None
@@ -51,6 +104,14 @@ def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
     if not target_col:
         raise ValueError("Could not detect a numeric target column. Please ensure one exists.")
 
+    return date_col, target_col
+
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Standardize column names to 'ds' and 'y' using smart detection.
+    """
+    date_col, target_col = detect_columns(df)
+
     # Rename and clean up
     df = df.rename(columns={date_col: 'ds', target_col: 'y'})
     
@@ -84,32 +145,41 @@ def calculate_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> Dict[str, float
         "MAPE": round(mape, 2)
     }
 
-def detect_anomalies(forecast: pd.DataFrame, actuals: pd.DataFrame) -> pd.DataFrame:
-    # Merge forecast with actuals
-    merged = pd.merge(actuals, forecast[['ds', 'yhat_lower', 'yhat_upper', 'yhat']], on='ds', how='inner')
-    
-    # Identify anomalies
-    merged['is_anomaly'] = (merged['y'] < merged['yhat_lower']) | (merged['y'] > merged['yhat_upper'])
-    
-    # Return only the rows that are anomalies
-    anomalies = merged[merged['is_anomaly']].copy()
-    
-    if anomalies.empty:
-        return pd.DataFrame(columns=['ds', 'y', 'yhat', 'yhat_lower', 'yhat_upper', 'severity', 'severity_level'])
-
-    # Calculate severity as percentage deviation from yhat
-    anomalies['severity_pct'] = (np.abs(anomalies['y'] - anomalies['yhat']) / anomalies['yhat']) * 100
-    
-    # Classify severity levels
-    def classify_severity(pct):
-        if pct > 20: return 'High'
-        if pct > 10: return 'Medium'
-        return 'Low'
-    
-    anomalies['severity_level'] = anomalies['severity_pct'].apply(classify_severity)
-    anomalies['severity'] = np.abs(anomalies['y'] - anomalies['yhat'])
-    
-    return anomalies[['ds', 'y', 'yhat', 'yhat_lower', 'yhat_upper', 'severity', 'severity_level']]
+def build_engine(
+    df: pd.DataFrame,
+    days: int,
+    engine: str = 'prophet',
+    interval: Optional[Dict] = None,
+    seasonality_mode: str = 'additive',
+    growth: str = 'linear',
+    daily_seasonality: str = 'auto',
+    weekly_seasonality: str = 'auto',
+    yearly_seasonality: str = 'auto',
+    changepoint_prior_scale: float = 0.05,
+    seasonality_prior_scale: float = 10.0,
+    holidays: Optional[pd.DataFrame] = None,
+    interval_samples: int = 300
+) -> Tuple[ForecastEngine, Dict[str, Any]]:
+    """
+    The unfitted engine generate_forecast() would use for df, plus how it was chosen.
+    """
+    return make_engine(
+        engine,
+        df=df,
+        days=days,
+        interval=interval,
+        auto_threshold=config.AUTO_ENGINE_MAPE_THRESHOLD,
+        seasonality_mode=seasonality_mode,
+        growth=growth,
+        daily_seasonality=daily_seasonality,
+        weekly_seasonality=weekly_seasonality,
+        yearly_seasonality=yearly_seasonality,
+        changepoint_prior_scale=changepoint_prior_scale,
+        seasonality_prior_scale=seasonality_prior_scale,
+        holidays=holidays,
+        interval_width=0.95, # Increased for more conservative detection
+        uncertainty_samples=interval_samples
+    )
 
 def generate_forecast(
     file_path: str | pd.DataFrame,
@@ -119,12 +189,43 @@ def generate_forecast(
     daily_seasonality: str = 'auto',
     weekly_seasonality: str = 'auto',
     yearly_seasonality: str = 'auto',
-    holidays: Optional[pd.DataFrame] = None
+    changepoint_prior_scale: float = 0.05,
+    seasonality_prior_scale: float = 10.0,
+    holidays: Optional[pd.DataFrame] = None,
+    progress: Optional[Callable[[str], None]] = None,
+    warm_start: Optional[Dict] = None,
+    interval_mode: str = 'full',
+    interval_samples: int = 300,
+    interval_seed: int = 0,
+    engine: str = 'prophet',
+    anomaly_method: str = 'interval',
+    anomaly_threshold: Optional[float] = None,
+    granularity: str = 'auto',
+    aggregation: str = 'mean',
+    components: bool = False
 ) -> Dict:
     """
-    Loads data, trains Prophet, forecasts, detects anomalies, and calculates metrics.
+    Loads data, trains the chosen engine (Prophet by default), forecasts, detects anomalies, and calculates metrics.
     Returns a dictionary with 'forecast', 'anomalies', and 'metrics'.
+    If given, progress is called with the name of each stage as it starts
+    ('fitting', 'predicting', 'anomalies', 'insights'), and warm_start is passed to
+    the Stan optimizer as its starting point (see registry.warm_start_params).
+    interval_mode picks how Prophet's yhat_lower/yhat_upper are computed (see intervals.INTERVAL_MODES).
+    engine is one of engines.ENGINES; 'auto' backtests the lightweight engines first.
+    anomaly_method/anomaly_threshold pick the detector (see anomalies.DETECTORS).
+    granularity/aggregation control the pre-fit resampling (see resampling.resample_series).
+    components keeps the model's decomposition in the forecast (see compact_forecast).
     """
+    def report(stage: str):
+        if progress is not None:
+            progress(stage)
+
+    if interval_mode not in INTERVAL_MODES:
+        raise ValueError(f"interval_mode must be one of {', '.join(INTERVAL_MODES)}.")
+    if anomaly_method not in DETECTORS:
+        raise ValueError(f"anomaly_method must be one of {', '.join(DETECTORS)}.")
+    interval = {"mode": interval_mode, "samples": interval_samples, "seed": interval_seed}
+
     # Load data
     if isinstance(file_path, str):
         if not os.path.exists(file_path):
@@ -152,57 +253,123 @@ def generate_forecast(
     # Convert ds to datetime and ensure consistency
     try:
         df['ds'] = pd.to_datetime(df['ds'])
-        print(f"DEBUG: Processing {len(df)} data points from {df['ds'].min()} to {df['ds'].max()}")
     except Exception:
         raise ValueError("Could not parse 'ds' column as dates.")
         
     if df['ds'].dt.tz is not None:
         df['ds'] = df['ds'].dt.tz_localize(None)
 
-    # Initialize Prophet model
-    # Optimization: uncertainty_samples=100 (default 1000) to speed up forecast by ~10x while keeping intervals
-    m = Prophet(
-        seasonality_mode=seasonality_mode,
-        growth=growth,
-        daily_seasonality=daily_seasonality,
-        weekly_seasonality=weekly_seasonality,
-        yearly_seasonality=yearly_seasonality,
-        holidays=holidays,
-        interval_width=0.95, # Increased for more conservative detection
-        uncertainty_samples=300 # More samples for more stable intervals
-    )
-    
-    m.fit(df)
+    timings: Dict[str, float] = {}
+    # Fit on one row per period; anomalies are still checked against the uploaded rows below
+    original = df
+    with stage_timer(timings, "resample"):
+        df, resampling = resample_series(df, days, granularity, aggregation)
 
-    # Create future dataframe (includes history + future)
-    future = m.make_future_dataframe(periods=days)
+    report("fitting")
+    with stage_timer(timings, "fit"):
+        engine_model, engine_info = build_engine(
+            df,
+            days,
+            engine=engine,
+            interval=interval,
+            seasonality_mode=seasonality_mode,
+            growth=growth,
+            daily_seasonality=daily_seasonality,
+            weekly_seasonality=weekly_seasonality,
+            yearly_seasonality=yearly_seasonality,
+            changepoint_prior_scale=changepoint_prior_scale,
+            seasonality_prior_scale=seasonality_prior_scale,
+            holidays=holidays,
+            interval_samples=interval_samples
+        )
+        engine_model.fit(df, warm_start=warm_start)
 
-    # Forecast
-    forecast = m.predict(future)
+    # Forecast (includes history + future)
+    report("predicting")
+    with stage_timer(timings, "predict"):
+        forecast = compact_forecast(engine_model.predict(days), components)
 
     # Detect Anomalies (on historical data)
-    anomalies = detect_anomalies(forecast, df)
+    report("anomalies")
+    with stage_timer(timings, "anomalies"):
+        if df is not original and resampling["anomaly_resolution"] == "native":
+            bucket_forecast, actuals = native_forecast(forecast, original, resampling["granularity"])
+        else:
+            bucket_forecast, actuals = forecast, df
+        anomalies = detect_anomalies(bucket_forecast, actuals, method=anomaly_method, threshold=anomaly_threshold)
     
     # Calculate Metrics (on historical data)
-    # We need to get the fitted values for the history
-    history_forecast = forecast[forecast['ds'].isin(df['ds'])]
-    # Merge to ensure alignment
-    metrics_df = pd.merge(df, history_forecast[['ds', 'yhat']], on='ds')
-    metrics = calculate_metrics(metrics_df['y'].values, metrics_df['yhat'].values)
+    with stage_timer(timings, "metrics"):
+        # Fitted values for the history, aligned by date without merging frames
+        metrics = calculate_metrics(*fitted_pairs(forecast, df))
     
     # Generate Insights
-    insights = generate_insights(forecast, anomalies, df)
-
-    # Sort by date for alignment
-    forecast = forecast.sort_values('ds')
-    anomalies = anomalies.sort_values('ds')
+    report("insights")
+    with stage_timer(timings, "insights"):
+        insights = generate_insights(forecast, anomalies, df)
 
+    # Both frames are already in date order (engines predict the sorted history first)
     return {
-        "forecast": forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']],
+        "forecast": forecast,
         "anomalies": anomalies,
         "metrics": metrics,
         "insights": insights,
-        "model": m
+        # Last date of the history, where the forecast proper starts (see downsampling.chart_view)
+        "history_end": pd.to_datetime(df['ds']).max(),
+        "resampling": resampling,
+        "model": engine_model.model,
+        "engine": engine_model,
+        "engine_info": engine_info,
+        "interval": interval,
+        "components": components,
+        "fit_seconds": round(timings["fit"], 4),
+        # Per-stage durations for the parent process to record (see telemetry.record_stages)
+        "stage_seconds": timings
+    }
+
+def fitted_horizon(fitted: Dict[str, Any]) -> int:
+    """
+    Number of future days already predicted in a generate_forecast() result.
+    """
+    return len(fitted["forecast"]) - fitted["engine"].history_length
+
+def forecast_from_model(fitted: Dict[str, Any], days: int) -> Dict:
+    """
+    Answer a new horizon from an earlier generate_forecast() result without refitting.
+    Rows already predicted are reused; only dates past the end of the stored forecast
+    are predicted, and the history is never re-predicted.
+    """
+    engine = fitted["engine"]
+    forecast = fitted["forecast"]
+    n_history = engine.history_length
+
+    timings: Dict[str, float] = {}
+    n_predicted = fitted_horizon(fitted)
+    if days > n_predicted:
+        with stage_timer(timings, "predict"):
+            extension = compact_forecast(
+                engine.predict_future(days, steps_before=n_predicted), fitted.get("components", False)
+            )
+            forecast = pd.concat([forecast, extension], ignore_index=True)
+
+    horizon_forecast = forecast.iloc[:n_history + days]
+    with stage_timer(timings, "insights"):
+        insights = generate_insights(horizon_forecast, fitted["anomalies"], engine.history)
+    return {
+        "forecast": horizon_forecast,
+        "anomalies": fitted["anomalies"],
+        "metrics": fitted["metrics"],
+        "insights": insights,
+        "history_end": pd.to_datetime(engine.history['ds']).max(),
+        "resampling": fitted.get("resampling"),
+        "model": engine.model,
+        "engine": engine,
+        "engine_info": fitted["engine_info"],
+        "interval": fitted.get("interval", {"mode": "full"}),
+        "components": fitted.get("components", False),
+        # Everything predicted so far, so callers can keep the longest forecast
+        "full_forecast": forecast,
+        "stage_seconds": timings
     }
 
 def generate_insights(forecast: pd.DataFrame, anomalies: pd.DataFrame, history: pd.DataFrame) -> Dict[str, List[str]]:
@@ -0,0 +1,305 @@
+"""
+Upload ingestion beyond the plain CSV parser.
+
+read_series_csv() parses a large CSV straight into a normalized 'ds'/'y' frame without ever
+holding the whole table: it detects the encoding and the date/target columns once from the head
+of the file, then reads the file in chunks keeping only those two columns. Dates are parsed with
+one format inferred from the sample (a vectorized parse instead of guessing per value), and 'y'
+is stored as float32 wherever that is exact (whole numbers, most prices), so peak memory grows
+with the two kept columns, not with the file, and the values never change with the file size.
+
+Parquet and Arrow IPC uploads are recognised by their magic bytes (sniff_format) and read with
+read_columnar(), which picks the columns from the file's schema and loads only those. These
+need the optional pyarrow package; it is imported on first use.
+"""
+import codecs
+import warnings
+from typing import IO, Callable, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.api import guess_datetime_format
+
+from app.utils.forecasting import detect_columns
+
+SAMPLE_BYTES = 64 * 1024
+SAMPLE_ROWS = 1000
+CHUNK_ROWS = 250_000
+Y_DTYPE = "float32"
+PARQUET_MAGIC = b"PAR1"
+ARROW_FILE_MAGIC = b"ARROW1"
+# Arrow IPC streams start with a continuation marker before the schema message
+ARROW_STREAM_MAGIC = b"\xff\xff\xff\xff"
+# Zero-padded numeric strftime fields that parse_fixed_width() reads straight from the bytes
+FIXED_WIDTH_FIELDS = {
+    "%Y": ("year", 4), "%m": ("month", 2), "%d": ("day", 2),
+    "%H": ("hour", 2), "%M": ("minute", 2), "%S": ("second", 2)
+}
+
+
+def detect_encoding(sample: bytes) -> str:
+    """
+    'utf-8' (or 'utf-8-sig' with a byte order mark) if the sample decodes as UTF-8, else 'latin1'.
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        # final=False: the sample may end in the middle of a multi-byte character
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin1"
+
+
+def infer_date_format(values: pd.Series) -> Optional[str]:
+    """
+    strftime format of the first date in values that every value in the sample matches,
+    trying month-first then day-first for dates like 01/02/2023. None leaves pd.to_datetime
+    to infer the format itself.
+    """
+    values = values.dropna()
+    if values.empty:
+        return None
+    first = str(values.iloc[0])
+    with warnings.catch_warnings():
+        # guess_datetime_format warns when the first date only fits the other day/month order
+        warnings.simplefilter("ignore", UserWarning)
+        guesses = [guess_datetime_format(first), guess_datetime_format(first, dayfirst=True)]
+    for date_format in dict.fromkeys(g for g in guesses if g is not None):
+        try:
+            pd.to_datetime(values, format=date_format)
+            return date_format
+        except (ValueError, TypeError):
+            continue
+    return None
+
+
+def _fixed_width_layout(date_format: str):
+    """
+    (width, [(field, offset, digits)], [(offset, literal byte)]) of a format made only of
+    FIXED_WIDTH_FIELDS and ASCII separators, or None.
+    """
+    fields, literals, i, offset = [], [], 0, 0
+    while i < len(date_format):
+        token = date_format[i:i + 2]
+        if token in FIXED_WIDTH_FIELDS:
+            name, digits = FIXED_WIDTH_FIELDS[token]
+            fields.append((name, offset, digits))
+            offset += digits
+            i += 2
+        elif date_format[i] == "%" or ord(date_format[i]) > 127:
+            return None
+        else:
+            literals.append((offset, ord(date_format[i])))
+            offset += 1
+            i += 1
+    if not {"year", "month", "day"} <= {name for name, _, _ in fields}:
+        return None
+    return offset, fields, literals
+
+
+def parse_fixed_width(values: pd.Series, date_format: Optional[str]) -> Optional[pd.Series]:
+    """
+    Fast path for zero-padded numeric layouts such as %d/%m/%Y %H:%M: read the digits at fixed
+    offsets as a byte matrix and assemble the dates from the columns, which avoids pandas'
+    per-value strptime for non-ISO formats. None if any value does not fit the layout exactly.
+    """
+    layout = _fixed_width_layout(date_format) if date_format else None
+    if layout is None or values.empty:
+        return None
+    width, fields, literals = layout
+    if not (values.str.len() == width).all():
+        return None
+    try:
+        raw = values.to_numpy(dtype=object).astype(f"S{width}")
+    except UnicodeEncodeError:
+        return None
+    chars = raw.view(np.uint8).reshape(len(raw), width)
+    if any((chars[:, offset] != byte).any() for offset, byte in literals):
+        return None
+    parts = {}
+    for name, offset, digits in fields:
+        block = chars[:, offset:offset + digits].astype(np.int64) - ord("0")
+        if ((block < 0) | (block > 9)).any():
+            return None
+        parts[name] = block @ (10 ** np.arange(digits - 1, -1, -1))
+    try:
+        return pd.to_datetime(pd.DataFrame(parts, index=values.index))
+    except (ValueError, OverflowError):
+        return None
+
+
+def parse_dates(values: pd.Series, date_format: Optional[str]) -> pd.Series:
+    """
+    Parse values with date_format in one vectorized pass. Values in another layout are
+    parsed one by one; a value that still does not parse raises ValueError.
+    """
+    parsed = pd.to_datetime(values, format=date_format, errors="coerce")
+    failed = parsed.isna() & values.notna()
+    if failed.any():
+        parsed[failed] = pd.to_datetime(values[failed], format="mixed", errors="coerce")
+        failed = parsed.isna() & values.notna()
+        if failed.any():
+            raise ValueError(f"Could not parse date '{values[failed].iloc[0]}' in column '{values.name}'.")
+    return parsed
+
+
+def _swap_day_month(date_format: Optional[str]) -> Optional[str]:
+    if date_format is None or "%d" not in date_format or "%m" not in date_format:
+        return None
+    return date_format.replace("%d", "\0").replace("%m", "%d").replace("\0", "%m")
+
+
+class _OtherDateOrder(Exception):
+    """
+    The sample's dates fit both day/month orders and the one picked was wrong (e.g. every
+    sampled date was in the first twelve days of a month).
+    """
+
+    def __init__(self, date_format: str):
+        self.date_format = date_format
+
+
+def narrow_values(values: np.ndarray, dtype: str) -> np.ndarray:
+    """
+    values as dtype if every value survives the round trip unchanged, otherwise as they are.
+    """
+    narrowed = values.astype(dtype)
+    return narrowed if np.array_equal(narrowed.astype(values.dtype), values) else values
+
+
+def read_series_csv(source: IO[bytes], chunk_rows: int = CHUNK_ROWS, y_dtype: str = Y_DTYPE) -> pd.DataFrame:
+    """
+    Read a seekable binary CSV into a 'ds'/'y' frame chunk by chunk, detecting the columns the
+    same way normalize_columns() does. Rows without a date or a numeric target are dropped.
+    'y' is kept as y_dtype in chunks where that is lossless (see narrow_values), float64 elsewhere.
+    Raises ValueError for files that cannot be used.
+    """
+    start = source.tell()
+    encoding = detect_encoding(source.read(SAMPLE_BYTES))
+    date_format = None
+    # Each fallback starts the read over, at most once: non-UTF-8 bytes past the sample
+    # switch to latin1 (which decodes anything), and a wrong day/month guess to the other order
+    while True:
+        try:
+            return _read_chunks(source, start, encoding, date_format, chunk_rows, y_dtype)
+        except UnicodeDecodeError:
+            encoding = "latin1"
+        except _OtherDateOrder as e:
+            date_format = e.date_format
+
+
+def _read_chunks(
+    source: IO[bytes],
+    start: int,
+    encoding: str,
+    date_format: Optional[str],
+    chunk_rows: int,
+    y_dtype: str
+) -> pd.DataFrame:
+    source.seek(start)
+    try:
+        sample = pd.read_csv(source, nrows=SAMPLE_ROWS, encoding=encoding)
+    except UnicodeDecodeError:
+        raise
+    except Exception as e:
+        raise ValueError(f"Invalid CSV file. Could not parse: {str(e)}")
+    date_col, target_col = detect_columns(sample)
+    # Only an inferred format may be swapped for the other day/month order
+    swappable = date_format is None
+    if date_format is None:
+        date_format = infer_date_format(sample[date_col].dropna().astype(str))
+
+    source.seek(start)
+    frames: List[pd.DataFrame] = []
+    try:
+        with pd.read_csv(
+            source, usecols=[date_col, target_col], dtype={date_col: str},
+            encoding=encoding, chunksize=chunk_rows
+        ) as reader:
+            for chunk in reader:
+                y = pd.to_numeric(chunk[target_col], errors="coerce").astype("float64")
+                keep = y.notna() & chunk[date_col].notna()
+                values = chunk[date_col][keep]
+                ds = parse_fixed_width(values, date_format)
+                if ds is None:
+                    swapped = _swap_day_month(date_format) if swappable else None
+                    if swapped is not None and parse_fixed_width(values, swapped) is not None:
+                        raise _OtherDateOrder(swapped)
+                    ds = pd.to_datetime(values, format=date_format, errors="coerce")
+                    if ds.isna().any():
+                        if swapped is not None and pd.to_datetime(values, format=swapped, errors="coerce").notna().all():
+                            raise _OtherDateOrder(swapped)
+                        ds = parse_dates(values, date_format)
+                frames.append(pd.DataFrame({'ds': ds.to_numpy(), 'y': narrow_values(y[keep].to_numpy(), y_dtype)}))
+    except pd.errors.ParserError as e:
+        raise ValueError(f"Invalid CSV file. Could not parse: {str(e)}")
+
+    if not frames:
+        return pd.DataFrame({'ds': pd.Series(dtype='datetime64[ns]'), 'y': pd.Series(dtype=y_dtype)})
+    return pd.concat(frames, ignore_index=True)
+
+
+def sniff_format(source: IO[bytes]) -> str:
+    """
+    'parquet', 'arrow' (IPC file), 'arrow_stream' (IPC stream) or 'csv', from the first bytes
+    of a seekable binary file. The position is left where it was.
+    """
+    start = source.tell()
+    head = source.read(len(ARROW_FILE_MAGIC))
+    source.seek(start)
+    if head.startswith(PARQUET_MAGIC):
+        return "parquet"
+    if head.startswith(ARROW_FILE_MAGIC):
+        return "arrow"
+    if head.startswith(ARROW_STREAM_MAGIC):
+        return "arrow_stream"
+    return "csv"
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Parquet and Arrow uploads need the pyarrow package, which is not installed on this server.")
+    return pyarrow
+
+
+def series_columns(frame: pd.DataFrame) -> List[str]:
+    """
+    The date and target columns of a single-series file, for read_columnar().
+    """
+    return list(detect_columns(frame))
+
+
+def read_columnar(source: IO[bytes], file_format: str, select: Callable[[pd.DataFrame], List[str]]) -> pd.DataFrame:
+    """
+    Read a Parquet or Arrow IPC file, loading only the columns select() picks. select() gets
+    an empty frame with the file's columns and dtypes, so the same detection that runs on a
+    CSV's frame (e.g. detect_columns) decides the projection before any data is read.
+    Raises ValueError for files that cannot be used.
+    """
+    pa = _pyarrow()
+    start = source.tell()
+    try:
+        if file_format == "parquet":
+            parquet = pa.parquet.ParquetFile(source)
+            columns = select(parquet.schema_arrow.empty_table().to_pandas())
+            # Only the selected columns' chunks are read and decoded
+            table = parquet.read(columns=columns)
+        else:
+            open_reader = pa.ipc.open_file if file_format == "arrow" else pa.ipc.open_stream
+            schema = open_reader(source).schema
+            columns = select(schema.empty_table().to_pandas())
+            source.seek(start)
+            options = pa.ipc.IpcReadOptions(included_fields=[schema.get_field_index(c) for c in columns])
+            table = open_reader(source, options=options).read_all()
+    except pa.ArrowException as e:
+        raise ValueError(f"Invalid {file_format.split('_')[0].title()} file. Could not read: {str(e)}")
+
+    df = table.to_pandas()
+    # Prophet only takes naive timestamps; keep the wall-clock times the file recorded
+    for col in df.select_dtypes(include="datetimetz").columns:
+        df[col] = df[col].dt.tz_localize(None)
+    return df
@@ -0,0 +1,357 @@
+import contextlib
+import io
+import json
+import os
+import pickle
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, Optional
+
+from app import config
+from app.utils.cache import CACHED_FIELDS, forecast_cache, make_cache_key
+from app.utils.executor import ExecutorBusy, ForecastExecutor, forecast_executor
+from app.utils.forecasting import generate_forecast, normalize_columns, read_csv_bytes
+from app.utils.ingestion import read_columnar, read_series_csv, series_columns, sniff_format
+from app.utils.telemetry import jobs_finished, record_stages, rows_processed, span
+
+STAGES = ["parsing", "normalizing", "fitting", "predicting", "anomalies", "insights"]
+FINISHED = ("succeeded", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    """
+    Raised inside a job's worker thread once the job has been cancelled.
+    """
+
+
+class JobStore:
+    """
+    Storage backend for job records and results. Records are plain JSON-able dicts;
+    results are generate_forecast() outputs.
+    """
+
+    def create(self, job: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def update(self, job_id: str, **fields) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def save_result(self, job_id: str, result: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def load_result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def purge_expired(self, now: float) -> int:
+        raise NotImplementedError
+
+
+class MemoryJobStore(JobStore):
+    def __init__(self):
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job):
+        with self._lock:
+            self._jobs[job["id"]] = dict(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.update(fields)
+            return dict(job)
+
+    def save_result(self, job_id, result):
+        with self._lock:
+            self._results[job_id] = result
+
+    def load_result(self, job_id):
+        with self._lock:
+            return self._results.get(job_id)
+
+    def purge_expired(self, now):
+        with self._lock:
+            expired = [k for k, job in self._jobs.items() if job.get("expires_at") and job["expires_at"] <= now]
+            for job_id in expired:
+                self._jobs.pop(job_id, None)
+                self._results.pop(job_id, None)
+            return len(expired)
+
+
+class SQLiteJobStore(JobStore):
+    """
+    Local SQLite backend. Every uvicorn worker pointed at the same file can answer
+    status and result requests, whichever worker runs the job.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, record TEXT NOT NULL, result BLOB, expires_at REAL)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A connection's own context manager commits or rolls back but never closes it
+        with contextlib.closing(sqlite3.connect(self.path, timeout=30)) as conn, conn:
+            yield conn
+
+    def create(self, job):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, record, expires_at) VALUES (?, ?, ?)",
+                (job["id"], json.dumps(job), job.get("expires_at"))
+            )
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT record FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, job_id, **fields):
+        with self._connect() as conn:
+            row = conn.execute("SELECT record FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return None
+            job = json.loads(row[0])
+            job.update(fields)
+            conn.execute(
+                "UPDATE jobs SET record = ?, expires_at = ? WHERE id = ?",
+                (json.dumps(job), job.get("expires_at"), job_id)
+            )
+            return job
+
+    def save_result(self, job_id, result):
+        blob = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connect() as conn:
+            conn.execute("UPDATE jobs SET result = ? WHERE id = ?", (blob, job_id))
+
+    def load_result(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return pickle.loads(row[0]) if row and row[0] is not None else None
+
+    def purge_expired(self, now):
+        with self._connect() as conn:
+            return conn.execute(
+                "DELETE FROM jobs WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)
+            ).rowcount
+
+
+def run_forecast_task(df, params: Dict[str, Any], progress_queue) -> Dict[str, Any]:
+    """
+    Worker-side entry point: run generate_forecast and push stage names onto progress_queue.
+    """
+    result = generate_forecast(df, progress=progress_queue.put, **params)
+    return {k: result[k] for k in CACHED_FIELDS + ("stage_seconds",)}
+
+
+class JobManager:
+    """
+    In-process job queue. Jobs are picked up by a small pool of threads, which parse the
+    upload and hand the fit to the forecast process pool, so no HTTP connection has to
+    stay open for the length of a Stan fit.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        executor: ForecastExecutor,
+        workers: int = 2,
+        result_ttl: float = 3600
+    ):
+        self.store = store
+        self.executor = executor
+        self.result_ttl = result_ttl
+        self._threads = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="forecast-job")
+        self._futures: Dict[str, Any] = {}
+        self._cancelled = set()
+        self._lock = threading.Lock()
+
+    def submit(self, contents: bytes, params: Dict[str, Any]) -> Dict[str, Any]:
+        self.store.purge_expired(time.time())
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": "forecast",
+            "status": "queued",
+            "stage": None,
+            "stages": {stage: "pending" for stage in STAGES},
+            "progress": 0.0,
+            "parameters": params,
+            "row_count": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+            "expires_at": None
+        }
+        self.store.create(job)
+        with self._lock:
+            self._futures[job["id"]] = self._threads.submit(self._run, job["id"], contents, params)
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        self.store.purge_expired(time.time())
+        return self.store.get(job_id)
+
+    def result(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.load_result(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.store.get(job_id)
+        if job is None or job["status"] in FINISHED:
+            return job
+        with self._lock:
+            self._cancelled.add(job_id)
+            future = self._futures.get(job_id)
+        if future is not None and future.cancel():
+            # Never started, so no worker thread will record the cancellation
+            return self._finish(job_id, "cancelled")
+        return self.store.update(job_id, status="cancelling", updated_at=time.time())
+
+    def shutdown(self) -> None:
+        self._threads.shutdown(wait=False, cancel_futures=True)
+
+    # Worker thread
+
+    def _run(self, job_id: str, contents: bytes, params: Dict[str, Any]) -> None:
+        try:
+            self._advance(job_id, "parsing", status="running")
+            file_format = sniff_format(io.BytesIO(contents))
+            if file_format != "csv":
+                with span("parse"):
+                    df = read_columnar(io.BytesIO(contents), file_format, series_columns)
+                self._advance(job_id, "normalizing")
+                with span("normalize"):
+                    df = normalize_columns(df)
+            elif len(contents) >= config.STREAMING_PARSE_MIN_BYTES:
+                # Large file: parse only the date and target columns, in chunks
+                with span("parse"):
+                    df = read_series_csv(io.BytesIO(contents))
+                self._advance(job_id, "normalizing")
+            else:
+                with span("parse"):
+                    df = read_csv_bytes(contents)
+                self._advance(job_id, "normalizing")
+                with span("normalize"):
+                    df = normalize_columns(df)
+            self.store.update(job_id, row_count=len(df))
+            rows_processed.inc(len(df), route="/jobs/forecast")
+
+            key = make_cache_key(df, **params)
+            result = forecast_cache.get(key)
+            if result is None:
+                result = self._fit(job_id, df, params)
+                record_stages(result.pop("stage_seconds", None))
+                forecast_cache.set(key, result)
+
+            self.store.save_result(job_id, result)
+            self._finish(job_id, "succeeded")
+        except JobCancelled:
+            self._finish(job_id, "cancelled")
+        except Exception as e:
+            self._finish(job_id, "failed", error=str(e))
+        finally:
+            with self._lock:
+                self._futures.pop(job_id, None)
+                self._cancelled.discard(job_id)
+
+    def _fit(self, job_id: str, df, params: Dict[str, Any]) -> Dict[str, Any]:
+        progress = self.executor.make_queue()
+        while True:
+            self._check_cancelled(job_id)
+            try:
+                future = self.executor.submit(run_forecast_task, df, params, progress)
+                break
+            except ExecutorBusy as e:
+                # The job already waits in our own queue, so just retry until the pool has room
+                time.sleep(min(e.retry_after, 1))
+
+        started = time.time()
+        while not future.done():
+            try:
+                self._advance(job_id, progress.get(timeout=0.2))
+            except queue.Empty:
+                pass
+            if self._is_cancelled(job_id):
+                future.cancel()
+                raise JobCancelled()
+            if self.executor.task_timeout and time.time() - started > self.executor.task_timeout:
+                future.cancel()
+                raise TimeoutError(f"Job exceeded the {self.executor.task_timeout:g}s time limit.")
+
+        while True:
+            try:
+                self._advance(job_id, progress.get_nowait())
+            except queue.Empty:
+                break
+        return future.result()
+
+    def _advance(self, job_id: str, stage: str, **fields) -> None:
+        self._check_cancelled(job_id)
+        job = self.store.get(job_id)
+        stages = job["stages"]
+        for name in STAGES[:STAGES.index(stage)]:
+            stages[name] = "done"
+        stages[stage] = "running"
+        self.store.update(
+            job_id,
+            stage=stage,
+            stages=stages,
+            progress=round(STAGES.index(stage) / len(STAGES), 2),
+            updated_at=time.time(),
+            **fields
+        )
+
+    def _finish(self, job_id: str, status: str, error: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        jobs_finished.inc(status=status)
+        now = time.time()
+        fields = {"status": status, "error": error, "updated_at": now, "expires_at": now + self.result_ttl}
+        if status == "succeeded":
+            fields.update(stage=None, stages={stage: "done" for stage in STAGES}, progress=1.0)
+        return self.store.update(job_id, **fields)
+
+    def _is_cancelled(self, job_id: str) -> bool:
+        with self._lock:
+            if job_id in self._cancelled:
+                return True
+        # A shared store (SQLite) lets another worker process cancel a job this one runs
+        job = self.store.get(job_id)
+        return job is not None and job["status"] == "cancelling"
+
+    def _check_cancelled(self, job_id: str) -> None:
+        if self._is_cancelled(job_id):
+            raise JobCancelled()
+
+
+def _make_store() -> JobStore:
+    if config.JOB_STORE == "sqlite":
+        return SQLiteJobStore(config.JOB_DB_PATH)
+    return MemoryJobStore()
+
+
+# Process-wide manager used by the /jobs routes
+job_manager = JobManager(
+    store=_make_store(),
+    executor=forecast_executor,
+    workers=config.JOB_WORKERS,
+    result_ttl=config.JOB_RESULT_TTL_SECONDS
+)
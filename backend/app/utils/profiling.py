@@ -0,0 +1,204 @@
+"""
+Opt-in profiling of single requests.
+
+A sampling profiler records the Python stack of one thread every few milliseconds. It needs
+no tracing hooks, so its overhead does not grow with the number of function calls, and since
+it samples wall time, time spent waiting on Stan or I/O shows up too. A profiled request
+samples the server thread that handles it, and runs its pool tasks through run_profiled(),
+which samples the worker thread and sends the stacks back with the result. The combined
+profile is saved as collapsed stacks (one 'frame;frame;frame count' line per stack, the
+input flamegraph.pl and speedscope take) plus a text summary of the top functions.
+"""
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app import config
+
+PROFILE_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+# The event loop waiting for work; the worker's own samples cover that time
+IDLE_FRAMES = ("selectors.py:select",)
+SUMMARY_TOP = 40
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+APP_PREFIX = "app" + os.sep
+
+
+def _frame_name(code) -> str:
+    path = code.co_filename
+    if "site-packages" in path:
+        path = path.split("site-packages" + os.sep, 1)[-1]
+    elif path.startswith(_ROOT):
+        path = os.path.relpath(path, _ROOT)
+    else:
+        path = os.path.basename(path)
+    return f"{path}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread (by default the one that starts it) from a background thread.
+    """
+
+    def __init__(self, interval: float, label: str):
+        self.interval = interval
+        self.label = label
+        self.samples: Dict[str, int] = {}
+        self._thread_id: Optional[int] = None
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    def start(self) -> "SamplingProfiler":
+        self._thread_id = threading.get_ident()
+        self._sampler = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def stop(self) -> Dict[str, int]:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        return self.samples
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame.f_code))
+                frame = frame.f_back
+            if stack[0] in IDLE_FRAMES:
+                continue
+            stack.reverse()
+            # Drop the event loop / process bootstrap frames above the app's own outermost frame
+            start = next((i for i, name in enumerate(stack) if name.startswith(APP_PREFIX)), 0)
+            key = ";".join([self.label] + stack[start:])
+            self.samples[key] = self.samples.get(key, 0) + 1
+
+
+def run_profiled(fn: Callable, interval: float, *args, **kwargs) -> Dict[str, Any]:
+    """
+    Worker-side entry point: run fn(*args, **kwargs) under the sampling profiler. Returns the
+    samples with either the result or the exception, so a failing call is still profiled.
+    """
+    profiler = SamplingProfiler(interval, label="worker").start()
+    try:
+        return {"result": fn(*args, **kwargs), "samples": profiler.stop()}
+    except Exception as e:
+        return {"error": e, "samples": profiler.stop()}
+
+
+class RequestProfile:
+    """
+    The profile of one request: the serving thread's samples plus those its pool tasks send back.
+    """
+
+    def __init__(self, route: str, interval: float = config.PROFILE_INTERVAL_SECONDS):
+        self.id = uuid.uuid4().hex
+        self.route = route
+        self.interval = interval
+        self.samples: Dict[str, int] = {}
+        self._started = time.perf_counter()
+        self._created_at = time.time()
+        self._sampler = SamplingProfiler(interval, label="server").start()
+
+    def add(self, samples: Dict[str, int]) -> None:
+        for stack, count in samples.items():
+            self.samples[stack] = self.samples.get(stack, 0) + count
+
+    def finish(self) -> Dict[str, Any]:
+        self.add(self._sampler.stop())
+        return {
+            "id": self.id,
+            "route": self.route,
+            "created_at": self._created_at,
+            "wall_seconds": time.perf_counter() - self._started,
+            "interval": self.interval,
+            "samples": self.samples
+        }
+
+
+def collapsed_stacks(samples: Dict[str, int]) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(samples.items()))
+
+
+def summarize(profile: Dict[str, Any], top: int = SUMMARY_TOP) -> str:
+    """
+    Top functions by cumulative (inclusive) time, estimated as samples x interval.
+    """
+    samples, interval = profile["samples"], profile["interval"]
+    total = sum(samples.values())
+    cumulative: Dict[str, int] = {}
+    own: Dict[str, int] = {}
+    for stack, count in samples.items():
+        # Skip the server/worker label; count recursive frames once per stack
+        frames = stack.split(";")[1:]
+        for frame in set(frames):
+            cumulative[frame] = cumulative.get(frame, 0) + count
+        if frames:
+            own[frames[-1]] = own.get(frames[-1], 0) + count
+
+    lines = [
+        f"Profile {profile['id']} of {profile['route']}",
+        f"{profile['wall_seconds']:.3f}s wall, {total} samples every {1000 * interval:g} ms "
+        f"({sum(c for s, c in samples.items() if s.startswith('worker;'))} in pool workers)",
+        "",
+        f"{'cumulative':>12} {'%':>6} {'self':>10}  function"
+    ]
+    ranked: List[Tuple[str, int]] = sorted(cumulative.items(), key=lambda item: -item[1])[:top]
+    for frame, count in ranked:
+        lines.append(
+            f"{count * interval:>11.3f}s {100 * count / total:>5.1f}% {own.get(frame, 0) * interval:>9.3f}s  {frame}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+class ProfileStore:
+    """
+    Saved profiles on local disk, one directory per profile. Only the newest max_profiles are kept.
+    """
+
+    FILES = {"summary": "summary.txt", "collapsed": "stacks.collapsed"}
+
+    def __init__(self, root: str, max_profiles: int = 50):
+        self.root = root
+        self.max_profiles = max_profiles
+
+    def _dir(self, profile_id: str) -> str:
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            raise ValueError("Invalid profile id.")
+        return os.path.join(self.root, profile_id)
+
+    def save(self, profile: Dict[str, Any]) -> str:
+        profile_dir = self._dir(profile["id"])
+        os.makedirs(profile_dir, exist_ok=True)
+        contents = {"summary": summarize(profile), "collapsed": collapsed_stacks(profile["samples"])}
+        for kind, name in self.FILES.items():
+            with open(os.path.join(profile_dir, name), "w") as f:
+                f.write(contents[kind])
+        self._prune()
+        return profile["id"]
+
+    def path(self, profile_id: str, kind: str) -> Optional[str]:
+        path = os.path.join(self._dir(profile_id), self.FILES[kind])
+        return path if os.path.exists(path) else None
+
+    def _prune(self) -> None:
+        entries = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if PROFILE_ID_PATTERN.match(name) and os.path.isdir(path):
+                entries.append((os.path.getmtime(path), path))
+        for _, path in sorted(entries)[:-self.max_profiles or None]:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+# Process-wide store used by the routes
+profile_store = ProfileStore(config.PROFILE_DIR, max_profiles=config.PROFILE_MAX_COUNT)
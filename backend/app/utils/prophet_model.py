@@ -1,17 +1,16 @@
 import pandas as pd
-from prophet import Prophet
+from app.utils.engines import make_engine
 
-def run_forecast(csv_path: str, periods: int = 30):
+def run_forecast(csv_path: str, periods: int = 30, engine: str = 'prophet'):
     # Load data
     df = pd.read_csv(csv_path)
 
     # Prophet requires columns: ds (date), y (value)
     df["ds"] = pd.to_datetime(df["ds"])
 
-    model = Prophet()
+    model, _ = make_engine(engine, df=df, days=periods)
     model.fit(df)
 
-    future = model.make_future_dataframe(periods=periods)
-    forecast = model.predict(future)
+    forecast = model.predict(periods)
 
     return forecast[["ds", "yhat", "yhat_lower", "yhat_upper"]]
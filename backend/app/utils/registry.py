@@ -0,0 +1,198 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app import config
+from app.utils.cache import CACHED_FIELDS
+from app.utils.forecasting import MODEL_PARAMS, generate_forecast
+from app.utils.resampling import resample_series
+
+logger = logging.getLogger(__name__)
+
+SERIES_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+
+def model_key(params: Dict[str, Any]) -> str:
+    model_params = {k: params[k] for k in MODEL_PARAMS if k in params}
+    return hashlib.sha256(json.dumps(model_params, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def warm_start_params(m) -> Dict[str, Any]:
+    """
+    Fitted parameters of a Prophet model in the shape Stan expects as init values.
+    """
+    init = {}
+    for name in ['k', 'm', 'sigma_obs']:
+        init[name] = float(m.params[name][0][0])
+    for name in ['delta', 'beta']:
+        init[name] = np.asarray(m.params[name][0])
+    return init
+
+
+class ModelRegistry:
+    """
+    Fitted Prophet models on local disk, one JSON file per (series id, model parameters).
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _series_dir(self, series_id: str) -> str:
+        if not SERIES_ID_PATTERN.match(series_id):
+            raise ValueError("Series id may only contain letters, digits, '.', '_' and '-'.")
+        return os.path.join(self.root, series_id)
+
+    def save(self, series_id: str, params: Dict[str, Any], model, meta: Dict[str, Any]) -> None:
+        from prophet.serialize import model_to_json
+
+        series_dir = self._series_dir(series_id)
+        os.makedirs(series_dir, exist_ok=True)
+        key = model_key(params)
+        for suffix, content in ((".json", model_to_json(model)), (".meta.json", json.dumps(meta))):
+            path = os.path.join(series_dir, key + suffix)
+            with open(path + ".tmp", "w") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+
+    def load(self, series_id: str, params: Dict[str, Any]) -> Optional[Tuple[Any, Dict[str, Any]]]:
+        from prophet.serialize import model_from_json
+
+        base = os.path.join(self._series_dir(series_id), model_key(params))
+        if not os.path.exists(base + ".json"):
+            return None
+        with open(base + ".json") as f:
+            model = model_from_json(f.read())
+        with open(base + ".meta.json") as f:
+            meta = json.load(f)
+        return model, meta
+
+    def list(self, series_id: str) -> List[Dict[str, Any]]:
+        series_dir = self._series_dir(series_id)
+        if not os.path.isdir(series_dir):
+            return []
+        models = []
+        for name in sorted(os.listdir(series_dir)):
+            if name.endswith(".meta.json"):
+                with open(os.path.join(series_dir, name)) as f:
+                    models.append(json.load(f))
+        return models
+
+    def delete(self, series_id: str) -> bool:
+        series_dir = self._series_dir(series_id)
+        if not os.path.isdir(series_dir):
+            return False
+        shutil.rmtree(series_dir)
+        return True
+
+
+def _meta(series_id: str, params: Dict[str, Any], result: Dict[str, Any], history: pd.DataFrame, **fields) -> Dict[str, Any]:
+    return {
+        "series_id": series_id,
+        "model_key": model_key(params),
+        "parameters": {k: params[k] for k in MODEL_PARAMS if k in params},
+        "row_count": len(history),
+        "first_ds": str(history['ds'].min()),
+        "last_ds": str(history['ds'].max()),
+        "metrics": result["metrics"],
+        # The stored history is on this grid, so refreshes resample appended rows the same way
+        "granularity": result["resampling"]["granularity"],
+        "aggregation": result["resampling"]["aggregation"],
+        "updated_at": time.time(),
+        **fields
+    }
+
+
+def register_model(registry: ModelRegistry, series_id: str, df: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Worker-side entry point: cold-fit a series and store the model.
+    """
+    result = generate_forecast(df, **params)
+    model = result["model"]
+    meta = _meta(
+        series_id, params, result, model.history,
+        cold_fit_seconds=result["fit_seconds"],
+        last_fit_seconds=result["fit_seconds"],
+        refreshes=0
+    )
+    registry.save(series_id, params, model, meta)
+    return {**{k: result[k] for k in CACHED_FIELDS}, "model_info": meta, "stage_seconds": result["stage_seconds"]}
+
+
+def refresh_model(registry: ModelRegistry, series_id: str, new_rows: pd.DataFrame, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Worker-side entry point: append new_rows to a registered series and refit, starting the
+    optimizer from the previous fit's parameters. The new rows are resampled to the granularity
+    and aggregation recorded with the model first, since its history is stored on that grid.
+    Falls back to a cold fit if the previous parameters do not fit the new model's shape (e.g.
+    a different number of changepoints).
+    """
+    loaded = registry.load(series_id, params)
+    if loaded is None:
+        raise LookupError(f"No model registered for series '{series_id}' with these parameters.")
+    previous, meta = loaded
+
+    new_rows = new_rows[['ds', 'y']].copy()
+    new_rows['ds'] = pd.to_datetime(new_rows['ds'])
+    new_rows, _ = resample_series(new_rows, params["days"], meta["granularity"], meta["aggregation"])
+    params = {**params, "granularity": meta["granularity"], "aggregation": meta["aggregation"]}
+    history = previous.history[['ds', 'y']]
+    combined = (
+        pd.concat([history, new_rows], ignore_index=True)
+        .drop_duplicates(subset='ds', keep='last')
+        .sort_values('ds', ignore_index=True)
+    )
+
+    init = warm_start_params(previous)
+    try:
+        result = generate_forecast(combined, warm_start=init, **params)
+        warm_started = True
+    except Exception as e:
+        logger.warning("Warm start failed for series %s, refitting cold: %s", series_id, e)
+        result = generate_forecast(combined, **params)
+        warm_started = False
+
+    model = result["model"]
+    fit_seconds = result["fit_seconds"]
+    cold_fit_seconds = meta["cold_fit_seconds"] if warm_started else fit_seconds
+    new_meta = _meta(
+        series_id, params, result, model.history,
+        cold_fit_seconds=cold_fit_seconds,
+        last_fit_seconds=fit_seconds,
+        refreshes=meta.get("refreshes", 0) + 1
+    )
+    registry.save(series_id, params, model, new_meta)
+
+    new_params = warm_start_params(model)
+    refresh = {
+        "rows_appended": len(combined) - len(history),
+        "warm_started": warm_started,
+        "cold_fit_seconds": cold_fit_seconds,
+        "warm_fit_seconds": fit_seconds,
+        "speedup": round(cold_fit_seconds / fit_seconds, 2) if fit_seconds > 0 else None,
+        "parameter_change": {
+            "k": round(new_params["k"] - init["k"], 6),
+            "m": round(new_params["m"] - init["m"], 6),
+            "sigma_obs": round(new_params["sigma_obs"] - init["sigma_obs"], 6),
+            "delta_l2": round(float(np.linalg.norm(np.subtract(new_params["delta"], init["delta"]))), 6)
+                if len(new_params["delta"]) == len(init["delta"]) else None
+        },
+        "metrics_before": meta["metrics"],
+        "metrics_after": result["metrics"]
+    }
+    return {
+        **{k: result[k] for k in CACHED_FIELDS},
+        "model_info": new_meta,
+        "refresh": refresh,
+        "stage_seconds": result["stage_seconds"]
+    }
+
+
+# Process-wide registry used by the /models routes
+model_registry = ModelRegistry(config.MODEL_REGISTRY_DIR)
@@ -0,0 +1,199 @@
+"""
+Pre-fit resampling.
+
+Minute-level uploads and event logs with several rows per timestamp make the fit grow with
+the row count without improving a forecast whose horizon is counted in days. resample_series()
+runs before the engine sees the data: it collapses duplicate dates and, when asked (or when
+'auto' decides it is worth it), aggregates the series to an hourly, daily or weekly grid.
+
+Rows are bucketed with integer arithmetic on the nanosecond timestamps and each bucket is
+reduced in one pass over the sorted values (np.add.reduceat), so the cost is a sort at most.
+native_forecast() maps the bucketed forecast back onto the original rows, so anomalies can
+still be reported at the upload's own resolution.
+"""
+from statistics import NormalDist
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+HOUR_NS = 3_600_000_000_000
+DAY_NS = 24 * HOUR_NS
+# Bucket width in nanoseconds; 'native' keeps the upload's timestamps
+GRANULARITY_NS = {"native": None, "hour": HOUR_NS, "day": DAY_NS, "week": 7 * DAY_NS}
+GRANULARITIES = ("auto",) + tuple(GRANULARITY_NS)
+AGGREGATIONS = ("mean", "sum", "last")
+# The Unix epoch is a Thursday; shifting by three days makes weeks start on Monday
+WEEK_OFFSET_NS = 3 * DAY_NS
+# 'auto' keeps hourly detail for horizons up to this many days and aggregates to days beyond
+AUTO_HOURLY_MAX_DAYS = 14
+# 'auto' never aggregates a series to fewer periods than this
+AUTO_MIN_PERIODS = 30
+# Band half-width in standard deviations for build_engine()'s interval_width of 0.95
+BAND_Z = NormalDist().inv_cdf(0.975)
+
+
+def timestamps(ds: pd.Series) -> np.ndarray:
+    return pd.to_datetime(ds).to_numpy().astype('datetime64[ns]').view('int64')
+
+
+def native_step(ns: np.ndarray) -> Optional[int]:
+    """
+    Typical spacing of the distinct timestamps (median gap, in nanoseconds), or None for
+    fewer than two distinct timestamps.
+    """
+    distinct = np.unique(ns)
+    if len(distinct) < 2:
+        return None
+    return int(np.median(np.diff(distinct)))
+
+
+def resolve_granularity(ns: np.ndarray, days: int, granularity: str = "auto") -> str:
+    """
+    The granularity resample_series() uses. An explicit one is returned as is; 'auto' keeps
+    daily or coarser data as it is, and aggregates sub-daily data to hours for horizons up to
+    AUTO_HOURLY_MAX_DAYS days and to days beyond, as long as AUTO_MIN_PERIODS periods remain.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}.")
+    if granularity != "auto":
+        return granularity
+
+    step = native_step(ns)
+    if step is None or step >= DAY_NS:
+        return "native"
+    span = int(ns.max() - ns.min())
+    candidates = ["hour"] if days <= AUTO_HOURLY_MAX_DAYS else ["day", "hour"]
+    for candidate in candidates:
+        width = GRANULARITY_NS[candidate]
+        if step < width and span // width + 1 >= AUTO_MIN_PERIODS:
+            return candidate
+    return "native"
+
+
+def bucket_keys(ns: np.ndarray, granularity: str) -> np.ndarray:
+    """
+    Start of each timestamp's bucket, in nanoseconds.
+    """
+    width = GRANULARITY_NS[granularity]
+    if width is None:
+        return ns
+    offset = WEEK_OFFSET_NS if granularity == "week" else 0
+    return (ns + offset) // width * width - offset
+
+
+def _step_label(step_ns: Optional[int]) -> Optional[str]:
+    if step_ns is None:
+        return None
+    return pd.tseries.frequencies.to_offset(pd.Timedelta(step_ns, unit='ns')).freqstr
+
+
+def resample_series(
+    df: pd.DataFrame,
+    days: int,
+    granularity: str = "auto",
+    aggregation: str = "mean"
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Collapse duplicate dates of a 'ds'/'y' frame and aggregate it to granularity (see
+    resolve_granularity) with 'mean', 'sum' or 'last'. With 'sum', empty buckets of a coarser
+    grid are filled with 0 (nothing happened in them); otherwise they stay missing, which the
+    engines handle. Returns the frame to fit and a summary for the response. A frame that
+    needs no change is returned as is.
+    """
+    if aggregation not in AGGREGATIONS:
+        raise ValueError(f"aggregation must be one of {', '.join(AGGREGATIONS)}.")
+    ns = timestamps(df['ds'])
+    resolved = resolve_granularity(ns, days, granularity)
+    step = native_step(ns)
+    info = {
+        "granularity": resolved,
+        "aggregation": aggregation,
+        "native_frequency": _step_label(step),
+        "input_rows": len(df),
+        "rows": len(df),
+        "duplicates_collapsed": 0,
+        "missing_periods": 0,
+        "filled_periods": 0,
+        "largest_gap": None,
+        "anomaly_resolution": "native"
+    }
+    if len(df) == 0:
+        return df, info
+
+    order = None if (len(ns) < 2 or (ns[1:] >= ns[:-1]).all()) else np.argsort(ns, kind='stable')
+    if order is not None:
+        ns = ns[order]
+    keys = bucket_keys(ns, resolved)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    bucket_starts = keys[starts]
+    if resolved == "native":
+        info["duplicates_collapsed"] = len(ns) - len(starts)
+
+    width = GRANULARITY_NS[resolved] or step
+    if width and len(bucket_starts) > 1:
+        gaps = np.diff(bucket_starts)
+        info["missing_periods"] = int(np.maximum(gaps // width - 1, 0).sum())
+        info["largest_gap"] = str(pd.Timedelta(int(gaps.max()), unit='ns'))
+
+    if len(starts) == len(ns) and resolved == "native":
+        return df, info
+
+    y = df['y'].to_numpy(dtype='float64')
+    if order is not None:
+        y = y[order]
+    if aggregation == "last":
+        values = y[np.r_[starts[1:], len(y)] - 1]
+    else:
+        values = np.add.reduceat(y, starts)
+        if aggregation == "mean":
+            values = values / np.diff(np.r_[starts, len(y)])
+
+    if aggregation == "sum" and resolved != "native" and info["missing_periods"]:
+        grid = np.arange(bucket_starts[0], bucket_starts[-1] + 1, width, dtype=np.int64)
+        filled = np.zeros(len(grid))
+        filled[np.searchsorted(grid, bucket_starts)] = values
+        bucket_starts, values = grid, filled
+        info["filled_periods"] = info["missing_periods"]
+
+    info["rows"] = len(bucket_starts)
+    # Summed buckets are not comparable to single rows, so their anomalies stay per bucket
+    if aggregation == "sum":
+        info["anomaly_resolution"] = resolved
+    resampled = pd.DataFrame({'ds': bucket_starts.view('datetime64[ns]'), 'y': values})
+    return resampled, info
+
+
+def native_forecast(forecast: pd.DataFrame, original: pd.DataFrame, granularity: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    The original rows (sorted by date) and, row for row, the forecast of the bucket each falls
+    in, so a detector compares every uploaded value with its bucket's prediction. The bucket's
+    band is for the bucket mean; single rows also scatter around that mean, so the band is
+    widened by the rows' spread within their buckets.
+    """
+    ns = timestamps(original['ds'])
+    order = np.argsort(ns, kind='stable')
+    ns = ns[order]
+    y = original['y'].to_numpy(dtype='float64')[order]
+    actuals = pd.DataFrame({'ds': ns.view('datetime64[ns]'), 'y': y})
+
+    keys = bucket_keys(ns, granularity)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    counts = np.diff(np.r_[starts, len(y)])
+    bucket_means = np.add.reduceat(y, starts) / counts
+    within_sd = float(np.std(y - np.repeat(bucket_means, counts))) if len(y) > 1 else 0.0
+
+    f_ns = timestamps(forecast['ds'])
+    pos = np.minimum(np.searchsorted(f_ns, keys), len(f_ns) - 1)
+    yhat = forecast['yhat'].to_numpy(dtype='float64')[pos]
+    lower = forecast['yhat_lower'].to_numpy(dtype='float64')[pos]
+    upper = forecast['yhat_upper'].to_numpy(dtype='float64')[pos]
+    # Independent errors: the half-widths add in quadrature
+    extra = (BAND_Z * within_sd) ** 2
+    expanded = pd.DataFrame({
+        'ds': actuals['ds'].to_numpy(),
+        'yhat': yhat,
+        'yhat_lower': yhat - np.sqrt((yhat - lower) ** 2 + extra),
+        'yhat_upper': yhat + np.sqrt((upper - yhat) ** 2 + extra)
+    })
+    return expanded, actuals
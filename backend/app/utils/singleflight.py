@@ -0,0 +1,68 @@
+"""
+Single-flight coalescing of identical concurrent work.
+
+When a dashboard refresh sends the same file with the same parameters from dozens of tabs at
+once, every request misses the result cache together and would start its own fit. A
+SingleFlight runs the first request's computation as a task of its own and attaches every
+identical request that arrives while it is running to that task, so N requests cost one fit.
+
+Callers wait on the task through asyncio.shield: a client that disconnects cancels only its
+own wait, never the shared work, which runs to completion (and fills the cache) as long as
+the event loop is alive.
+"""
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """
+    In-flight computations by key, for one process. Counts leaders (requests that started a
+    computation) and followers (requests that joined one).
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._lock = threading.Lock()
+        self._counters = {"leaders": 0, "followers": 0, "failures": 0}
+
+    def _finished(self, key: str, task: asyncio.Task) -> None:
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        if not task.cancelled() and task.exception() is not None:
+            # Retrieved here so a computation whose callers all left doesn't log it as unhandled
+            with self._lock:
+                self._counters["failures"] += 1
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        The result of fn(), shared with every concurrent run() call for the same key.
+        Exceptions are raised to every caller.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            task = self._tasks.get(key)
+            # A task left over from another event loop (e.g. a test client's) can't be awaited here
+            if task is None or task.done() or task.get_loop() is not loop:
+                task = loop.create_task(fn())
+                task.add_done_callback(lambda t: self._finished(key, t))
+                self._tasks[key] = task
+                self._counters["leaders"] += 1
+            else:
+                self._counters["followers"] += 1
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self._counters["leaders"] + self._counters["followers"]
+            return {
+                **self._counters,
+                "in_flight": len(self._tasks),
+                # Share of requests that were answered by another request's computation
+                "coalescing_ratio": round(self._counters["followers"] / requests, 4) if requests else 0.0
+            }
+
+
+# Process-wide group used by the forecast routes (keyed by cache.make_cache_key)
+forecast_flights = SingleFlight()
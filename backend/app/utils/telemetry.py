@@ -0,0 +1,340 @@
+"""
+Request and pipeline telemetry: stage timing spans, Prometheus-style counters, gauges and
+histograms, and the Server-Timing header.
+
+Stages that run in the parent process are timed with span(). Stages that run in a pool
+worker are timed into a plain dict with stage_timer(); the worker returns that dict with
+its result, and the parent passes it to record_stages(). Every stage is then recorded once,
+in the process that serves /metrics, whichever executor ran it.
+
+Recording a value costs one lock and a few additions. Cache and executor counters
+already exist on those objects, so /metrics reads them when it renders instead of
+counting them again.
+"""
+import bisect
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Pipeline stages, in the order the Server-Timing header lists them
+STAGES = (
+    "upload_read", "parse", "normalize", "resample", "fit", "predict", "anomalies", "metrics",
+    "insights", "downsample", "serialize", "pdf"
+)
+# Upper bounds in seconds. They run from a CSV parse (milliseconds) to a long Stan fit (minutes).
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """
+    Monotonic count, one series per label set.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[Labels, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_labels(labels), 0)
+
+    def samples(self) -> Iterator[Tuple[str, Labels, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            yield self.name, labels, value
+
+
+class Gauge(Counter):
+    """
+    Value that can go down as well as up (e.g. requests in flight).
+    """
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """
+    Distribution of observed values in fixed buckets, plus their count and sum.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts (last one is +Inf), count, sum]
+        self._values: Dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _labels(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            series = self._values.get(_labels(labels))
+            return series[1] if series else 0
+
+    def samples(self) -> Iterator[Tuple[str, Labels, float]]:
+        with self._lock:
+            items = [(labels, list(s[0]), s[1], s[2]) for labels, s in self._values.items()]
+        for labels, counts, count, total in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                yield f"{self.name}_bucket", labels + (("le", _format_value(bound)),), cumulative
+            yield f"{self.name}_count", labels, count
+            yield f"{self.name}_sum", labels, total
+
+
+class MetricsRegistry:
+    """
+    The metrics of this process, rendered in the Prometheus text exposition format.
+    Collectors are called at render time for values kept elsewhere (cache, pool and job
+    counters); each returns (name, kind, help, [(labels dict, value), ...]) tuples.
+    """
+
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, list]]]] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], Iterable[Tuple[str, str, str, list]]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for collector in self._collectors:
+            for name, kind, help_text, values in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in values:
+                    lines.append(f"{name}{_format_labels(_labels(labels))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+stage_seconds = registry.register(Histogram(
+    "forecast_stage_seconds", "Time spent in each pipeline stage."
+))
+stage_failures = registry.register(Counter(
+    "forecast_stage_failures_total", "Pipeline stages that raised."
+))
+rows_processed = registry.register(Counter(
+    "forecast_rows_processed_total", "Normalized input rows, by route."
+))
+request_seconds = registry.register(Histogram(
+    "http_request_duration_seconds", "Time to the first response byte, by route."
+))
+requests_total = registry.register(Counter(
+    "http_requests_total", "Finished HTTP requests, by route, method and status code."
+))
+requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests being handled."
+))
+jobs_finished = registry.register(Counter(
+    "forecast_jobs_finished_total", "Forecast jobs that reached a final state, by status."
+))
+report_failures = registry.register(Counter(
+    "forecast_report_failures_total", "/report requests that failed, by reason (invalid_input or error)."
+))
+
+# Spans of the request being handled: a list of (stage, seconds), or None outside a request
+_request_spans: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_spans", default=None
+)
+
+
+def _record(stage: str, seconds: float) -> None:
+    stage_seconds.observe(seconds, stage=stage)
+    spans = _request_spans.get()
+    if spans is not None:
+        spans.append((stage, seconds))
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """
+    Time a block as one pipeline stage of the current request.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        stage_failures.inc(stage=stage)
+        raise
+    finally:
+        _record(stage, time.perf_counter() - started)
+
+
+@contextmanager
+def stage_timer(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    """
+    Worker-side span: add the block's duration to timings[stage] for the parent to record.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - started
+
+
+def record_stages(timings: Optional[Dict[str, float]]) -> None:
+    """
+    Record the stage timings a worker returned (see stage_timer).
+    """
+    for stage, seconds in (timings or {}).items():
+        _record(stage, seconds)
+
+
+def server_timing(spans: List[Tuple[str, float]], total: float) -> str:
+    """
+    Server-Timing header value. Repeated stages (e.g. one fit per series) are summed.
+    """
+    totals: Dict[str, float] = {}
+    for stage, seconds in spans:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    order = sorted(totals, key=lambda s: STAGES.index(s) if s in STAGES else len(STAGES))
+    entries = [f"{stage};dur={1000 * totals[stage]:.1f}" for stage in order]
+    entries.append(f"total;dur={1000 * total:.1f}")
+    return ", ".join(entries)
+
+
+class TelemetryMiddleware:
+    """
+    ASGI middleware that times every HTTP request, counts it by route and status, and adds
+    a Server-Timing header listing the stages the request ran.
+    """
+
+    def __init__(self, app, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        spans: List[Tuple[str, float]] = []
+        token = _request_spans.set(spans)
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                total = time.perf_counter() - started
+                status["code"] = message["status"]
+                request_seconds.observe(total, route=_route(scope))
+                if self.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(spans, total).encode("latin-1")))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            requests_in_flight.dec()
+            requests_total.inc(route=_route(scope), method=scope["method"], status=status["code"])
+            _request_spans.reset(token)
+
+
+def _route(scope) -> str:
+    # The route template (e.g. /jobs/{job_id}), so ids in paths don't create new series
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def _cache_collector() -> Iterator[Tuple[str, str, str, list]]:
+    from app.utils.cache import fold_cache, forecast_cache, model_cache
+
+    caches = {"forecast": forecast_cache, "model": model_cache, "fold": fold_cache}
+    stats = {name: cache.stats() for name, cache in caches.items()}
+    for counter in ("hits", "misses", "evictions"):
+        yield (
+            f"forecast_cache_{counter}_total", "counter", f"Cache {counter}, by cache.",
+            [({"cache": name}, s[counter]) for name, s in stats.items()]
+        )
+    yield (
+        "forecast_cache_entries", "gauge", "Entries held in memory, by cache.",
+        [({"cache": name}, s["entries"]) for name, s in stats.items()]
+    )
+
+
+def _executor_collector() -> Iterator[Tuple[str, str, str, list]]:
+    from app.utils.executor import forecast_executor
+
+    stats = forecast_executor.stats()
+    yield (
+        "forecast_executor_tasks_total", "counter", "Pool tasks, by outcome.",
+        [({"outcome": k}, stats[k]) for k in ("completed", "failed", "rejected", "timed_out")]
+    )
+    yield ("forecast_executor_in_flight", "gauge", "Pool tasks running or queued.", [({}, stats["in_flight"])])
+
+
+def _singleflight_collector() -> Iterator[Tuple[str, str, str, list]]:
+    from app.utils.singleflight import forecast_flights
+
+    stats = forecast_flights.stats()
+    yield (
+        "forecast_coalesced_requests_total", "counter",
+        "Forecast cache misses, by whether they started a computation (leader) or joined one in flight (follower).",
+        [({"role": "leader"}, stats["leaders"]), ({"role": "follower"}, stats["followers"])]
+    )
+    yield ("forecast_coalesced_in_flight", "gauge", "Shared forecast computations running.", [({}, stats["in_flight"])])
+
+
+registry.add_collector(_cache_collector)
+registry.add_collector(_executor_collector)
+registry.add_collector(_singleflight_collector)
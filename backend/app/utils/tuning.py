@@ -0,0 +1,233 @@
+import inspect
+import itertools
+import math
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app import config
+from app.utils.backtesting import FOLD_PARAMS, fit_fold, fold_key, make_cutoffs, prepare_series
+from app.utils.cache import ForecastCache
+from app.utils.executor import ForecastExecutor
+from app.utils.forecasting import build_engine, calculate_metrics
+
+TUNABLE_PARAMS = FOLD_PARAMS
+METRICS = ("RMSE", "MAE", "MAPE")
+
+# Settings not in the search space keep generate_forecast()'s defaults
+_defaults = inspect.signature(build_engine).parameters
+TUNING_DEFAULTS = {k: _defaults[k].default for k in TUNABLE_PARAMS}
+
+
+class SharedFrame:
+    """
+    A 'ds'/'y' frame copied once into shared memory, so pool workers attach to it by name
+    instead of receiving a pickled copy with every task. Use as a context manager; the
+    block is unlinked on exit.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        ds = df['ds'].to_numpy(dtype='datetime64[ns]').view('int64')
+        y = df['y'].to_numpy(dtype='float64')
+        self.rows = len(df)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(16 * self.rows, 1))
+        np.ndarray(self.rows, dtype='int64', buffer=self._shm.buf)[:] = ds
+        np.ndarray(self.rows, dtype='float64', buffer=self._shm.buf, offset=8 * self.rows)[:] = y
+
+    @property
+    def spec(self) -> Dict[str, Any]:
+        return {"name": self._shm.name, "rows": self.rows}
+
+    def close(self) -> None:
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach_frame(spec: Dict[str, Any], end: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+    """
+    Worker-side: the rows of a SharedFrame up to `end` (all of them by default), copied out
+    of the shared block. The worker's mapping is closed before returning, so no worker keeps
+    the block alive after the parent unlinks it.
+    """
+    shm = shared_memory.SharedMemory(name=spec["name"])
+    rows = spec["rows"]
+    ds = np.ndarray(rows, dtype='int64', buffer=shm.buf)
+    y = np.ndarray(rows, dtype='float64', buffer=shm.buf, offset=8 * rows)
+    try:
+        # SharedFrame holds a sorted series, so the window is a prefix
+        n = rows if end is None else int(np.searchsorted(ds, pd.Timestamp(end).value, side='right'))
+        return pd.DataFrame({'ds': ds[:n].view('datetime64[ns]').copy(), 'y': y[:n].copy()})
+    finally:
+        # close() refuses while arrays still point into the buffer
+        del ds, y
+        shm.close()
+
+
+def evaluate_fold(
+    spec: Dict[str, Any],
+    task: Tuple[int, int],
+    cutoff: pd.Timestamp,
+    horizon: int,
+    params: Dict[str, Any]
+) -> Tuple[Tuple[int, int], Dict[str, Any]]:
+    """
+    Worker-side entry point: fit one candidate on one fold of the shared series.
+    Failures are returned rather than raised so one bad candidate does not stop the search.
+    """
+    df = attach_frame(spec, cutoff + pd.Timedelta(days=horizon))
+    train = df[df['ds'] <= cutoff]
+    test_ds = df['ds'][df['ds'] > cutoff].to_numpy()
+    try:
+        return task, fit_fold(train, test_ds, horizon, params)
+    except Exception as e:
+        return task, {"error": str(e)}
+
+
+def expand_space(space: Dict[str, List[Any]], max_candidates: int = config.TUNING_MAX_CANDIDATES) -> List[Dict[str, Any]]:
+    """
+    Every combination of the search space, each completed with the default settings.
+    """
+    if not isinstance(space, dict) or not space:
+        raise ValueError("space must be a non-empty object mapping parameter names to lists of values.")
+    unknown = set(space) - set(TUNABLE_PARAMS)
+    if unknown:
+        raise ValueError(f"Cannot tune {', '.join(sorted(unknown))}; tunable parameters are {', '.join(TUNABLE_PARAMS)}.")
+    for name, values in space.items():
+        if not isinstance(values, list) or not values:
+            raise ValueError(f"space['{name}'] must be a non-empty list.")
+
+    names = list(space)
+    count = math.prod(len(space[n]) for n in names)
+    if count > max_candidates:
+        raise ValueError(f"The search space has {count} candidates; the limit is {max_candidates}.")
+    return [{**TUNING_DEFAULTS, **dict(zip(names, values))} for values in itertools.product(*(space[n] for n in names))]
+
+
+def _score(y: np.ndarray, yhat: np.ndarray, metric: str) -> Tuple[float, Dict[str, float]]:
+    metrics = calculate_metrics(y, yhat)
+    return float(metrics[metric]), metrics
+
+
+async def run_tuning(
+    df: pd.DataFrame,
+    space: Dict[str, List[Any]],
+    executor: ForecastExecutor,
+    cache: Optional[ForecastCache] = None,
+    horizon: int = 30,
+    initial: Optional[int] = None,
+    step: Optional[int] = None,
+    metric: str = 'RMSE',
+    eta: int = 3
+) -> Dict[str, Any]:
+    """
+    Successive-halving search over the space. Rung 0 scores every candidate on the latest
+    backtest fold; each later rung keeps the best 1/eta of the candidates and scores them on
+    eta times as many folds, until the survivors have seen every fold. Fold fits run in
+    parallel on the executor against one shared copy of the series, resampled with the default
+    granularity and aggregation, and are shared with /backtest through the fold cache.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"metric must be one of {', '.join(METRICS)}.")
+    if eta < 2:
+        raise ValueError("eta must be at least 2.")
+    candidates = expand_space(space)
+    df, resampling = prepare_series(df, horizon)
+    initial = 3 * horizon if initial is None else initial
+    step = max(horizon // 2, 1) if step is None else step
+    cutoffs = make_cutoffs(df['ds'], horizon, initial, step)
+
+    ds = df['ds']
+    windows = [df[ds <= cutoff + pd.Timedelta(days=horizon)] for cutoff in cutoffs]
+    holdouts = [window[window['ds'] > cutoff] for window, cutoff in zip(windows, cutoffs)]
+
+    results: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    fitted = cached = 0
+    fit_seconds = 0.0
+    started = time.perf_counter()
+    board = [{"candidate": i, "rung": 0, "status": "pruned"} for i in range(len(candidates))]
+    alive = list(range(len(candidates)))
+    rung = 0
+
+    with SharedFrame(df) as shared:
+        while True:
+            # A lone survivor goes straight to the full budget
+            n_folds = len(cutoffs) if len(alive) == 1 else min(len(cutoffs), eta ** rung)
+            folds = range(len(cutoffs) - n_folds, len(cutoffs))
+
+            to_fit = []
+            for c in alive:
+                for f in folds:
+                    if (c, f) in results:
+                        continue
+                    hit = cache.get(fold_key(windows[f], cutoffs[f], horizon, candidates[c], resampling)) if cache is not None else None
+                    if hit is not None:
+                        results[(c, f)] = hit
+                        cached += 1
+                    else:
+                        to_fit.append((c, f))
+
+            tasks = ((shared.spec, (c, f), cutoffs[f], horizon, candidates[c]) for c, f in to_fit)
+            async for (c, f), result in executor.imap_unordered(evaluate_fold, tasks):
+                results[(c, f)] = result
+                fitted += 1
+                fit_seconds += result.get("fit_seconds", 0.0)
+                if cache is not None and "error" not in result:
+                    cache.set(fold_key(windows[f], cutoffs[f], horizon, candidates[c], resampling), result)
+
+            for c in alive:
+                entry = board[c]
+                entry.update(rung=rung, folds=n_folds)
+                errors = [results[(c, f)]["error"] for f in folds if "error" in results[(c, f)]]
+                if errors:
+                    entry.update(status="failed", error=errors[0], score=None)
+                    continue
+                y = np.concatenate([holdouts[f]['y'].to_numpy(dtype='float64') for f in folds])
+                yhat = np.concatenate([results[(c, f)]["yhat"] for f in folds])
+                entry["score"], entry["metrics"] = _score(y, yhat, metric)
+
+            scored = sorted((c for c in alive if board[c]["status"] != "failed"), key=lambda c: board[c]["score"])
+            if n_folds == len(cutoffs) or not scored:
+                for c in scored:
+                    board[c]["status"] = "finished"
+                break
+            alive = scored[:max(1, math.ceil(len(scored) / eta))]
+            rung += 1
+
+    wall_seconds = time.perf_counter() - started
+    tuned = list(space)
+    leaderboard = sorted(
+        board,
+        key=lambda e: (e["status"] != "finished", -e["rung"], e.get("score") is None, e.get("score") or 0.0)
+    )
+    for rank, entry in enumerate(leaderboard, start=1):
+        candidate = candidates[entry.pop("candidate")]
+        entry["rank"] = rank
+        entry["parameters"] = {k: candidate[k] for k in tuned}
+
+    best = leaderboard[0] if leaderboard and leaderboard[0]["status"] == "finished" else None
+    return {
+        "metric": metric,
+        "best": {**TUNING_DEFAULTS, **best["parameters"]} if best else None,
+        "best_score": best["score"] if best else None,
+        "candidate_count": len(candidates),
+        "resampling": resampling,
+        "fold_count": len(cutoffs),
+        "leaderboard": leaderboard,
+        "timing": {
+            "wall_seconds": round(wall_seconds, 4),
+            "fold_fits": fitted,
+            "fold_fits_cached": cached,
+            # Fits successive halving skipped compared with scoring every candidate on every fold
+            "fold_fits_pruned": len(candidates) * len(cutoffs) - fitted - cached,
+            "serial_fit_seconds": round(fit_seconds, 4)
+        }
+    }
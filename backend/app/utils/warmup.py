@@ -0,0 +1,96 @@
+"""
+Replica warm-up. Prophet, Stan and reportlab are imported lazily so the server starts fast;
+warm_up_worker() pays for them ahead of the first request by importing them and running a
+tiny fit in every pool worker, and Warmup tracks whether that (and loading Prophet in the
+server process) has finished for /readyz.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# A short, clean series: enough for Prophet to run its Stan optimizer end to end
+WARMUP_DAYS = 60
+
+
+def warm_up_worker() -> None:
+    """
+    Pool initializer (runs once in every worker process, including recycled ones): load the
+    forecasting and PDF libraries and run one small fit so Stan is initialized before real work.
+    Failures are logged, not raised; the worker still serves requests, just cold.
+    """
+    try:
+        import numpy as np
+        import pandas as pd
+        from app.utils.engines import ProphetEngine
+        import app.utils.forecasting  # noqa: F401
+        import app.utils.reporting  # noqa: F401 (loads reportlab)
+
+        ds = pd.date_range("2020-01-01", periods=WARMUP_DAYS, freq="D")
+        y = 10 + np.sin(2 * np.pi * np.arange(WARMUP_DAYS) / 7)
+        engine = ProphetEngine(interval={"mode": "point"}, yearly_seasonality=False, daily_seasonality=False)
+        engine.fit(pd.DataFrame({'ds': ds, 'y': y}))
+        engine.predict(7)
+    except Exception:
+        logger.exception("Worker warm-up failed; the worker will serve requests cold")
+
+
+def load_server_libraries() -> None:
+    """
+    Import Prophet in the server process too: fitted engines come back from the workers
+    pickled, and unpickling the first one would otherwise import Prophet mid-request.
+    """
+    import prophet.forecaster  # noqa: F401
+
+
+def warm_up_check() -> bool:
+    """
+    Task run once per worker slot at startup; by the time it runs, the worker's initializer has finished.
+    """
+    return True
+
+
+class Warmup:
+    """
+    Readiness of this replica: not ready until every pool worker has been started and warmed.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.error: Optional[str] = None
+        self.seconds: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, executor) -> None:
+        """
+        Warm the executor's workers in the background, so /healthz answers while it runs.
+        """
+        self._task = asyncio.ensure_future(self.run(executor))
+
+    async def run(self, executor) -> None:
+        started = time.perf_counter()
+        try:
+            # One task per worker, submitted together, so the pool starts every worker now.
+            # Each one runs warm_up_worker() before taking its task.
+            await asyncio.gather(
+                asyncio.to_thread(load_server_libraries),
+                *(executor.run(warm_up_check) for _ in range(max(executor.max_workers, 1)))
+            )
+            self.ready = True
+        except Exception as e:
+            self.error = str(e)
+            logger.exception("Replica warm-up failed")
+        finally:
+            self.seconds = round(time.perf_counter() - started, 3)
+
+    def mark_ready(self) -> None:
+        self.ready = True
+
+    def stats(self) -> Dict[str, Any]:
+        return {"ready": self.ready, "warmup_seconds": self.seconds, "error": self.error}
+
+
+# Process-wide state behind /readyz
+warmup = Warmup()
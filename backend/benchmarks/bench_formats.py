@@ -0,0 +1,113 @@
+"""
+Compare upload parsing across file formats on the same data: the time and peak traced memory
+to turn an upload into a normalized 'ds'/'y' frame from CSV (whole-file and streaming parsers),
+Parquet and Arrow IPC. Each file is a wide export: the series plus a few columns the forecast
+never reads, so the columnar readers' projection pushdown has something to skip.
+
+Parquet and Arrow need pyarrow; without it only the CSV paths run. Peak memory is what
+tracemalloc sees, which includes NumPy and pandas buffers but not Arrow's own memory pool.
+
+Usage (from backend/):
+    python -m benchmarks.bench_formats --sizes 10000 100000 1000000 --output formats.json
+"""
+import argparse
+import io
+import json
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_stages import environment, measure
+from benchmarks.datasets import synthetic_series, to_csv_bytes
+
+FORMATS = ("csv", "csv_streaming", "parquet", "arrow")
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def wide_export(rows: int) -> pd.DataFrame:
+    """
+    An hourly series with the extra columns a data-lake export typically carries.
+    """
+    series = synthetic_series(rows, "hourly")
+    rng = np.random.default_rng(rows)
+    return pd.DataFrame({
+        "store": np.where(np.arange(rows) % 2, "north", "south"),
+        "date": series["ds"],
+        "sku": rng.integers(0, 5000, rows),
+        "sales": series["y"],
+        "price": rng.uniform(1, 100, rows).round(2),
+        "channel": np.where(np.arange(rows) % 3, "online", "retail"),
+        "notes": np.where(np.arange(rows) % 50, "", "promotion week")
+    })
+
+
+def encode(frame: pd.DataFrame, file_format: str) -> bytes:
+    if file_format.startswith("csv"):
+        return to_csv_bytes(frame)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = io.BytesIO()
+    if file_format == "parquet":
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue()
+
+
+def parse_function(file_format: str, contents: bytes) -> Callable[[], pd.DataFrame]:
+    """
+    The path each format takes through the upload routes (see routes.common.parse_upload).
+    """
+    from app.utils.forecasting import normalize_columns, read_csv_bytes
+    from app.utils.ingestion import read_columnar, read_series_csv, series_columns
+
+    if file_format == "csv":
+        return lambda: normalize_columns(read_csv_bytes(contents))
+    if file_format == "csv_streaming":
+        return lambda: read_series_csv(io.BytesIO(contents))
+    return lambda: normalize_columns(read_columnar(io.BytesIO(contents), file_format, series_columns))
+
+
+def available_formats() -> List[str]:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return [f for f in FORMATS if f.startswith("csv")]
+    return list(FORMATS)
+
+
+def run(sizes: List[int], formats: List[str], repeats: int = 3, memory: bool = True) -> List[Dict[str, Any]]:
+    results = []
+    for rows in sizes:
+        frame = wide_export(rows)
+        for file_format in formats:
+            contents = encode(frame, file_format)
+            record = {"rows": rows, "format": file_format, "file_mb": round(len(contents) / 1024 / 1024, 2)}
+            record.update(measure(parse_function(file_format, contents), repeats, memory))
+            results.append(record)
+            print(
+                f"{rows:>9} rows  {file_format:<14} {record['file_mb']:>8.1f} MB file {1000 * record['seconds']:>10.1f} ms"
+                + (f"  {record['peak_mb']:>8.1f} MB peak" if memory else ""),
+                flush=True
+            )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=None)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    formats = args.formats or available_formats()
+    results = run(args.sizes, formats, args.repeats, memory=not args.no_memory)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
@@ -0,0 +1,79 @@
+"""
+Predict latency and peak memory of each interval mode against series length.
+
+Usage (from backend/):
+    python -m benchmarks.bench_intervals --sizes 365 1825 7300 --days 30
+"""
+import argparse
+import json
+import logging
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from app.utils.intervals import INTERVAL_MODES, apply_intervals
+
+
+def synthetic_series(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    y = 100 + 0.05 * t + 10 * np.sin(2 * np.pi * t / 7) + 5 * np.sin(2 * np.pi * t / 365.25) + rng.normal(0, 2, n)
+    return pd.DataFrame({'ds': pd.date_range('2000-01-01', periods=n, freq='D'), 'y': y})
+
+
+def predict(m, df, future, mode, samples):
+    m.uncertainty_samples = samples if mode == 'full' else 0
+    forecast = m.predict(future)
+    if mode != 'full':
+        forecast, _ = apply_intervals(m, forecast, df, {"mode": mode, "samples": samples, "seed": 0})
+    return forecast
+
+
+def run(sizes, days, samples, repeats):
+    from prophet import Prophet
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+
+    rows = []
+    for n in sizes:
+        df = synthetic_series(n)
+        m = Prophet(interval_width=0.95, uncertainty_samples=samples)
+        m.fit(df)
+        future = m.make_future_dataframe(periods=days)
+
+        for mode in INTERVAL_MODES:
+            timings = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                predict(m, df, future, mode, samples)
+                timings.append(time.perf_counter() - started)
+
+            tracemalloc.start()
+            predict(m, df, future, mode, samples)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            rows.append({
+                "rows": n,
+                "mode": mode,
+                "predict_ms": round(1000 * min(timings), 1),
+                "peak_mb": round(peak / 1024 / 1024, 1)
+            })
+            print(f"{n:>8} rows  {mode:<6} {rows[-1]['predict_ms']:>9.1f} ms  {rows[-1]['peak_mb']:>7.1f} MB")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[365, 1825, 7300])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--samples", type=int, default=300)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.days, args.samples, args.repeats)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,84 @@
+"""
+Compare the /forecast response formats on the same forecast: the time to encode the body
+(for 'records', FastAPI's jsonable_encoder plus JSONResponse, as the route does) and the
+size of the body, raw and gzipped.
+
+Usage (from backend/):
+    python -m benchmarks.bench_responses --sizes 1000 100000 1000000 --output responses.json
+"""
+import argparse
+import gzip
+import json
+from typing import Any, Callable, Dict, List
+
+from benchmarks.bench_stages import environment, measure
+from benchmarks.datasets import synthetic_forecast, synthetic_series
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def payload(rows: int, days: int = 30) -> Dict[str, Any]:
+    from app.utils.anomalies import detect_anomalies
+
+    history = synthetic_series(rows, "hourly")
+    forecast = synthetic_forecast(rows, "hourly", days)
+    return {
+        "message": f"Analysis complete. Forecasted {days} days.",
+        "row_count": rows,
+        "metrics": {"MAE": 1.6, "RMSE": 2.0, "MAPE": 1.5},
+        "anomalies": detect_anomalies(forecast, history),
+        "insights": [],
+        "recommendations": [],
+        "data": forecast
+    }
+
+
+def encoders(body: Dict[str, Any]) -> Dict[str, Callable[[], bytes]]:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from app.utils.encoding import RESPONSE_FORMATS, encode_body, records
+
+    functions = {"records": lambda: JSONResponse(jsonable_encoder(records(body))).body}
+    for name in RESPONSE_FORMATS:
+        if name != "records":
+            functions[name] = lambda name=name: encode_body(body, name)
+    return functions
+
+
+def run(sizes: List[int], formats: List[str], repeats: int = 3) -> List[Dict[str, Any]]:
+    results = []
+    for rows in sizes:
+        body = payload(rows)
+        functions = encoders(body)
+        for name in formats:
+            encoded = functions[name]()
+            record = {
+                "rows": rows,
+                "format": name,
+                "bytes": len(encoded),
+                "gzip_bytes": len(gzip.compress(encoded, compresslevel=6))
+            }
+            record.update(measure(functions[name], repeats, memory=False))
+            results.append(record)
+            print(
+                f"{rows:>9} rows  {name:<9} {1000 * record['seconds']:>10.1f} ms"
+                f"  {record['bytes'] / 1024 / 1024:>8.2f} MB  {record['gzip_bytes'] / 1024 / 1024:>8.2f} MB gzipped",
+                flush=True
+            )
+    return results
+
+
+if __name__ == "__main__":
+    from app.utils.encoding import RESPONSE_FORMATS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--formats", nargs="+", choices=list(RESPONSE_FORMATS), default=list(RESPONSE_FORMATS))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.formats, args.repeats)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
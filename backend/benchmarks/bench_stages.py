@@ -0,0 +1,242 @@
+"""
+Time each stage of the forecast pipeline, and the /forecast route end to end, on
+synthetic series of several frequencies and sizes. Records the best-of-N wall time
+and the peak traced memory of every stage, writes them as JSON, and compares them
+with a stored baseline.
+
+Stages: parse, normalize, fit, predict, anomalies, insights, serialize, pdf, end_to_end.
+fit, predict and end_to_end only run up to --max-fit-rows, and pdf up to --max-pdf-rows.
+end_to_end fits in the worker pool, so its peak memory covers the server process only.
+The post-fit stages use a forecast built from the true signal, so they can be timed at
+sizes no model could be fitted on.
+
+Usage (from backend/):
+    python -m benchmarks.bench_stages --output results.json
+    python -m benchmarks.bench_stages --baseline benchmarks/baseline.json --threshold 0.25
+    python -m benchmarks.bench_stages --sizes 100 1000 --save-baseline benchmarks/baseline.json
+
+Exits with status 1 if any stage is slower than baseline * (1 + threshold).
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.datasets import FREQUENCIES, MAX_ROWS, synthetic_forecast, synthetic_series, to_csv_bytes
+
+STAGES = ("parse", "normalize", "fit", "predict", "anomalies", "insights", "serialize", "pdf", "end_to_end")
+FIT_STAGES = ("fit", "predict", "end_to_end")
+DEFAULT_SIZES = [100, 1_000, 10_000, 100_000, 1_000_000]
+# Differences below this are timer noise, never a regression
+MIN_SECONDS = 0.005
+
+
+def measure(fn: Callable[[], Any], repeats: int, memory: bool) -> Dict[str, Any]:
+    """
+    Best wall time over `repeats` calls, then one more call under tracemalloc for peak memory.
+    """
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    result = {"seconds": round(min(timings), 6)}
+    if memory:
+        tracemalloc.start()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result["peak_mb"] = round(peak / 1024 / 1024, 2)
+    return result
+
+
+def stage_functions(frequency: str, rows: int, days: int, engine: str) -> Dict[str, Callable[[], Any]]:
+    """
+    One zero-argument callable per stage, each working on its own prepared inputs.
+    """
+    from app.routes.common import forecast_payload
+    from app.utils.anomalies import detect_anomalies
+    from app.utils.forecasting import build_engine, generate_insights, normalize_columns, read_csv_bytes
+    from app.utils.reporting import generate_pdf_report
+
+    history = synthetic_series(rows, frequency)
+    csv_bytes = to_csv_bytes(history.rename(columns={'ds': 'date', 'y': 'sales'}))
+    raw = read_csv_bytes(csv_bytes)
+    forecast = synthetic_forecast(rows, frequency, days)
+    anomalies = detect_anomalies(forecast, history)
+    insights = generate_insights(forecast, anomalies, history)
+    metrics = {"MAE": 1.6, "RMSE": 2.0, "MAPE": 1.5}
+    result = {"forecast": forecast, "anomalies": anomalies, "metrics": metrics, "insights": insights}
+
+    state: Dict[str, Any] = {}
+
+    def fit():
+        state["engine"], _ = build_engine(history, days, engine=engine, interval={"mode": "full", "samples": 300, "seed": 0})
+        state["engine"].fit(history)
+
+    def predict():
+        if "engine" not in state:
+            fit()
+        state["engine"].predict(days)
+
+    def end_to_end():
+        from fastapi.testclient import TestClient
+        from app.main import app
+        from app.utils.cache import forecast_cache, model_cache
+
+        forecast_cache.clear()
+        model_cache.clear()
+        response = TestClient(app).post(
+            f"/forecast?days={days}&engine={engine}",
+            files={"file": ("bench.csv", csv_bytes, "text/csv")}
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"/forecast returned {response.status_code}: {response.text[:200]}")
+
+    return {
+        "parse": lambda: read_csv_bytes(csv_bytes),
+        "normalize": lambda: normalize_columns(raw.copy()),
+        "fit": fit,
+        "predict": predict,
+        "anomalies": lambda: detect_anomalies(forecast, history),
+        "insights": lambda: generate_insights(forecast, anomalies, history),
+        "serialize": lambda: json.dumps(forecast_payload(result, rows, days, 'additive', 'linear'), default=str),
+        "pdf": lambda: generate_pdf_report(forecast, metrics, insights, anomalies),
+        "end_to_end": end_to_end
+    }
+
+
+def run(
+    frequencies: List[str],
+    sizes: List[int],
+    stages: List[str],
+    repeats: int = 3,
+    days: int = 30,
+    engine: str = 'prophet',
+    max_fit_rows: int = 10_000,
+    max_pdf_rows: int = 100_000,
+    memory: bool = True
+) -> List[Dict[str, Any]]:
+    logging.getLogger("cmdstanpy").disabled = True
+
+    results = []
+    warmed_up = False
+    for frequency in frequencies:
+        for rows in sizes:
+            if rows > MAX_ROWS.get(frequency, rows):
+                continue
+            functions = stage_functions(frequency, rows, days, engine)
+            for stage in stages:
+                if stage in FIT_STAGES and rows > max_fit_rows or stage == "pdf" and rows > max_pdf_rows:
+                    continue
+                if stage == "end_to_end" and not warmed_up:
+                    # The first request pays for starting the worker pool
+                    functions[stage]()
+                    warmed_up = True
+                record = {"frequency": frequency, "rows": rows, "stage": stage}
+                record.update(measure(functions[stage], repeats, memory))
+                results.append(record)
+                print(
+                    f"{frequency:<7} {rows:>9} rows  {stage:<11} {1000 * record['seconds']:>10.1f} ms"
+                    + (f"  {record['peak_mb']:>8.1f} MB" if memory else ""),
+                    flush=True
+                )
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    import prophet
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "prophet": prophet.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    }
+
+
+def result_key(record: Dict[str, Any]) -> str:
+    return f"{record['frequency']}/{record['rows']}/{record['stage']}"
+
+
+def compare(
+    results: List[Dict[str, Any]],
+    baseline: List[Dict[str, Any]],
+    threshold: float,
+    min_seconds: float = MIN_SECONDS
+) -> List[Dict[str, Any]]:
+    """
+    Stages slower than baseline * (1 + threshold) by more than min_seconds. Stages missing
+    from either side are ignored.
+    """
+    previous = {result_key(r): r for r in baseline}
+    regressions = []
+    for record in results:
+        before = previous.get(result_key(record))
+        if before is None:
+            continue
+        limit = before["seconds"] * (1 + threshold)
+        if record["seconds"] > limit and record["seconds"] - before["seconds"] > min_seconds:
+            regressions.append({
+                "key": result_key(record),
+                "baseline_seconds": before["seconds"],
+                "seconds": record["seconds"],
+                "ratio": round(record["seconds"] / before["seconds"], 2) if before["seconds"] else None
+            })
+    return regressions
+
+
+def load_results(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def write_results(path: str, results: List[Dict[str, Any]], extra: Optional[Dict[str, Any]] = None) -> None:
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": results, **(extra or {})}, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frequencies", nargs="+", choices=list(FREQUENCIES), default=list(FREQUENCIES))
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--engine", default="prophet")
+    parser.add_argument("--max-fit-rows", type=int, default=10_000)
+    parser.add_argument("--max-pdf-rows", type=int, default=100_000)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    parser.add_argument("--baseline", help="Compare against results previously written with --output")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown over the baseline (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", help="Write these results as the new baseline")
+    args = parser.parse_args()
+
+    results = run(
+        args.frequencies, args.sizes, args.stages, args.repeats, args.days, args.engine,
+        args.max_fit_rows, args.max_pdf_rows, memory=not args.no_memory
+    )
+
+    regressions = []
+    if args.baseline:
+        regressions = compare(results, load_results(args.baseline), args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {r['key']}: {1000 * r['baseline_seconds']:.1f} ms -> {1000 * r['seconds']:.1f} ms (x{r['ratio']})")
+        print(f"{len(regressions)} regression(s) against {args.baseline} at +{100 * args.threshold:.0f}%")
+
+    if args.output:
+        write_results(args.output, results, {"regressions": regressions} if args.baseline else None)
+    if args.save_baseline:
+        write_results(args.save_baseline, results)
+    sys.exit(1 if regressions else 0)
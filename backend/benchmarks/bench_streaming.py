@@ -0,0 +1,105 @@
+"""
+Compare /forecast with /forecast/stream on the same upload: the time to the first response
+byte, the time to the last one, and the peak memory traced in the server process while the
+request runs (parse, the result and the response body; the fit runs in a worker process).
+Memory is traced on a second request, as tracemalloc slows the encoders down.
+
+The app is driven in-process through ASGI, so the timings don't include a network; the
+forecast and model caches are cleared before every request so each one does the full work.
+
+Usage (from backend/):
+    python -m benchmarks.bench_streaming --sizes 10000 100000 500000 --output streaming.json
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+from benchmarks.bench_stages import environment
+from benchmarks.datasets import synthetic_series, to_csv_bytes
+
+DEFAULT_SIZES = [10_000, 100_000, 500_000]
+ROUTES = ["/forecast", "/forecast/stream"]
+
+
+async def request(app, path: str, query: str, csv: bytes) -> Dict[str, Any]:
+    import httpx
+
+    prepared = httpx.Request("POST", f"http://bench{path}?{query}", files={"file": ("series.csv", csv, "text/csv")})
+    body = prepared.read()
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": query.encode(), "server": ("bench", 80), "client": ("bench", 1),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in prepared.headers.items()]
+    }
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            await asyncio.sleep(3600)
+            return {"type": "http.disconnect"}
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    timing = {"status": None, "first_byte": None, "bytes": 0}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            timing["status"] = message["status"]
+        elif message["type"] == "http.response.body" and message.get("body"):
+            if timing["first_byte"] is None:
+                timing["first_byte"] = time.perf_counter() - started
+            timing["bytes"] += len(message["body"])
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    timing["seconds"] = time.perf_counter() - started
+    return timing
+
+
+def run(sizes: List[int], days: int = 30, engine: str = "seasonal_naive") -> List[Dict[str, Any]]:
+    from app.main import app
+    from app.utils.cache import forecast_cache, model_cache
+
+    query = f"days={days}&engine={engine}&granularity=native"
+    results = []
+    # Start the worker pool (and the progress queue's manager) outside the measurements
+    asyncio.run(request(app, "/forecast/stream", query, to_csv_bytes(synthetic_series(500, "hourly"))))
+    for rows in sizes:
+        csv = to_csv_bytes(synthetic_series(rows, "hourly"))
+        for path in ROUTES:
+            forecast_cache.clear()
+            model_cache.clear()
+            timing = asyncio.run(request(app, path, query, csv))
+            forecast_cache.clear()
+            model_cache.clear()
+            tracemalloc.start()
+            asyncio.run(request(app, path, query, csv))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            record = {"rows": rows, "route": path, **timing, "peak_mb": round(peak / 1024 / 1024, 2)}
+            results.append(record)
+            print(
+                f"{rows:>9} rows  {path:<17} {timing['status']}  first byte {1000 * timing['first_byte']:>9.1f} ms"
+                f"  last byte {1000 * timing['seconds']:>9.1f} ms  {record['peak_mb']:>8.1f} MB peak",
+                flush=True
+            )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--engine", default="seasonal_naive")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.days, args.engine)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2)
@@ -0,0 +1,68 @@
+"""
+Synthetic series for the benchmarks: trend, seasonality, noise and injected anomalies.
+
+Every dataset is deterministic for a given (frequency, rows, seed), so runs on different
+machines or commits time exactly the same data.
+"""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+# Step between rows and the seasonal cycles (in rows) layered onto each frequency
+FREQUENCIES: Dict[str, Dict] = {
+    "daily": {"freq": "D", "start": "1900-01-01", "periods": (7, 365.25)},
+    "hourly": {"freq": "h", "start": "1990-01-01", "periods": (24, 24 * 7)},
+    "minute": {"freq": "min", "start": "2020-01-01", "periods": (60, 60 * 24)}
+}
+# Daily data past ~100k rows runs beyond the nanosecond timestamp range
+MAX_ROWS = {"daily": 100_000}
+
+ANOMALY_RATE = 0.01
+NOISE_SD = 2.0
+
+
+def synthetic_series(rows: int, frequency: str = "daily", seed: int = 0) -> pd.DataFrame:
+    """
+    'ds'/'y' frame with a linear trend, two seasonal cycles, Gaussian noise and
+    ANOMALY_RATE of rows pushed 8-15 noise deviations off the signal.
+    """
+    spec = FREQUENCIES[frequency]
+    if rows > MAX_ROWS.get(frequency, rows):
+        raise ValueError(f"{frequency} series are limited to {MAX_ROWS[frequency]} rows.")
+
+    rng = np.random.default_rng([seed, rows])
+    y = signal(rows, frequency) + rng.normal(0, NOISE_SD, rows)
+
+    n_anomalies = int(rows * ANOMALY_RATE)
+    if n_anomalies:
+        idx = rng.choice(rows, size=n_anomalies, replace=False)
+        y[idx] += rng.choice([-1, 1], size=n_anomalies) * rng.uniform(8, 15, size=n_anomalies) * NOISE_SD
+    return pd.DataFrame({'ds': pd.date_range(spec["start"], periods=rows, freq=spec["freq"]), 'y': y})
+
+
+def signal(rows: int, frequency: str = "daily") -> np.ndarray:
+    """
+    The noise-free values of synthetic_series(): what a perfect model would predict.
+    """
+    short, long = FREQUENCIES[frequency]["periods"]
+    t = np.arange(rows, dtype='float64')
+    return 100 + 20 * t / max(rows, 1) + 10 * np.sin(2 * np.pi * t / short) + 5 * np.sin(2 * np.pi * t / long)
+
+
+def synthetic_forecast(rows: int, frequency: str = "daily", days: int = 30) -> pd.DataFrame:
+    """
+    A forecast frame (history plus `days` daily future rows) built from the true signal,
+    with 95% bands. Lets the post-fit stages be timed at sizes no model could be fitted on.
+    """
+    spec = FREQUENCIES[frequency]
+    history = pd.date_range(spec["start"], periods=rows, freq=spec["freq"])
+    future = history[-1] + pd.to_timedelta(np.arange(1, days + 1), unit='D')
+    ds = history.append(future)
+    yhat = signal(rows + days, frequency)
+    half_width = 1.96 * NOISE_SD
+    return pd.DataFrame({'ds': ds, 'yhat': yhat, 'yhat_lower': yhat - half_width, 'yhat_upper': yhat + half_width})
+
+
+def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    return df.to_csv(index=False).encode()
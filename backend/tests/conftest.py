@@ -1,27 +1,49 @@
+import numpy as np
+import pandas as pd
 import pytest
-import os
-import shutil
 from fastapi.testclient import TestClient
 from app.main import app
+from app.utils.cache import fold_cache, forecast_cache, model_cache
+
+@pytest.fixture(autouse=True)
+def reset_caches():
+    # Every test computes its own results instead of finding an earlier test's in the caches
+    forecast_cache.clear()
+    model_cache.clear()
+    fold_cache.clear()
 
 @pytest.fixture
 def client():
     return TestClient(app)
 
 @pytest.fixture
-def setup_data_dir():
-    # Ensure data directory exists
-    data_dir = "data"
-    os.makedirs(data_dir, exist_ok=True)
-    yield
-    # Cleanup after tests (optional, safe to keep for debugging)
-    # shutil.rmtree(data_dir)
+def sample_csv(tmp_path):
+    filename = tmp_path / "test_sample.csv"
+    filename.write_text("ds,y\n2023-01-01,100\n2023-01-02,110\n2023-01-03,105")
+    return str(filename)
+
+@pytest.fixture
+def series_frame():
+    """
+    Factory for a synthetic 'ds'/'y' frame: a weekly cycle around 100 on a linear trend, plus
+    seeded Gaussian noise, so the same arguments always give the same frame.
+    """
+    def make(periods=120, start="2023-01-01", freq="D", trend=0.2, noise=1.0, seed=0):
+        ds = pd.date_range(start=start, periods=periods, freq=freq)
+        steps = np.arange(periods)
+        y = 100 + steps * trend + 5 * np.sin(steps * 2 * np.pi / 7) + np.random.default_rng(seed).normal(0, noise, periods)
+        return pd.DataFrame({'ds': ds, 'y': y})
+    return make
 
 @pytest.fixture
-def sample_csv():
-    content = "ds,y\n2023-01-01,100\n2023-01-02,110\n2023-01-03,105"
-    filename = "data/test_sample.csv"
-    os.makedirs("data", exist_ok=True)
-    with open(filename, "w") as f:
-        f.write(content)
-    return filename
+def series_csv(series_frame):
+    """
+    Factory for a series_frame() as an uploaded CSV file's bytes. date_column and value_column
+    rename the columns; values replaces the generated ones.
+    """
+    def make(periods=120, start="2023-01-01", freq="D", date_column="ds", value_column="y", values=None, **shape):
+        df = series_frame(periods, start, freq, **shape)
+        if values is not None:
+            df['y'] = values
+        return df.rename(columns={'ds': date_column, 'y': value_column}).to_csv(index=False).encode()
+    return make
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils.anomalies import detect_anomalies
+
+def _frames(n=400, seed=5):
+    rng = np.random.default_rng(seed)
+    ds = pd.date_range(start='2022-01-01', periods=n)
+    yhat = 50 + 10 * np.sin(np.arange(n) * 2 * np.pi / 7)
+    y = yhat + rng.normal(0, 1, n)
+    spikes = [50, 150, 300]
+    y[spikes] += [15, -20, 30]
+    forecast = pd.DataFrame({'ds': ds, 'yhat': yhat, 'yhat_lower': yhat - 3, 'yhat_upper': yhat + 3})
+    return forecast, pd.DataFrame({'ds': ds, 'y': y}), ds[spikes]
+
+@pytest.mark.parametrize("method", ["interval", "zscore", "hampel", "percentile"])
+def test_detectors_find_spikes(method):
+    forecast, actuals, spike_dates = _frames()
+    threshold = 99.0 if method == "percentile" else None
+    anomalies = detect_anomalies(forecast, actuals, method=method, threshold=threshold)
+    assert set(spike_dates) <= set(anomalies['ds'])
+    assert list(anomalies.columns) == ['ds', 'y', 'yhat', 'yhat_lower', 'yhat_upper', 'severity', 'severity_level']
+
+@pytest.mark.parametrize("method", ["interval", "zscore", "hampel", "percentile"])
+def test_chunking_matches_single_pass(method):
+    forecast, actuals, _ = _frames(n=3000)
+    # Heavy-tailed residuals whose spread drifts, so each rolling window differs from the last
+    rng = np.random.default_rng(11)
+    n = len(actuals)
+    actuals['y'] = forecast['yhat'] + rng.standard_t(2, n) * np.linspace(0.5, 4, n)
+    # Only the history has actuals; the forecast runs past it
+    actuals = actuals.iloc[:2800]
+    whole = detect_anomalies(forecast, actuals, method=method)
+    chunked = detect_anomalies(forecast, actuals, method=method, chunk_rows=100)
+    pd.testing.assert_frame_equal(whole, chunked)
+
+def test_alignment_ignores_order_and_unmatched_rows():
+    forecast, actuals, spike_dates = _frames()
+    shuffled = actuals.sample(frac=1, random_state=0)
+    extra = pd.DataFrame({'ds': [pd.Timestamp('2030-01-01')], 'y': [1e6]})
+    anomalies = detect_anomalies(forecast.iloc[::-1], pd.concat([shuffled, extra]))
+    assert set(anomalies['ds']) == set(detect_anomalies(forecast, actuals)['ds'])
+    assert set(spike_dates) <= set(anomalies['ds'])
+
+def test_zero_forecast_is_high_severity():
+    forecast = pd.DataFrame({'ds': pd.date_range('2024-01-01', periods=2), 'yhat': [0.0, 10.0],
+                             'yhat_lower': [-1.0, 9.0], 'yhat_upper': [1.0, 11.0]})
+    actuals = pd.DataFrame({'ds': forecast['ds'], 'y': [5.0, 11.5]})
+    anomalies = detect_anomalies(forecast, actuals)
+    assert anomalies['severity_level'].tolist() == ['High', 'Medium']
+
+def test_unknown_detector():
+    forecast, actuals, _ = _frames()
+    with pytest.raises(ValueError):
+        detect_anomalies(forecast, actuals, method="bogus")
@@ -0,0 +1,74 @@
+import asyncio
+import pandas as pd
+import pytest
+from app.utils.backtesting import make_cutoffs, run_backtest
+from app.utils.cache import ForecastCache
+from app.utils.executor import ForecastExecutor
+
+def test_cutoffs_expand_to_the_end(series_frame):
+    ds = series_frame(200)['ds']
+    cutoffs = make_cutoffs(ds, horizon=14, initial=60, step=7)
+    assert ds.max() - pd.Timedelta(days=21) < cutoffs[-1] <= ds.max() - pd.Timedelta(days=14)
+    assert cutoffs[0] == ds.min() + pd.Timedelta(days=60)
+    assert all(b - a == pd.Timedelta(days=7) for a, b in zip(cutoffs, cutoffs[1:]))
+    assert make_cutoffs(ds, horizon=14, initial=60, step=7, max_folds=3) == cutoffs[-3:]
+    # Appended days never move the earlier cutoffs, whether or not they add one
+    for extra in range(1, 8):
+        longer = pd.Series(pd.date_range(ds.min(), periods=len(ds) + extra))
+        assert make_cutoffs(longer, horizon=14, initial=60, step=7)[:len(cutoffs)] == cutoffs
+    with pytest.raises(ValueError):
+        make_cutoffs(ds, horizon=150, initial=100, step=7)
+
+def test_backtest_reports_per_horizon_metrics_and_reuses_folds(series_frame):
+    executor = ForecastExecutor(max_workers=0, max_queue=4)
+    cache = ForecastCache(fields=("yhat", "fit_seconds"))
+    df = series_frame(200)
+    first = asyncio.run(run_backtest(df, executor, cache, horizon=7, initial=150, step=7, engine='fourier'))
+    assert first["fold_count"] == len(first["folds"]) >= 5
+    assert [h["horizon_days"] for h in first["horizons"]] == list(range(1, 8))
+    assert first["metrics"]["MAPE"] < 5
+    assert first["timing"]["folds_cached"] == 0
+
+    again = asyncio.run(run_backtest(df, executor, cache, horizon=7, initial=150, step=7, engine='fourier'))
+    assert again["timing"]["folds_fitted"] == 0
+    assert again["horizons"] == first["horizons"]
+
+    # A week more data: the earlier folds still hit the cache, only the new cutoff is fitted
+    longer = pd.concat([df, series_frame(207).iloc[200:]], ignore_index=True)
+    extended = asyncio.run(run_backtest(longer, executor, cache, horizon=7, initial=150, step=7, engine='fourier'))
+    assert extended["timing"]["folds_fitted"] == 1
+    # Three more days add no cutoff, so nothing is refitted
+    shifted = pd.concat([df, series_frame(203).iloc[200:]], ignore_index=True)
+    assert asyncio.run(run_backtest(shifted, executor, cache, horizon=7, initial=150, step=7, engine='fourier'))["timing"]["folds_fitted"] == 0
+    executor.shutdown()
+
+def test_backtest_resamples_before_cutting_folds(series_frame):
+    executor = ForecastExecutor(max_workers=0, max_queue=4)
+    cache = ForecastCache(fields=("yhat", "fit_seconds"))
+    hourly = series_frame(200).set_index('ds').resample('h').ffill().reset_index()
+    daily = asyncio.run(run_backtest(hourly, executor, cache, horizon=7, initial=150, step=7, engine='fourier', granularity='day'))
+    assert daily["resampling"]["granularity"] == "day"
+    # Folds are cut from the 200 daily rows, not the hourly ones
+    assert daily["folds"][0]["train_rows"] == 151
+    assert daily["horizons"][0]["count"] == daily["fold_count"]
+
+    # Another aggregation is a different backtest, even where the data comes out the same
+    native = asyncio.run(run_backtest(series_frame(200), executor, cache, horizon=7, initial=150, step=7, engine='fourier'))
+    summed = asyncio.run(run_backtest(series_frame(200), executor, cache, horizon=7, initial=150, step=7, engine='fourier', aggregation='sum'))
+    assert summed["timing"]["folds_fitted"] == summed["fold_count"] == native["fold_count"]
+    executor.shutdown()
+
+def test_backtest_route(client, tmp_path, series_frame):
+    csv = tmp_path / "series.csv"
+    series_frame(120).to_csv(csv, index=False)
+    with open(csv, "rb") as f:
+        response = client.post("/backtest?horizon=7&initial=90&step=7", files={"file": ("series.csv", f, "text/csv")})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["fold_count"] >= 3
+    assert len(body["horizons"]) == 7
+
+def test_backtest_route_too_short(client, sample_csv):
+    with open(sample_csv, "rb") as f:
+        response = client.post("/backtest?horizon=30", files={"file": ("test.csv", f, "text/csv")})
+    assert response.status_code == 400
@@ -0,0 +1,50 @@
+import json
+import pandas as pd
+from app.utils.batch import split_series
+
+BATCH_CSV = (
+    "sku,date,sales\n"
+    "B,2023-01-02,12\nA,2023-01-01,100\nB,2023-01-01,10\nA,2023-01-02,110\n"
+    "A,2023-01-03,105\nB,2023-01-03,11\nC,2023-01-01,5\n"
+)
+
+def test_split_series_groups_sorted_views():
+    df = pd.DataFrame({
+        'sku': ['B', 'A', 'B', 'A'],
+        'date': ['2023-01-02', '2023-01-01', '2023-01-01', '2023-01-02'],
+        'sales': [2, 3, 1, 4]
+    })
+    groups = list(split_series(df))
+    assert [g[0] for g in groups] == ['A', 'B']
+    assert groups[1][2].tolist() == [1.0, 2.0]
+    assert groups[0][2].base is not None  # slice of the shared sorted array
+
+def test_batch_forecast_columnar(client):
+    response = client.post(
+        "/forecast/batch?days=3",
+        files={"file": ("batch.csv", BATCH_CSV.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    status = {s["series_id"]: s["status"] for s in data["series"]}
+    # C has a single row, which Prophet cannot fit; the other series still succeed
+    assert status == {"A": "ok", "B": "ok", "C": "error"}
+    assert set(data["forecast"]["series_id"]) == {"A", "B"}
+    assert len(data["forecast"]["ds"]) == 12
+    assert "wall_seconds" in data["timing"]
+
+def test_batch_forecast_stream(client):
+    response = client.post(
+        "/forecast/batch?days=3&stream=true&series_column=sku",
+        files={"file": ("batch.csv", BATCH_CSV.encode(), "text/csv")}
+    )
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(line["series_id"] for line in lines[:-1]) == ["A", "B", "C"]
+    assert "summary" in lines[-1]
+
+def test_batch_missing_series_column(client, sample_csv):
+    with open(sample_csv, "rb") as f:
+        response = client.post("/forecast/batch", files={"file": ("test_sample.csv", f, "text/csv")})
+    assert response.status_code == 400
+    assert "series id column" in response.json()["detail"]
@@ -0,0 +1,43 @@
+import pytest
+from benchmarks.bench_formats import run as run_formats
+from benchmarks.bench_responses import run as run_responses
+from benchmarks.bench_stages import compare, run
+from benchmarks.datasets import synthetic_series
+
+def test_synthetic_series_is_deterministic():
+    first = synthetic_series(500, "hourly", seed=1)
+    assert first.equals(synthetic_series(500, "hourly", seed=1))
+    assert not first.equals(synthetic_series(500, "hourly", seed=2))
+    assert (first['ds'].diff().dropna() == first['ds'].iloc[1] - first['ds'].iloc[0]).all()
+    with pytest.raises(ValueError):
+        synthetic_series(10_000_000, "daily")
+
+def test_compare_flags_only_real_slowdowns():
+    baseline = [
+        {"frequency": "daily", "rows": 100, "stage": "parse", "seconds": 0.100},
+        {"frequency": "daily", "rows": 100, "stage": "fit", "seconds": 0.001},
+    ]
+    results = [
+        {"frequency": "daily", "rows": 100, "stage": "parse", "seconds": 0.200},
+        # 3x slower but under the noise floor
+        {"frequency": "daily", "rows": 100, "stage": "fit", "seconds": 0.003},
+        {"frequency": "daily", "rows": 1000, "stage": "parse", "seconds": 9.0},
+    ]
+    regressions = compare(results, baseline, threshold=0.25)
+    assert [r["key"] for r in regressions] == ["daily/100/parse"]
+    assert regressions[0]["ratio"] == 2.0
+
+def test_cheap_stages_run():
+    results = run(["daily"], [100], ["parse", "normalize", "anomalies", "insights", "serialize"], repeats=1)
+    assert [r["stage"] for r in results] == ["parse", "normalize", "anomalies", "insights", "serialize"]
+    assert all(r["seconds"] >= 0 and "peak_mb" in r for r in results)
+
+def test_format_comparison_runs():
+    results = run_formats([200], ["csv", "csv_streaming"], repeats=1, memory=False)
+    assert [r["format"] for r in results] == ["csv", "csv_streaming"]
+    assert all(r["seconds"] > 0 for r in results)
+
+def test_response_comparison_runs():
+    results = run_responses([200], ["records", "fast", "columnar"], repeats=1)
+    sizes = {r["format"]: r["bytes"] for r in results}
+    assert sizes["columnar"] < sizes["records"]
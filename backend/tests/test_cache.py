@@ -0,0 +1,86 @@
+import time
+import pandas as pd
+from app.utils.cache import ForecastCache, make_cache_key, forecast_cache
+
+def _frame(values):
+    return pd.DataFrame({
+        'ds': pd.date_range(start='2023-01-01', periods=len(values)),
+        'y': values
+    })
+
+def _result(n=3):
+    return {
+        "forecast": _frame(list(range(n))),
+        "anomalies": pd.DataFrame(),
+        "metrics": {"MAE": 1.0},
+        "insights": {"insights": [], "recommendations": []},
+        "model": object()
+    }
+
+def test_cache_key_ignores_date_formatting():
+    a = pd.DataFrame({'ds': ['2023-01-01', '2023-01-02'], 'y': [1, 2]})
+    b = pd.DataFrame({'ds': ['01/01/2023', '01/02/2023'], 'y': [1.0, 2.0]})
+    assert make_cache_key(a, days=30) == make_cache_key(b, days=30)
+    assert make_cache_key(a, days=30) != make_cache_key(a, days=31)
+    assert make_cache_key(a, days=30) != make_cache_key(_frame([1, 3]), days=30)
+
+def test_memory_tier_sizes_objects_without_pickling(monkeypatch):
+    import numpy as np
+    import pickle
+
+    class Engine:
+        def __init__(self):
+            self.history = _frame(np.arange(1000.0))
+            self.params = {"k": np.zeros(500)}
+
+    def refuse(*args, **kwargs):
+        raise AssertionError("pickled on set()")
+
+    monkeypatch.setattr(pickle, "dumps", refuse)
+    cache = ForecastCache(fields=("engine", "metrics"))
+    cache.set("a", {"engine": Engine(), "metrics": {"MAE": 1.0}})
+    # Both arrays of the history and the parameter array are counted
+    assert cache.stats()["bytes"] >= 2 * 8000 + 4000
+
+def test_cache_lru_and_ttl():
+    cache = ForecastCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", _result())
+    cache.set("b", _result())
+    assert cache.get("a") is not None  # 'b' is now least recently used
+    cache.set("c", _result())
+    assert cache.get("b") is None
+    assert "model" not in cache.get("a")
+
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2 and stats["misses"] == 1
+
+    expiring = ForecastCache(ttl_seconds=0.01)
+    expiring.set("a", _result())
+    time.sleep(0.02)
+    assert expiring.get("a") is None
+
+def test_cache_memory_cap():
+    cache = ForecastCache(max_bytes=5000)
+    cache.set("small", _result(3))
+    cache.set("big", _result(1000))
+    assert cache.get("big") is None
+    assert cache.get("small") is not None
+    assert cache.stats()["bytes"] <= 5000
+
+def test_cache_disk_tier_shared(tmp_path):
+    writer = ForecastCache(disk_dir=str(tmp_path))
+    reader = ForecastCache(disk_dir=str(tmp_path))
+    writer.set("shared", _result())
+    hit = reader.get("shared")
+    assert hit is not None
+    assert hit["metrics"] == {"MAE": 1.0}
+    assert reader.stats()["disk_hits"] == 1
+
+def test_report_reuses_forecast_fit(client, sample_csv):
+    before = forecast_cache.stats()["hits"]
+    with open(sample_csv, "rb") as f:
+        assert client.post("/forecast?days=7", files={"file": ("test_sample.csv", f, "text/csv")}).status_code == 200
+    with open(sample_csv, "rb") as f:
+        assert client.post("/report?days=7", files={"file": ("test_sample.csv", f, "text/csv")}).status_code == 200
+    assert forecast_cache.stats()["hits"] == before + 1
@@ -0,0 +1,82 @@
+import os
+import pandas as pd
+import pytest
+from app.utils.datasets import DatasetStore, dataset_store
+
+parquet = pytest.importorskip("pyarrow.parquet")
+
+@pytest.fixture
+def store_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(dataset_store, "root", str(tmp_path))
+    return tmp_path
+
+def test_store_appends_parts_and_chains_hash(tmp_path, monkeypatch):
+    store = DatasetStore(str(tmp_path))
+    first = pd.DataFrame({'ds': pd.date_range("2023-01-01", periods=5).strftime("%Y-%m-%d"), 'y': range(5)})
+    meta = store.create(first, "sales")
+    assert meta["row_count"] == 5 and not meta["deduplicated"]
+    assert meta["first_ds"] == "2023-01-01T00:00:00" and meta["last_ds"] == "2023-01-05T00:00:00"
+    # The same rows make a dataset of their own unless the caller asks to reuse one
+    assert store.create(first)["id"] != meta["id"]
+    reused = store.create(first, reuse=True)
+    assert reused["deduplicated"] and reused["content_hash"] == meta["content_hash"]
+
+    part_file = os.path.join(tmp_path, meta["id"], meta["parts"][0]["file"])
+    written_at = os.stat(part_file).st_mtime_ns
+    more = pd.DataFrame({'ds': pd.date_range("2023-01-06", periods=2), 'y': [5.0, 6.0]})
+    appended = store.append(meta["id"], more)
+    assert appended["row_count"] == 7 and appended["rows_appended"] == 2
+    assert appended["content_hash"] != meta["content_hash"]
+    # The hash chains the parts' hashes: the same uploads in the same order hash the same, and
+    # an append extends it without reading the stored rows
+    other = DatasetStore(str(tmp_path / "other"))
+    copy = other.create(first)
+    monkeypatch.setattr(parquet, "read_table", None)
+    assert other.append(copy["id"], more)["content_hash"] == appended["content_hash"]
+    monkeypatch.undo()
+    # The first part is left as it was
+    assert os.stat(part_file).st_mtime_ns == written_at
+
+    loaded = store.load(meta["id"])
+    assert list(loaded["y"]) == [0, 1, 2, 3, 4, 5, 6]
+    assert loaded["ds"].dtype.kind == "M"
+    assert store.delete(meta["id"]) and store.load(meta["id"]) is None
+    with pytest.raises(ValueError):
+        store.get("../models")
+
+def test_appends_from_several_workers_are_all_kept(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    # Two stores on one directory stand in for two server processes
+    stores = [DatasetStore(str(tmp_path)), DatasetStore(str(tmp_path))]
+    meta = stores[0].create(pd.DataFrame({'ds': ["2023-01-01"], 'y': [0.0]}))
+    days = pd.date_range("2023-01-02", periods=16)
+
+    def append(i):
+        return stores[i % 2].append(meta["id"], pd.DataFrame({'ds': [days[i]], 'y': [float(i)]}))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(append, range(16)))
+    stored = stores[1].get(meta["id"])
+    assert stored["row_count"] == 17 and len(stored["parts"]) == 17
+    assert sorted(stores[0].load(meta["id"])["y"]) == [0.0] + list(range(16))
+
+def test_dataset_routes_and_forecast_by_id(client, store_dir, series_csv):
+    created = client.post("/datasets?name=store-1", files={"file": ("history.csv", series_csv(60), "text/csv")})
+    assert created.status_code == 201
+    dataset_id = created.json()["id"]
+
+    appended = client.post(f"/datasets/{dataset_id}/rows", files={"file": ("new.csv", series_csv(10, start="2023-03-02"), "text/csv")})
+    assert appended.json()["row_count"] == 70
+    assert [d["id"] for d in client.get("/datasets").json()["datasets"]] == [dataset_id]
+
+    response = client.post(f"/forecast?days=7&engine=seasonal_naive&dataset_id={dataset_id}")
+    assert response.status_code == 200
+    assert response.json()["row_count"] == 70
+    assert client.post(f"/backtest?horizon=7&engine=seasonal_naive&dataset_id={dataset_id}").status_code == 200
+
+    assert client.post("/forecast?days=7").status_code == 422
+    assert client.post(f"/forecast?days=7&dataset_id={'0' * 32}").status_code == 404
+    assert client.post("/forecast?days=7&dataset_id=nope").status_code == 400
+    assert client.delete(f"/datasets/{dataset_id}").json()["deleted"] is True
+    assert client.get(f"/datasets/{dataset_id}").status_code == 404
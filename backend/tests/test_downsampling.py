@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils.downsampling import chart_view, lttb_indices
+
+def _forecast(rows=2000):
+    ds = pd.date_range("2023-01-01", periods=rows, freq="h")
+    yhat = np.sin(np.arange(rows) / 50)
+    return pd.DataFrame({"ds": ds, "yhat": yhat, "yhat_lower": yhat - 1, "yhat_upper": yhat + 1})
+
+def test_lttb_keeps_edges_and_peaks():
+    x = np.arange(1000, dtype=float)
+    y = np.zeros(1000)
+    y[437] = 50.0
+    y[712] = -30.0
+    kept = lttb_indices(x, y, 20)
+    assert len(kept) == 20
+    assert kept[0] == 0 and kept[-1] == 999
+    assert np.all(np.diff(kept) > 0)
+    assert 437 in kept and 712 in kept
+    # Nothing to drop
+    assert list(lttb_indices(x[:10], y[:10], 20)) == list(range(10))
+
+def test_chart_view_forces_anomalies_and_boundary():
+    forecast = _forecast()
+    anomalies = pd.DataFrame({"ds": forecast["ds"].iloc[[123, 1501]], "y": [5.0, -5.0], "severity_level": ["high", "low"]})
+    history_end = forecast["ds"].iloc[1799]
+    window, window_anomalies, view = chart_view(forecast, anomalies, max_points=100, history_end=history_end)
+    assert view["downsampled"] and view["total_points"] == 2000
+    assert view["points"] == len(window) <= 100
+    assert set(anomalies["ds"]) <= set(window["ds"])
+    assert {history_end, forecast["ds"].iloc[1800]} <= set(window["ds"])
+    assert window["ds"].is_monotonic_increasing
+    assert len(window_anomalies) == 2
+
+def test_chart_view_window_and_validation():
+    forecast = _forecast()
+    anomalies = pd.DataFrame({"ds": forecast["ds"].iloc[[10, 500]], "y": [5.0, -5.0]})
+    start, end = forecast["ds"].iloc[400], forecast["ds"].iloc[599]
+    window, window_anomalies, view = chart_view(forecast, anomalies, start=start, end=end)
+    assert len(window) == 200 and not view["downsampled"]
+    assert view["start"] == start.isoformat() and view["end"] == end.isoformat()
+    assert list(window_anomalies["ds"]) == [forecast["ds"].iloc[500]]
+    with pytest.raises(ValueError):
+        chart_view(forecast, anomalies, start=end, end=start)
+
+def test_forecast_result_windows_without_refit(client, monkeypatch, series_csv):
+    csv = series_csv(400, values=100 + np.arange(400) % 7)
+    response = client.post(
+        "/forecast?days=30&engine=seasonal_naive&max_points=50",
+        files={"file": ("f.csv", csv, "text/csv")}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["chart"]["total_points"] == 430 and len(body["data"]) <= 50
+    assert body["chart"]["history_end"].startswith("2024-02-04")
+
+    # Zooming in is served from the cache: a refit would fail here
+    import app.routes.common as common
+    monkeypatch.setattr(common.forecast_executor, "run", None)
+    zoomed = client.get(f"/forecast/results/{body['result_id']}?start=2024-01-01&end=2024-01-31")
+    assert zoomed.status_code == 200
+    assert len(zoomed.json()["data"]) == 31
+    assert zoomed.json()["chart"]["downsampled"] is False
+    columnar = client.get(f"/forecast/results/{body['result_id']}?max_points=20&format=columnar")
+    assert len(columnar.json()["data"]["ds"]) <= 20
+
+    assert client.get(f"/forecast/results/{'0' * 64}").status_code == 404
+    assert client.get("/forecast/results/not-a-key").status_code == 422
+    assert client.get(f"/forecast/results/{body['result_id']}?start=2024-02-01&end=2024-01-01").status_code == 400
@@ -0,0 +1,57 @@
+import io
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils.encoding import encode_body, negotiate, records
+
+def _payload(rows=48):
+    ds = pd.date_range("2023-01-01", periods=rows, freq="h")
+    yhat = np.linspace(10, 20, rows)
+    forecast = pd.DataFrame({"ds": ds, "yhat": yhat, "yhat_lower": yhat - 1, "yhat_upper": yhat + 1})
+    anomalies = pd.DataFrame({"ds": ds[:2], "y": [1.5, 2.5], "yhat": yhat[:2]})
+    return {"message": "ok", "metrics": {"MAE": 1.25}, "anomalies": anomalies, "data": forecast}
+
+def test_negotiate_prefers_query_then_accept_quality():
+    assert negotiate(None, None) == "records"
+    assert negotiate(None, "text/html, */*") == "records"
+    assert negotiate(None, "application/json;q=0.5, application/vnd.apache.arrow.stream") == "arrow"
+    assert negotiate(None, "application/vnd.forecast.columnar+json;q=0.9, application/json;q=0.1") == "columnar"
+    assert negotiate("fast", "application/vnd.apache.arrow.stream") == "fast"
+    with pytest.raises(ValueError):
+        negotiate("xml", None)
+
+def test_fast_records_match_default_records():
+    payload = _payload()
+    expected = json.loads(json.dumps(records(payload), default=lambda v: v.isoformat()))
+    assert json.loads(encode_body(payload, "fast")) == expected
+
+def test_columnar_uses_epoch_milliseconds():
+    body = json.loads(encode_body(_payload(), "columnar"))
+    assert body["data"]["ds"][:2] == [1672531200000, 1672534800000]
+    assert body["data"]["yhat"][0] == 10.0
+    assert body["anomalies"]["y"] == [1.5, 2.5]
+    assert body["metrics"] == {"MAE": 1.25}
+
+def test_arrow_stream_carries_payload_metadata():
+    pa = pytest.importorskip("pyarrow")
+    table = pa.ipc.open_stream(io.BytesIO(encode_body(_payload(), "arrow"))).read_all()
+    assert table.column_names == ["ds", "yhat", "yhat_lower", "yhat_upper"]
+    assert table.num_rows == 48
+    rest = json.loads(table.schema.metadata[b"payload"])
+    assert rest["metrics"] == {"MAE": 1.25} and "data" not in rest
+
+def test_forecast_route_formats(client, series_csv):
+    csv = series_csv(60)
+
+    def post(url, **kwargs):
+        return client.post(url, files={"file": ("f.csv", csv, "text/csv")}, **kwargs)
+
+    default = post("/forecast?days=7&engine=seasonal_naive")
+    assert default.headers["content-type"] == "application/json"
+    fast = post("/forecast?days=7&engine=seasonal_naive&format=fast")
+    assert fast.headers["content-type"] == "application/vnd.forecast.records+json"
+    assert fast.json()["data"] == default.json()["data"]
+    columnar = post("/forecast?days=7&engine=seasonal_naive", headers={"Accept": "application/vnd.forecast.columnar+json"})
+    assert len(columnar.json()["data"]["ds"]) == len(default.json()["data"])
+    assert post("/forecast?days=7&format=xml").status_code == 400
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils.engines import make_engine, select_engine
+from app.utils.forecasting import forecast_from_model, generate_forecast
+
+@pytest.mark.parametrize("name", ["seasonal_naive", "holt_winters", "fourier"])
+def test_lightweight_engines_share_output_shape(name, series_frame):
+    df = series_frame(trend=0.3)
+    result = generate_forecast(df, days=14, engine=name)
+    forecast = result["forecast"]
+    assert list(forecast.columns) == ['ds', 'yhat', 'yhat_lower', 'yhat_upper']
+    assert len(forecast) == len(df) + 14
+    assert forecast['ds'].iloc[-1] == df['ds'].iloc[-1] + pd.Timedelta(days=14)
+    assert (forecast['yhat_lower'] <= forecast['yhat']).all()
+    assert (forecast['yhat'] <= forecast['yhat_upper']).all()
+    assert result["engine_info"]["name"] == name
+    # A weekly pattern with mild noise is well within 10% on the history
+    assert result["metrics"]["MAPE"] < 10
+
+@pytest.mark.parametrize("name", ["seasonal_naive", "holt_winters", "fourier"])
+def test_lightweight_engine_horizon_extension(name, series_frame):
+    df = series_frame(trend=0.3)
+    long = generate_forecast(df.copy(), days=30, engine=name)["forecast"].reset_index(drop=True)
+    short = generate_forecast(df.copy(), days=10, engine=name)
+    extended = forecast_from_model(short, 30)["forecast"].reset_index(drop=True)
+    np.testing.assert_allclose(extended['yhat'], long['yhat'])
+    np.testing.assert_allclose(extended['yhat_upper'], long['yhat_upper'])
+
+def test_auto_picks_cheap_engine_for_simple_series(series_frame):
+    name, selection = select_engine(series_frame(trend=0.3), 14, threshold=10.0)
+    assert name != "prophet"
+    assert selection["candidates"][-1]["engine"] == name
+
+def test_auto_falls_back_to_prophet(series_frame):
+    name, selection = select_engine(series_frame(10, trend=0.3), 5, threshold=10.0)
+    assert name == "prophet"
+    assert "reason" in selection
+
+    # Nothing can meet a zero threshold on noisy data
+    name, _ = select_engine(series_frame(trend=0.3, noise=5.0), 14, threshold=0.0)
+    assert name == "prophet"
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        make_engine("bogus")
+
+def test_forecast_route_engine(client, sample_csv):
+    with open(sample_csv, "rb") as f:
+        response = client.post("/forecast?days=5&engine=fourier", files={"file": ("test.csv", f, "text/csv")})
+    assert response.status_code == 200
+    assert response.json()["engine"]["name"] == "fourier"
@@ -0,0 +1,42 @@
+import asyncio
+import time
+import pytest
+from app.utils.executor import ExecutorBusy, ForecastExecutor, TaskTimeout
+
+def test_executor_runs_in_worker_process():
+    executor = ForecastExecutor(max_workers=1, max_queue=0)
+    try:
+        assert asyncio.run(executor.run(pow, 2, 10)) == 1024
+        assert executor.stats()["completed"] == 1
+    finally:
+        executor.shutdown()
+
+def test_executor_rejects_when_queue_full():
+    executor = ForecastExecutor(max_workers=0, max_queue=0, retry_after=7)
+    try:
+        executor.submit(time.sleep, 0.2)
+        with pytest.raises(ExecutorBusy) as exc:
+            executor.submit(time.sleep, 0.2)
+        assert exc.value.retry_after == 7
+        assert executor.stats()["rejected"] == 1
+    finally:
+        executor.shutdown()
+
+def test_executor_task_timeout():
+    executor = ForecastExecutor(max_workers=0, max_queue=1, task_timeout=0.05)
+    try:
+        with pytest.raises(TaskTimeout):
+            asyncio.run(executor.run(time.sleep, 0.3))
+        assert executor.stats()["timed_out"] == 1
+    finally:
+        executor.shutdown()
+
+def test_executor_replaces_workers_after_task_limit():
+    import os
+    executor = ForecastExecutor(max_workers=1, max_queue=2, max_tasks_per_child=2)
+    try:
+        pids = [asyncio.run(executor.run(os.getpid)) for _ in range(5)]
+        assert pids[0] == pids[1] != pids[2] == pids[3] != pids[4]
+        assert executor.stats()["completed"] == 5
+    finally:
+        executor.shutdown()
@@ -27,8 +27,8 @@ def test_forecast_missing_file(client):
     # FastAPI automatically handles missing required fields with 422
     assert response.status_code == 422
 
-def test_forecast_invalid_columns(client, setup_data_dir):
-    filename = "data/invalid.csv"
+def test_forecast_invalid_columns(client, tmp_path):
+    filename = tmp_path / "invalid.csv"
     with open(filename, "w") as f:
         f.write("unknown_col\n100") # Single column, definitely no date
     
@@ -50,3 +50,70 @@ def test_advanced_parameters(client, sample_csv):
     assert response.status_code == 200
     data = response.json()
     assert data["parameters"]["seasonality_mode"] == "multiplicative"
+
+def test_new_horizon_reuses_fitted_model(client, sample_csv):
+    from app.utils.cache import model_cache
+    responses = []
+    for days in (5, 12, 3):
+        with open(sample_csv, "rb") as f:
+            responses.append(client.post(
+                f"/forecast?days={days}&seasonality_mode=multiplicative",
+                files={"file": ("test_sample.csv", f, "text/csv")}
+            ))
+    assert [r.status_code for r in responses] == [200, 200, 200]
+    assert [len(r.json()["data"]) for r in responses] == [8, 15, 6]
+    # First request fitted; the next two were answered from the fitted model
+    assert model_cache.stats()["hits"] >= 2
+    assert responses[1].json()["data"][:8] == responses[0].json()["data"]
+
+def test_forecast_multiple_horizons(client, sample_csv):
+    with open(sample_csv, "rb") as f:
+        response = client.post(
+            "/forecast/horizons?horizons=30,7,90",
+            files={"file": ("test_sample.csv", f, "text/csv")}
+        )
+    assert response.status_code == 200
+    data = response.json()
+    assert list(data["horizons"]) == ["7", "30", "90"]
+    assert len(data["history"]) == 3
+    assert [len(h["data"]) for h in data["horizons"].values()] == [7, 30, 90]
+    assert data["horizons"]["7"]["data"] == data["horizons"]["90"]["data"][:7]
+
+def test_forecast_horizons_invalid(client, sample_csv):
+    with open(sample_csv, "rb") as f:
+        response = client.post("/forecast/horizons?horizons=7,abc", files={"file": ("test_sample.csv", f, "text/csv")})
+    assert response.status_code == 400
+
+def test_uploads_are_not_written_to_disk(client, monkeypatch, series_csv):
+    from starlette.formparsers import MultiPartParser
+    from app.config import DATA_DIR
+
+    # Spill this upload to a temporary file, as a large one would be
+    monkeypatch.setattr(MultiPartParser, "spool_max_size", 1024)
+    csv = series_csv(date_column="date", value_column="sales")
+    before = set(os.listdir(DATA_DIR)), set(os.listdir("data"))
+
+    response = client.post("/forecast?days=7&engine=seasonal_naive", files={"file": ("disk_check.csv", csv, "text/csv")})
+    assert response.status_code == 200
+    response = client.post("/report?days=7&engine=seasonal_naive", files={"file": ("disk_check.csv", csv, "text/csv")})
+    assert response.status_code == 200
+
+    assert (set(os.listdir(DATA_DIR)), set(os.listdir("data"))) == before
+
+def test_result_keeps_forecast_columns_unless_components_requested(client, sample_csv, monkeypatch, series_frame):
+    from app import config
+    df = series_frame(60)
+
+    lean = generate_forecast(df.copy(), days=5, interval_mode="fast")["forecast"]
+    assert list(lean.columns) == ["ds", "yhat", "yhat_lower", "yhat_upper"]
+    assert len(lean) == 65 and lean["ds"].is_monotonic_increasing
+    full = generate_forecast(df.copy(), days=5, interval_mode="fast", components=True)["forecast"]
+    assert {"trend", "weekly"} <= set(full.columns) and "trend_lower" not in full.columns
+
+    monkeypatch.setattr(config, "RESULT_FLOAT32", True)
+    compact = generate_forecast(df.copy(), days=5, engine="seasonal_naive")["forecast"]
+    assert (compact.dtypes[1:] == "float32").all()
+
+    with open(sample_csv, "rb") as f:
+        response = client.post("/forecast?days=3&components=true", files={"file": ("test_sample.csv", f, "text/csv")})
+    assert response.status_code == 200 and "trend" in response.json()["data"][0]
@@ -0,0 +1,133 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+from app import config
+from app.utils.forecasting import normalize_columns, read_csv_bytes
+from app.utils.ingestion import (
+    detect_encoding, infer_date_format, parse_fixed_width, read_columnar, read_series_csv, series_columns, sniff_format
+)
+
+def _csv(rows=120):
+    ds = pd.date_range("2023-01-01", periods=rows, freq="D")
+    return pd.DataFrame({
+        "store": ["north"] * rows,
+        "date": ds.strftime("%d/%m/%Y"),
+        "notes": ["promo" if i % 10 == 0 else "" for i in range(rows)],
+        "sales": 100 + np.arange(rows) % 7 + 0.5
+    }).to_csv(index=False).encode()
+
+def test_streamed_frame_matches_normalize_columns():
+    contents = _csv()
+    streamed = read_series_csv(io.BytesIO(contents), chunk_rows=25)
+    expected = normalize_columns(read_csv_bytes(contents))
+    assert list(streamed.columns) == ["ds", "y"]
+    assert streamed["y"].dtype == np.float32
+    assert (streamed["ds"] == pd.to_datetime(expected["ds"], format="%d/%m/%Y")).all()
+    np.testing.assert_allclose(streamed["y"], expected["y"])
+
+def test_values_are_narrowed_only_when_exact():
+    exact = b"ds,y\n2023-01-01,100.5\n2023-01-02,7\n"
+    assert read_series_csv(io.BytesIO(exact))["y"].dtype == np.float32
+    precise = b"ds,y\n2023-01-01,1\n2023-01-02,2\n2023-01-03,123456789.12\n"
+    df = read_series_csv(io.BytesIO(precise), chunk_rows=2)
+    assert df["y"].dtype == np.float64
+    assert df["y"].tolist() == [1.0, 2.0, 123456789.12]
+
+def test_date_format_inferred_once():
+    assert infer_date_format(pd.Series(["31/01/2023", "01/02/2023"])) == "%d/%m/%Y"
+    assert infer_date_format(pd.Series(["01/02/2023", "13/02/2023"])) == "%d/%m/%Y"
+    assert infer_date_format(pd.Series(["2023-01-31", "Feb 1 2023"])) is None
+
+def test_rows_in_other_layouts_and_bad_values():
+    contents = b"date,y\n2023-01-01,1\n2023-01-02,oops\n02 Jan 2023,3\n,4\n"
+    df = read_series_csv(io.BytesIO(contents))
+    assert df["ds"].tolist() == [pd.Timestamp("2023-01-01"), pd.Timestamp("2023-01-02")]
+    assert df["y"].tolist() == [1.0, 3.0]
+    with pytest.raises(ValueError, match="Could not parse date 'never'"):
+        read_series_csv(io.BytesIO(b"date,y\n2023-01-01,1\nnever,2\n"))
+
+def test_latin1_after_the_sample():
+    contents = _csv(5000) + "café,01/01/2036,,1\n".encode("latin1")
+    assert detect_encoding(contents[:1024]) == "utf-8"
+    df = read_series_csv(io.BytesIO(contents), chunk_rows=1000)
+    assert len(df) == 5001
+
+def test_large_upload_is_streamed(client, monkeypatch):
+    monkeypatch.setattr(config, "STREAMING_PARSE_MIN_BYTES", 0)
+    response = client.post(
+        "/forecast?days=7&engine=seasonal_naive",
+        files={"file": ("large.csv", _csv(), "text/csv")}
+    )
+    assert response.status_code == 200
+    assert response.json()["row_count"] == 120
+
+def test_day_first_dates_past_the_sample():
+    ds = pd.date_range("2023-01-01", periods=2000, freq="h")
+    contents = pd.DataFrame({"date": ds.strftime("%d/%m/%Y %H:%M"), "y": 1.0}).to_csv(index=False).encode()
+    df = read_series_csv(io.BytesIO(contents), chunk_rows=500)
+    assert (df["ds"] == ds).all()
+
+def test_fixed_width_fast_path():
+    values = pd.Series(["31/01/2023 23:59", "01/02/2023 00:00"])
+    parsed = parse_fixed_width(values, "%d/%m/%Y %H:%M")
+    assert parsed.tolist() == [pd.Timestamp("2023-01-31 23:59"), pd.Timestamp("2023-02-01 00:00")]
+    # Anything off the layout goes to pandas instead
+    assert parse_fixed_width(pd.Series(["1/02/2023 00:00"]), "%d/%m/%Y %H:%M") is None
+    assert parse_fixed_width(pd.Series(["31/02/2023 00:00"]), "%d/%m/%Y %H:%M") is None
+    assert parse_fixed_width(values, "%d %b %Y") is None
+
+def _columnar(file_format, frame):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    sink = io.BytesIO()
+    if file_format == "parquet":
+        pq.write_table(table, sink)
+    elif file_format == "arrow":
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue()
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow", "arrow_stream"])
+def test_columnar_reads_only_detected_columns(file_format):
+    frame = read_csv_bytes(_csv())
+    frame["date"] = pd.to_datetime(frame["date"], format="%d/%m/%Y").dt.tz_localize("UTC")
+    source = io.BytesIO(_columnar(file_format, frame))
+    assert sniff_format(source) == file_format
+    df = read_columnar(source, file_format, series_columns)
+    assert list(df.columns) == ["date", "sales"]
+    assert df["date"].dt.tz is None
+    expected = normalize_columns(read_csv_bytes(_csv()))
+    np.testing.assert_allclose(normalize_columns(df)["y"], expected["y"])
+    assert sniff_format(io.BytesIO(_csv())) == "csv"
+
+def test_parquet_upload_routes(client):
+    frame = read_csv_bytes(_csv())
+    frame["date"] = pd.to_datetime(frame["date"], format="%d/%m/%Y")
+    response = client.post(
+        "/forecast?days=7&engine=seasonal_naive",
+        files={"file": ("export.parquet", _columnar("parquet", frame), "application/octet-stream")}
+    )
+    assert response.status_code == 200
+    assert response.json()["row_count"] == 120
+
+    long = pd.concat([frame.assign(store=s) for s in ("north", "south")])
+    response = client.post(
+        "/forecast/batch?days=7&engine=seasonal_naive",
+        files={"file": ("export.arrow", _columnar("arrow", long), "application/octet-stream")}
+    )
+    assert response.status_code == 200
+    assert {s["series_id"]: s["status"] for s in response.json()["series"]} == {"north": "ok", "south": "ok"}
+
+def test_corrupt_parquet_is_a_bad_request(client):
+    pytest.importorskip("pyarrow")
+    response = client.post(
+        "/forecast?days=7",
+        files={"file": ("broken.parquet", b"PAR1 not really parquet", "application/octet-stream")}
+    )
+    assert response.status_code == 400
+    assert "Invalid Parquet file" in response.json()["detail"]
@@ -0,0 +1,102 @@
+import time
+import pytest
+from app.utils.executor import ForecastExecutor
+from app.utils.jobs import JobManager, SQLiteJobStore
+
+PARAMS = {"days": 5}
+
+def _wait(client, job_id, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = client.get(f"/jobs/{job_id}").json()
+        if job["status"] in ("succeeded", "failed", "cancelled"):
+            return job
+        time.sleep(0.1)
+    raise AssertionError("job did not finish")
+
+def test_forecast_job_lifecycle(client, sample_csv):
+    with open(sample_csv, "rb") as f:
+        response = client.post("/jobs/forecast?days=5", files={"file": ("test_sample.csv", f, "text/csv")})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    job = _wait(client, job_id)
+    assert job["status"] == "succeeded"
+    assert all(state == "done" for state in job["stages"].values())
+
+    result = client.get(f"/jobs/{job_id}/result")
+    assert result.status_code == 200
+    assert result.json()["row_count"] == 3
+    assert len(result.json()["data"]) == 8
+
+    report = client.get(f"/jobs/{job_id}/report.pdf")
+    assert report.status_code == 200
+    assert report.content.startswith(b"%PDF")
+
+def test_failed_job_reports_error(client):
+    response = client.post("/jobs/forecast", files={"file": ("bad.csv", b"unknown_col\n100", "text/csv")})
+    job = _wait(client, response.json()["job_id"])
+    assert job["status"] == "failed"
+    assert "Could not detect a date column" in job["error"]
+    assert client.get(f"/jobs/{job['id']}/result").status_code == 409
+
+def test_unknown_job(client):
+    assert client.get("/jobs/does-not-exist").status_code == 404
+
+def test_cancel_queued_job_and_expiry(tmp_path):
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    manager = JobManager(store, ForecastExecutor(max_workers=0, max_queue=1), workers=1, result_ttl=0.05)
+    try:
+        # Hold the only job thread so the second job stays queued
+        manager._threads.submit(time.sleep, 0.3)
+        job = manager.submit(b"ds,y\n2023-01-01,1", PARAMS)
+        assert manager.cancel(job["id"])["status"] == "cancelled"
+        time.sleep(0.1)
+        assert manager.get(job["id"]) is None
+    finally:
+        manager.shutdown()
+
+def test_sqlite_store_closes_connections(tmp_path, monkeypatch):
+    import sqlite3
+    opened = []
+    connect = sqlite3.connect
+
+    def tracking_connect(*args, **kwargs):
+        opened.append(connect(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(sqlite3, "connect", tracking_connect)
+    store = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    store.create({"id": "a", "status": "queued"})
+    store.update("a", status="running")
+    assert store.get("a")["status"] == "running"
+    for conn in opened:
+        # A closed connection refuses any further use
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+def test_cancel_from_another_worker_sharing_the_store(tmp_path, monkeypatch):
+    from app.utils import jobs
+
+    def slow_task(df, params, progress_queue):
+        progress_queue.put("fitting")
+        time.sleep(1.5)
+        return {}
+
+    monkeypatch.setattr(jobs, "run_forecast_task", slow_task)
+    path = str(tmp_path / "jobs.sqlite3")
+    running = JobManager(SQLiteJobStore(path), ForecastExecutor(max_workers=0, max_queue=1), workers=1)
+    other = JobManager(SQLiteJobStore(path), ForecastExecutor(max_workers=0, max_queue=1), workers=1)
+    try:
+        job = running.submit(b"ds,y\n2023-01-01,1\n2023-01-02,2\n", PARAMS)
+        deadline = time.time() + 5
+        while running.get(job["id"])["stage"] != "fitting" and time.time() < deadline:
+            time.sleep(0.05)
+        # The other worker has no thread for this job; it can only mark the shared row
+        assert other.cancel(job["id"])["status"] == "cancelling"
+        while running.get(job["id"])["status"] == "cancelling" and time.time() < deadline:
+            time.sleep(0.05)
+        assert running.get(job["id"])["status"] == "cancelled"
+    finally:
+        running.shutdown()
+        other.shutdown()
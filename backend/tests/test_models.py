@@ -0,0 +1,44 @@
+import pytest
+from app.utils.registry import model_registry
+
+@pytest.fixture
+def registry_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, "root", str(tmp_path))
+    return tmp_path
+
+def test_register_and_warm_refresh(client, registry_dir, series_csv):
+    response = client.post("/models/sku-1?days=7", files={"file": ("history.csv", series_csv(60), "text/csv")})
+    assert response.status_code == 200
+    assert response.json()["model"]["row_count"] == 60
+
+    response = client.post("/models/sku-1/append?days=7", files={"file": ("new.csv", series_csv(3, start="2023-03-02"), "text/csv")})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["refresh"]["rows_appended"] == 3
+    assert body["refresh"]["warm_started"] is True
+    assert body["model"]["row_count"] == 63
+    assert body["model"]["refreshes"] == 1
+    assert len(body["data"]) == 70
+
+    listed = client.get("/models/sku-1").json()
+    assert len(listed["models"]) == 1
+
+def test_refresh_resamples_appended_rows(client, registry_dir, series_csv):
+    # 'auto' aggregates 40 days of hourly rows to days for a 30 day horizon
+    response = client.post("/models/sku-2?days=30", files={"file": ("history.csv", series_csv(40 * 24, freq='h'), "text/csv")})
+    assert response.status_code == 200
+    assert response.json()["model"]["granularity"] == "day"
+
+    response = client.post("/models/sku-2/append?days=30", files={"file": ("new.csv", series_csv(48, start="2023-02-10", freq='h'), "text/csv")})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["refresh"]["rows_appended"] == 2
+    assert body["model"]["row_count"] == 42
+    assert body["model"]["granularity"] == "day"
+
+def test_refresh_unknown_series(client, registry_dir, series_csv):
+    response = client.post("/models/missing/append", files={"file": ("new.csv", series_csv(3, start="2023-03-02"), "text/csv")})
+    assert response.status_code == 404
+
+def test_invalid_series_id(client, registry_dir, series_csv):
+    assert client.get("/models/bad%20id").status_code == 400
@@ -0,0 +1,71 @@
+import time
+from app import config
+from app.utils.profiling import ProfileStore, RequestProfile, SamplingProfiler, run_profiled, summarize
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+    return "done"
+
+def test_sampling_profiler_records_stacks():
+    profiler = SamplingProfiler(0.001, label="server").start()
+    _busy(0.1)
+    samples = profiler.stop()
+    assert samples
+    assert all(stack.startswith("server;") for stack in samples)
+    assert any(stack.endswith("test_profiling.py:_busy") for stack in samples)
+
+def test_run_profiled_returns_samples_and_errors():
+    outcome = run_profiled(_busy, 0.001, 0.05)
+    assert outcome["result"] == "done"
+    assert any(stack.startswith("worker;") for stack in outcome["samples"])
+
+    outcome = run_profiled(int, 0.001, "not a number")
+    assert isinstance(outcome["error"], ValueError)
+
+def test_summary_ranks_by_cumulative_time():
+    profile = {
+        "id": "0" * 32, "route": "/forecast", "wall_seconds": 0.1, "interval": 0.01,
+        "samples": {"worker;a.py:run;b.py:fit": 6, "worker;a.py:run;c.py:predict": 3, "server;d.py:parse": 1}
+    }
+    lines = summarize(profile).splitlines()
+    assert "10 samples every 10 ms (9 in pool workers)" in lines[1]
+    assert lines[4].endswith("a.py:run") and "90.0%" in lines[4]
+    assert lines[5].endswith("b.py:fit")
+
+def test_store_prunes_oldest(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=2)
+    ids = []
+    for _ in range(3):
+        profile = RequestProfile("/forecast", interval=0.001).finish()
+        ids.append(store.save(profile))
+        time.sleep(0.01)
+    assert store.path(ids[0], "summary") is None
+    assert store.path(ids[2], "collapsed") is not None
+
+def test_profile_requires_admin_setting(client, series_csv):
+    response = client.post("/forecast?profile=true", files={"file": ("p.csv", series_csv(date_column="date", value_column="sales"), "text/csv")})
+    assert response.status_code == 403
+    assert client.get(f"/debug/profiles/{'0' * 32}").status_code == 403
+
+def test_profiled_forecast_covers_worker(client, monkeypatch, tmp_path, series_csv):
+    from app.utils.profiling import profile_store
+    monkeypatch.setattr(config, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(profile_store, "root", str(tmp_path))
+
+    response = client.post("/forecast?days=7&profile=true", files={"file": ("p.csv", series_csv(date_column="date", value_column="sales"), "text/csv")})
+    assert response.status_code == 200
+    profile_id = response.headers["x-profile-id"]
+
+    collapsed = client.get(f"/debug/profiles/{profile_id}?format=collapsed")
+    assert collapsed.status_code == 200
+    assert any(
+        line.startswith("worker;") and "forecasting.py:generate_forecast" in line
+        for line in collapsed.text.splitlines()
+    )
+    summary = client.get(f"/debug/profiles/{profile_id}")
+    assert summary.text.startswith(f"Profile {profile_id} of /forecast")
+
+    assert client.get("/debug/profiles/not-an-id").status_code == 400
+    assert client.get(f"/debug/profiles/{'f' * 32}").status_code == 404
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.utils.forecasting import generate_forecast
+from app.utils.resampling import resample_series, resolve_granularity, timestamps
+
+def _minutes(days=40):
+    ds = pd.date_range("2023-01-02", periods=days * 24 * 60, freq="min")
+    y = 100 + 10 * np.sin(np.arange(len(ds)) / (24 * 60) * 2 * np.pi)
+    return pd.DataFrame({"ds": ds, "y": y})
+
+def test_auto_granularity_follows_frequency_and_horizon():
+    minutes = timestamps(_minutes()["ds"])
+    assert resolve_granularity(minutes, 7) == "hour"
+    assert resolve_granularity(minutes, 30) == "day"
+    # Too few days for a daily fit: keep hourly detail
+    assert resolve_granularity(minutes[:10 * 24 * 60], 30) == "hour"
+    daily = timestamps(pd.Series(pd.date_range("2023-01-01", periods=100, freq="D")))
+    assert resolve_granularity(daily, 30) == "native"
+    assert resolve_granularity(daily, 30, "week") == "week"
+    with pytest.raises(ValueError):
+        resolve_granularity(daily, 30, "fortnight")
+
+def test_duplicates_are_collapsed():
+    df = pd.DataFrame({
+        "ds": pd.to_datetime(["2023-01-02", "2023-01-01", "2023-01-02", "2023-01-03"]),
+        "y": [4.0, 1.0, 6.0, 3.0]
+    })
+    resampled, info = resample_series(df, 30, aggregation="mean")
+    assert list(resampled["y"]) == [1.0, 5.0, 3.0]
+    assert info["granularity"] == "native" and info["duplicates_collapsed"] == 1
+    last, _ = resample_series(df, 30, aggregation="last")
+    assert list(last["y"]) == [1.0, 6.0, 3.0]
+    # Nothing to change: the frame is passed through untouched
+    unique = df.drop_duplicates("ds")
+    assert resample_series(unique, 30)[0] is unique
+
+def test_sum_fills_empty_periods_and_weeks_start_on_monday():
+    df = pd.DataFrame({
+        "ds": pd.to_datetime(["2023-01-04 10:00", "2023-01-04 18:00", "2023-01-19 09:00"]),
+        "y": [2.0, 3.0, 7.0]
+    })
+    resampled, info = resample_series(df, 30, granularity="week", aggregation="sum")
+    assert list(resampled["ds"]) == list(pd.to_datetime(["2023-01-02", "2023-01-09", "2023-01-16"]))
+    assert list(resampled["y"]) == [5.0, 0.0, 7.0]
+    assert info["missing_periods"] == 1 and info["filled_periods"] == 1
+    assert info["anomaly_resolution"] == "week"
+
+def test_forecast_fits_resampled_history_and_keeps_native_anomalies():
+    df = _minutes(days=45)
+    spike = df["ds"].iloc[20_000]
+    df.loc[20_000, "y"] = 500.0
+    result = generate_forecast(df, days=30, engine="seasonal_naive")
+    info = result["resampling"]
+    assert info["granularity"] == "day" and info["rows"] == 45 and info["input_rows"] == len(df)
+    assert info["native_frequency"] == "min"
+    assert result["history_end"] == pd.Timestamp("2023-02-15")
+    # The spike is reported at its own minute, not as its day
+    assert spike in set(result["anomalies"]["ds"])
+
+def test_forecast_route_reports_granularity(client):
+    df = _minutes(days=35)
+    csv = df.assign(ds=df["ds"].dt.strftime("%Y-%m-%d %H:%M")).to_csv(index=False).encode()
+    response = client.post(
+        "/forecast?days=7&engine=seasonal_naive&aggregation=last",
+        files={"file": ("minutes.csv", csv, "text/csv")}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["resampling"]["granularity"] == "hour"
+    assert body["resampling"]["aggregation"] == "last"
+    assert body["row_count"] == len(df)
+    assert len(body["data"]) == 35 * 24 + 7
@@ -0,0 +1,78 @@
+import asyncio
+import httpx
+import pytest
+from app.main import app
+from app.utils.singleflight import SingleFlight, forecast_flights
+
+def test_concurrent_calls_share_one_computation():
+    flights = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flights.run("key", compute) for _ in range(10)))
+
+    assert asyncio.run(main()) == ["result"] * 10
+    assert len(calls) == 1
+    stats = flights.stats()
+    assert stats["leaders"] == 1 and stats["followers"] == 9 and stats["coalescing_ratio"] == 0.9
+    assert stats["in_flight"] == 0
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    flights = SingleFlight()
+    finished = []
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        finished.append(1)
+        return 42
+
+    async def main():
+        first = asyncio.create_task(flights.run("key", compute))
+        second = asyncio.create_task(flights.run("key", compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == 42
+    assert finished == [1]
+
+def test_errors_reach_every_caller_and_are_not_kept():
+    flights = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("bad data")
+
+    async def main():
+        return await asyncio.gather(*(flights.run("key", fail) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(e, ValueError) for e in asyncio.run(main()))
+    assert flights.stats()["failures"] == 1
+    # The next call starts over instead of reusing the failure
+    assert asyncio.run(main()) and flights.stats()["leaders"] == 2
+
+def test_identical_forecast_requests_coalesce(series_csv):
+    csv = series_csv(90)
+    before = forecast_flights.stats()
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post("/forecast?days=14&engine=seasonal_naive&interval_samples=17", files={"file": ("f.csv", csv, "text/csv")})
+                for _ in range(6)
+            ))
+
+    responses = asyncio.run(main())
+    assert {r.status_code for r in responses} == {200}
+    assert len({r.json()["result_id"] for r in responses}) == 1
+    after = forecast_flights.stats()
+    assert after["leaders"] - before["leaders"] == 1
+    assert after["followers"] - before["followers"] == 5
@@ -0,0 +1,49 @@
+import json
+import numpy as np
+import pandas as pd
+from app.utils.encoding import ndjson_batches, sse_event
+
+def _events(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = block.split("\n")
+        name = lines[0].removeprefix("event: ")
+        events.append((name, [json.loads(line.removeprefix("data: ")) for line in lines[1:]]))
+    return events
+
+def test_ndjson_batches_are_bounded_sse_events():
+    frame = pd.DataFrame({"ds": pd.date_range("2023-01-01", periods=5), "yhat": np.arange(5.0)})
+    batches = list(ndjson_batches(frame, 2))
+    assert [len(b) for b in batches] == [2, 2, 1]
+    assert json.loads(batches[0][0]) == {"ds": "2023-01-01T00:00:00", "yhat": 0.0}
+    assert sse_event("data", batches[2]) == b'event: data\ndata: {"ds":"2023-01-05T00:00:00","yhat":4.0}\n\n'
+
+def test_stream_sends_progress_then_rows_in_batches(client, series_csv):
+    y = 100 + np.arange(90) % 7 * 3.0
+    y[40] = 400
+    csv = series_csv(90, values=y)
+    response = client.post("/forecast/stream?days=14&engine=seasonal_naive&batch_rows=25", files={"file": ("f.csv", csv, "text/csv")})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+
+    names = [name for name, _ in events]
+    assert names[0] == "progress" and names[-1] == "done"
+    assert [data[0]["stage"] for name, data in events if name == "progress"] == ["parsed", "fitting", "predicting", "anomalies", "insights"]
+    summary = next(data[0] for name, data in events if name == "summary")
+    batches = [data for name, data in events if name == "data"]
+    assert max(len(b) for b in batches) == 25
+    rows = [row for batch in batches for row in batch]
+    assert len(rows) == summary["data_rows"] == 104
+    assert sum(len(data) for name, data in events if name == "anomalies") == summary["anomaly_rows"] > 0
+
+    # The same rows and summary fields as the one-shot body
+    body = client.post("/forecast?days=14&engine=seasonal_naive", files={"file": ("f.csv", csv, "text/csv")}).json()
+    assert rows == body["data"]
+    assert summary["result_id"] == body["result_id"] and summary["metrics"] == body["metrics"]
+
+def test_stream_reports_failures_as_error_event(client):
+    response = client.post("/forecast/stream?days=7&engine=seasonal_naive", files={"file": ("f.csv", b"ds,y\n2023-01-01,1\n", "text/csv")})
+    events = _events(response.text)
+    assert events[-1][0] == "error" and events[-1][1][0]["status_code"] == 400
+    assert client.post("/forecast/stream?days=7").status_code == 422
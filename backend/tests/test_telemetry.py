@@ -0,0 +1,75 @@
+import logging
+import pytest
+from app.utils.telemetry import (
+    Counter, Histogram, MetricsRegistry, record_stages, report_failures, server_timing, span, stage_failures, stage_seconds, stage_timer
+)
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.register(Histogram("stage_seconds", "Stage latency.", buckets=(0.1, 1)))
+    for value in (0.05, 0.5, 0.5, 3):
+        latency.observe(value, stage="fit")
+    text = registry.render()
+    assert "# TYPE stage_seconds histogram" in text
+    assert 'stage_seconds_bucket{stage="fit",le="0.1"} 1' in text
+    assert 'stage_seconds_bucket{stage="fit",le="1"} 3' in text
+    assert 'stage_seconds_bucket{stage="fit",le="+Inf"} 4' in text
+    assert 'stage_seconds_count{stage="fit"} 4' in text
+    assert 'stage_seconds_sum{stage="fit"} 4.05' in text
+
+def test_counter_escapes_label_values():
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("rows_total", "Rows."))
+    counter.inc(5, route='/a"b')
+    counter.inc(2, route='/a"b')
+    assert 'rows_total{route="/a\\"b"} 7' in registry.render()
+
+def test_span_records_failures():
+    before = stage_failures.value(stage="parse")
+    with pytest.raises(ValueError):
+        with span("parse"):
+            raise ValueError("bad file")
+    assert stage_failures.value(stage="parse") == before + 1
+
+def test_worker_timings_recorded_once():
+    timings = {}
+    with stage_timer(timings, "fit"):
+        pass
+    with stage_timer(timings, "fit"):
+        pass
+    assert list(timings) == ["fit"]
+    before = stage_seconds.count(stage="fit")
+    record_stages(timings)
+    assert stage_seconds.count(stage="fit") == before + 1
+
+def test_server_timing_sums_repeated_stages():
+    header = server_timing([("fit", 0.2), ("parse", 0.001), ("fit", 0.3)], total=0.6)
+    assert header == "parse;dur=1.0, fit;dur=500.0, total;dur=600.0"
+
+def test_forecast_response_has_server_timing_and_metrics(client, series_csv):
+    response = client.post(
+        "/forecast?days=7&engine=seasonal_naive",
+        files={"file": ("timed.csv", series_csv(date_column="date", value_column="sales"), "text/csv")}
+    )
+    assert response.status_code == 200
+    stages = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+    for stage in ("parse", "normalize", "fit", "predict", "anomalies", "insights", "serialize", "total"):
+        assert stage in stages
+
+    metrics = client.get("/metrics")
+    assert metrics.status_code == 200
+    assert metrics.headers["content-type"].startswith("text/plain")
+    text = metrics.text
+    assert 'forecast_stage_seconds_count{stage="fit"}' in text
+    assert 'forecast_rows_processed_total{route="/forecast"}' in text
+    assert 'http_requests_total{method="POST",route="/forecast",status="200"}' in text
+    assert 'forecast_cache_misses_total{cache="forecast"}' in text
+    assert "forecast_executor_in_flight" in text
+
+def test_report_failures_are_logged_and_counted(client, caplog):
+    before = report_failures.value(reason="invalid_input")
+    with caplog.at_level(logging.WARNING, logger="app.routes.forecast"):
+        response = client.post("/report?days=7", files={"file": ("one.csv", b"ds,y\n2023-01-01,1\n", "text/csv")})
+    assert response.status_code == 400
+    assert report_failures.value(reason="invalid_input") == before + 1
+    assert "Report rejected" in caplog.text
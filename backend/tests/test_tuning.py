@@ -0,0 +1,61 @@
+import asyncio
+import json
+import numpy as np
+import pytest
+from app.utils.cache import ForecastCache
+from app.utils.executor import ForecastExecutor
+from app.utils.tuning import SharedFrame, attach_frame, expand_space, run_tuning
+
+def test_shared_frame_round_trip(series_frame):
+    df = series_frame(50)
+    with SharedFrame(df) as shared:
+        attached = attach_frame(shared.spec)
+        window = attach_frame(shared.spec, df['ds'].iloc[19])
+    # Both are copies, so they outlive the unlinked block
+    np.testing.assert_array_equal(attached['y'].to_numpy(), df['y'].to_numpy())
+    assert (attached['ds'].to_numpy() == df['ds'].to_numpy(dtype='datetime64[ns]')).all()
+    np.testing.assert_array_equal(window['y'].to_numpy(), df['y'].to_numpy()[:20])
+
+def test_expand_space_validates():
+    assert len(expand_space({"engine": ["fourier", "holt_winters"], "growth": ["linear", "flat"]})) == 4
+    with pytest.raises(ValueError):
+        expand_space({"days": [1, 2]})
+    with pytest.raises(ValueError):
+        expand_space({"engine": []})
+    with pytest.raises(ValueError):
+        expand_space({"changepoint_prior_scale": list(range(1, 100))}, max_candidates=10)
+
+def test_successive_halving_prunes_and_ranks(series_frame):
+    executor = ForecastExecutor(max_workers=0, max_queue=4)
+    space = {"engine": ["seasonal_naive", "holt_winters", "fourier"], "growth": ["linear", "flat"]}
+    result = asyncio.run(run_tuning(series_frame(200), space, executor, horizon=7, initial=120, step=7, eta=2))
+    board = result["leaderboard"]
+    assert len(board) == 6
+    assert board[0]["status"] == "finished" and board[0]["folds"] == result["fold_count"]
+    assert result["best"]["engine"] == board[0]["parameters"]["engine"]
+    assert any(entry["status"] == "pruned" for entry in board)
+    assert result["timing"]["fold_fits_pruned"] > 0
+    executor.shutdown()
+
+def test_tuning_reuses_cached_folds(series_frame):
+    executor = ForecastExecutor(max_workers=0, max_queue=4)
+    cache = ForecastCache(fields=("yhat", "fit_seconds"))
+    space = {"engine": ["fourier", "holt_winters"]}
+    first = asyncio.run(run_tuning(series_frame(200), space, executor, cache, horizon=7, initial=120, step=7))
+    again = asyncio.run(run_tuning(series_frame(200), space, executor, cache, horizon=7, initial=120, step=7))
+    assert again["timing"]["fold_fits"] == 0
+    assert again["best"] == first["best"]
+    executor.shutdown()
+
+def test_tune_route(client, tmp_path, series_frame):
+    csv = tmp_path / "series.csv"
+    series_frame(120).to_csv(csv, index=False)
+    space = json.dumps({"engine": ["fourier", "seasonal_naive"]})
+    with open(csv, "rb") as f:
+        response = client.post("/tune", params={"space": space, "horizon": 7, "initial": 90}, files={"file": ("series.csv", f, "text/csv")})
+    assert response.status_code == 200
+    assert response.json()["best"]["engine"] in ("fourier", "seasonal_naive")
+
+    with open(csv, "rb") as f:
+        response = client.post("/tune", params={"space": "{bad"}, files={"file": ("series.csv", f, "text/csv")})
+    assert response.status_code == 400
@@ -0,0 +1,49 @@
+import asyncio
+import os
+import subprocess
+import sys
+from app.utils.executor import ForecastExecutor
+from app.utils.warmup import Warmup, warmup
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_app_import_does_not_load_prophet_or_reportlab():
+    code = "import sys, app.main; print('prophet' in sys.modules, 'reportlab' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, capture_output=True, text=True, check=True)
+    assert output.stdout.split() == ["False", "False"]
+
+def test_warmup_runs_initializer_before_ready():
+    calls = []
+    executor = ForecastExecutor(max_workers=0, max_queue=1, initializer=lambda: calls.append("warm"))
+    state = Warmup()
+    try:
+        assert state.stats()["ready"] is False
+        asyncio.run(state.run(executor))
+    finally:
+        executor.shutdown()
+    assert calls == ["warm"]
+    assert state.stats()["ready"] is True
+    assert state.stats()["warmup_seconds"] is not None
+
+def test_warmup_failure_is_reported():
+    class BrokenExecutor:
+        max_workers = 1
+        async def run(self, fn):
+            raise RuntimeError("worker crashed")
+
+    state = Warmup()
+    asyncio.run(state.run(BrokenExecutor()))
+    assert state.stats() == {"ready": False, "warmup_seconds": state.seconds, "error": "worker crashed"}
+
+def test_health_and_readiness(client, monkeypatch):
+    assert client.get("/healthz").json() == {"status": "ok"}
+
+    monkeypatch.setattr(warmup, "ready", False)
+    response = client.get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["status"] == "starting"
+
+    monkeypatch.setattr(warmup, "ready", True)
+    response = client.get("/readyz")
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"